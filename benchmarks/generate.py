@@ -0,0 +1,204 @@
+"""
+Generates synthetic dcos-deploy configurations of a given number of entities for the benchmarks. The entities are spread
+over include files (every fourth one vault-encrypted) and use all module types that can run against the fake cluster:
+plain, looped and _template/_vars apps, jobs, plain and vault-encrypted secrets, marathon groups, IAM groups and users,
+serviceaccounts, repositories, frameworks, edgelb pools and certs. They form dependency chains of CHAIN_LENGTH entities.
+"""
+import json
+import os
+import click
+import oyaml as yaml
+from dcosdeploy.util import encrypt_data, generate_key
+
+
+ENTITIES_PER_FILE = 50
+ENCRYPTED_FILE_EVERY = 4
+CHAIN_LENGTH = 25
+LOOP_VALUES = ["a", "b", "c"]
+TEMPLATE_INSTANCES = ["x", "y", "z"]
+
+APP = {
+    "id": "/bench/{{_entity_name}}",
+    "cmd": "sleep 3600",
+    "instances": 1,
+    "cpus": 0.1,
+    "mem": 32,
+    "disk": 0,
+    "env": {"ENV": "{{env}}", "INSTANCE": "{{instance}}"},
+    "labels": {"bench": "true"}
+}
+
+JOB = {
+    "job": {
+        "id": "bench.{{_entity_name}}",
+        "run": {"cmd": "echo {{env}}", "cpus": 0.1, "mem": 32, "disk": 0}
+    },
+    "schedule": {"id": "default", "cron": "0 * * * *", "enabled": True}
+}
+
+FRAMEWORK_OPTIONS = {
+    "service": {"name": "bench/{{_entity_name}}"},
+    "nodes": {"count": 3, "cpus": 1}
+}
+
+POOL = {
+    "apiVersion": "V2",
+    "name": "{{_entity_name}}",
+    "namespace": "edgelb",
+    "count": 1,
+    "haproxy": {
+        "frontends": [{"bindPort": 80, "protocol": "HTTP", "linkBackend": {"defaultBackend": "app"}}],
+        "backends": [{"name": "app", "protocol": "HTTP", "services": [{"marathon": {"serviceID": "/bench/app"}, "endpoint": {"portName": "web"}}]}]
+    }
+}
+
+TEMPLATE_VARS = {
+    "defaults": {"instance": "default"},
+    "instances": dict((name, {"instance": name}) for name in TEMPLATE_INSTANCES)
+}
+
+
+def _app(index):
+    return "app-%d" % index, dict(type="app", marathon="app.json", extra_vars=dict(instance=str(index))), ["app-%d" % index]
+
+
+def _loop_app(index):
+    names = ["loopapp-%d-%s" % (index, value) for value in LOOP_VALUES]
+    return "loopapp-%d" % index, dict(type="app", marathon="app.json", loop=dict(instance=LOOP_VALUES)), names
+
+
+def _template_app(index):
+    names = ["tplapp-%d-%s" % (index, instance) for instance in TEMPLATE_INSTANCES]
+    return "tplapp-%d" % index, dict(type="app", _template="app.json", _vars="instances.yml"), names
+
+
+def _job(index):
+    return "job-%d" % index, dict(type="job", definition="job.json"), ["job-%d" % index]
+
+
+def _secret(index):
+    return "secret-%d" % index, dict(type="secret", path="bench/secret-%d" % index, value="{{env}}-%d" % index), ["secret-%d" % index]
+
+
+def _vault_secret(index):
+    config = dict(type="secret", path="bench/vaultsecret-%d" % index, file="vault::secret.txt.encrypted")
+    return "vaultsecret-%d" % index, config, ["vaultsecret-%d" % index]
+
+
+def _marathon_group(index):
+    config = dict(type="marathon_group", name="bench-group-%d" % index, enforce_role=True, quota=dict(cpus=1, mem=1024))
+    return "group-%d" % index, config, ["group-%d" % index]
+
+
+def _iam_group(index):
+    config = dict(type="iam_group", name="bench-group-%d" % index, description="Benchmark group %d" % index,
+                  permissions={"dcos:bench:group-%d" % index: ["read"]})
+    return "iamgroup-%d" % index, config, ["iamgroup-%d" % index]
+
+
+def _iam_user(index):
+    config = dict(type="iam_user", name="bench-user-%d" % index, description="Benchmark user %d" % index, password="secret",
+                  update_password=False, groups=["bench-users"], permissions={"dcos:bench:user-%d" % index: ["read", "update"]})
+    return "iamuser-%d" % index, config, ["iamuser-%d" % index]
+
+
+def _serviceaccount(index):
+    config = dict(type="serviceaccount", name="bench-account-%d" % index, secret="bench/account-%d" % index, groups=["bench-users"])
+    return "account-%d" % index, config, ["account-%d" % index]
+
+
+def _repository(index):
+    config = dict(type="repository", name="bench-repo-%d" % index, uri="https://universe.example.com/repo-%d.json" % index)
+    return "repo-%d" % index, config, ["repo-%d" % index]
+
+
+def _framework(index):
+    config = dict(type="framework", package=dict(name="bench-framework", version="1.0.0", options="framework.json"))
+    return "framework-%d" % index, config, ["framework-%d" % index]
+
+
+def _edgelb(index):
+    return "pool-%d" % index, dict(type="edgelb", pool="pool.yml"), ["pool-%d" % index]
+
+
+def _cert(index):
+    config = dict(type="cert", cert_secret="bench/cert-%d" % index, key_secret="bench/key-%d" % index, dn=dict(CN="bench-%d" % index),
+                  hostnames=["bench-%d.example.com" % index])
+    return "cert-%d" % index, config, ["cert-%d" % index]
+
+
+# (factory, number of entities it creates). Apps, secrets and jobs are the most common, so they appear more than once
+RECIPE = [(_secret, 1), (_app, 1), (_loop_app, len(LOOP_VALUES)), (_job, 1), (_vault_secret, 1), (_template_app, len(TEMPLATE_INSTANCES)),
+          (_marathon_group, 1), (_app, 1), (_iam_group, 1), (_iam_user, 1), (_secret, 1), (_serviceaccount, 1), (_repository, 1),
+          (_job, 1), (_framework, 1), (_edgelb, 1), (_cert, 1)]
+
+
+def generate_entities(size):
+    """Yields (key, config) of the entities of a configuration with exactly size entities (after loops and templates are expanded)"""
+    count = 0
+    index = 0
+    previous = None
+    while count < size:
+        factory, produces = RECIPE[index % len(RECIPE)]
+        if produces > size - count:
+            factory, produces = _app, 1
+        key, config, names = factory(index)
+        if previous and count % CHAIN_LENGTH != 0:
+            config["dependencies"] = [previous]
+        yield key, config
+        previous = names[-1]
+        count += produces
+        index += 1
+
+
+def generate(directory, size):
+    """Writes a configuration with size entities to directory and returns the path of its main file"""
+    os.makedirs(directory, exist_ok=True)
+    key = generate_key()
+    _write_json(directory, "app.json", APP)
+    _write_json(directory, "job.json", JOB)
+    _write_json(directory, "framework.json", FRAMEWORK_OPTIONS)
+    _write_yaml(directory, "pool.yml", POOL)
+    _write_yaml(directory, "instances.yml", TEMPLATE_VARS)
+    _write(directory, "secret.txt.encrypted", encrypt_data(key, "very secret"))
+    includes = list()
+    entities = list(generate_entities(size))
+    for part, start in enumerate(range(0, len(entities), ENTITIES_PER_FILE)):
+        content = yaml.safe_dump(dict(entities[start:start+ENTITIES_PER_FILE]), default_flow_style=False)
+        if part % ENCRYPTED_FILE_EVERY == ENCRYPTED_FILE_EVERY - 1:
+            filename = "part-%03d.yml.encrypted" % part
+            _write(directory, filename, encrypt_data(key, content))
+            includes.append("vault::%s" % filename)
+        else:
+            filename = "part-%03d.yml" % part
+            _write(directory, filename, content)
+            includes.append(filename)
+    main = dict(variables=dict(env=dict(default="bench"), vault_key=dict(default=key)), includes=includes,
+                **{"global": dict(vault=dict(key="{{vault_key}}"))})
+    return _write_yaml(directory, "dcos.yml", main)
+
+
+def _write(directory, filename, content):
+    path = os.path.join(directory, filename)
+    with open(path, "w") as output:
+        output.write(content)
+    return path
+
+
+def _write_json(directory, filename, data):
+    return _write(directory, filename, json.dumps(data, indent=2))
+
+
+def _write_yaml(directory, filename, data):
+    return _write(directory, filename, yaml.safe_dump(data, default_flow_style=False))
+
+
+@click.command()
+@click.option("--size", "-s", help="Number of entities", type=click.IntRange(min=1), required=True)
+@click.option("--output", "-o", help="Directory to write the configuration to", type=click.Path(file_okay=False), required=True)
+def main(size, output):
+    click.echo(generate(output, size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Benchmarks reading the configuration, the dry-run and the deployment of generated configurations (see generate.py)
+against a FakeDcos that is served by a separate process. For every size and phase the wall time, the number of HTTP
+requests and the peak memory allocated by python (measured with tracemalloc, so timings include its overhead) are
+reported and compared with a baseline file. The run fails if a value exceeds its baseline by more than the tolerance.
+
+    PYTHONPATH=.:tests python3 benchmarks/run.py --sizes 10,100,1000
+"""
+import importlib
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from unittest import mock
+import click
+from dcosdeploy.config import read_config
+from dcosdeploy.config.reader import STANDARD_MODULES
+from dcosdeploy.deploy import DeploymentRunner
+from dcosdeploy.util import http, global_config
+from dcosdeploy.util.stats import RequestStats
+from dcosdeploy.util.wait import Backoff
+from fake_dcos import FakeDcos, client_patches
+from generate import generate
+
+
+PHASES = ["read_config", "dry_run", "run_deployment", "dry_run_converged"]
+DEFAULT_SIZES = "10,100,1000"
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# Accepted relative increase over the baseline per metric. Timings vary most between runs, the number of requests
+# only by the number of polls while waiting
+TOLERANCES = dict(seconds=0.5, requests=0.1, peak_kib=0.25)
+# Accepted absolute increase per metric, so that noise in the small values of small configurations is no regression
+SLACK = dict(seconds=0.2, requests=5, peak_kib=256)
+# Poll the fake cluster more often than a real one, deployments there finish in deployment_delay seconds
+FAST_BACKOFF = Backoff(initial=0.05, factor=1.5, maximum=0.5)
+
+
+def _serve(deployment_delay, latency, connection):
+    cluster = FakeDcos(deployment_delay=deployment_delay, latency=latency).start()
+    connection.send(cluster.url)
+    connection.recv()  # Blocks until the benchmark is finished
+    cluster.stop()
+
+
+@contextmanager
+def fake_cluster(deployment_delay, latency):
+    """Serves a FakeDcos from a child process, so that neither its CPU time nor its memory is measured, and points dcos-deploy to it"""
+    connection, child_connection = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=_serve, args=(deployment_delay, latency, child_connection), daemon=True)
+    process.start()
+    patches = client_patches(connection.recv())
+    patches.append(mock.patch("dcosdeploy.util.wait.DEFAULT_BACKOFF", FAST_BACKOFF))
+    patches.append(mock.patch("dcosdeploy.modules.frameworks.time"))  # Skips the pause for adminrouter after framework installations
+    for patch in patches:
+        patch.start()
+    try:
+        yield
+    finally:
+        for patch in reversed(patches):
+            patch.stop()
+        connection.send(None)
+        process.join()
+
+
+def measure(function):
+    """Calls function and returns its result and dict(seconds, requests, peak_kib)"""
+    stats = RequestStats()
+    http.set_stats(stats)
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        result = function()
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        http.set_stats(None)
+    requests = sum(entry["count"] for entry in stats.report())
+    return result, dict(seconds=round(seconds, 3), requests=requests, peak_kib=peak // 1024)
+
+
+def run_size(size, parallel, deployment_delay, latency):
+    """Benchmarks all phases for a generated configuration with size entities, each phase starts from the state the previous one left"""
+    directory = tempfile.mkdtemp(prefix="dcos-deploy-benchmark-")
+    try:
+        config_file = generate(directory, size)
+        results = dict()
+        with fake_cluster(deployment_delay, latency):
+            _, results["read_config"] = measure(lambda: read_config([config_file], dict()))
+            runner = DeploymentRunner([config_file], dict())
+            _, results["dry_run"] = measure(lambda: runner.dry_run(parallel=parallel))
+            _, results["run_deployment"] = measure(lambda: runner.run_deployment(parallel=parallel))
+            runner = DeploymentRunner([config_file], dict())
+            _, results["dry_run_converged"] = measure(lambda: runner.dry_run(parallel=parallel))
+        return results
+    finally:
+        shutil.rmtree(directory)
+
+
+def compare(results, baseline, tolerances=TOLERANCES, slack=SLACK):
+    """List of messages for all values in results that exceed their baseline by more than the tolerance and the slack"""
+    regressions = list()
+    for size, phases in sorted(results.items(), key=lambda item: int(item[0])):
+        for phase, values in phases.items():
+            expected = baseline.get(size, dict()).get(phase)
+            if not expected:
+                continue
+            for metric, tolerance in tolerances.items():
+                if metric in expected and values[metric] > max(expected[metric] * (1 + tolerance), expected[metric] + slack[metric]):
+                    regressions.append("%s entities, %s: %s is %s, baseline is %s (+%d%% allowed)" % (size, phase, metric, values[metric],
+                                                                                                      expected[metric], tolerance * 100))
+    return regressions
+
+
+def _print_results(results, baseline):
+    click.echo("%8s %-18s %10s %10s %12s" % ("Entities", "Phase", "Seconds", "Requests", "Peak KiB"))
+    for size, phases in sorted(results.items(), key=lambda item: int(item[0])):
+        for phase in PHASES:
+            values = phases[phase]
+            expected = baseline.get(size, dict()).get(phase, dict())
+            click.echo("%8s %-18s %10s %10s %12s" % (size, phase, _with_baseline(values, expected, "seconds"),
+                                                     _with_baseline(values, expected, "requests"), _with_baseline(values, expected, "peak_kib")))
+
+
+def _with_baseline(values, expected, metric):
+    if metric not in expected or not expected[metric]:
+        return str(values[metric])
+    return "%s %+d%%" % (values[metric], (values[metric] / expected[metric] - 1) * 100)
+
+
+@click.command()
+@click.option("--sizes", help="Comma-separated numbers of entities to benchmark, default is %s" % DEFAULT_SIZES, default=DEFAULT_SIZES)
+@click.option("--parallel", "-p", help="Number of entities to check and deploy concurrently, default is 8", type=click.IntRange(min=1), default=8)
+@click.option("--deployment-delay", help="Seconds until deployments, job runs and plans in the fake cluster finish, default is 0", type=float, default=0.0)
+@click.option("--latency", help="Seconds the fake cluster delays every response, default is 0", type=float, default=0.0)
+@click.option("--baseline", help="Baseline file to compare with, default is benchmarks/baseline.json", default=DEFAULT_BASELINE)
+@click.option("--update-baseline", help="Write the results of the benchmarked sizes to the baseline file instead of comparing", is_flag=True)
+@click.option("--output", "-o", help="Write the results as json to this file", type=click.Path(dir_okay=False, writable=True))
+def main(sizes, parallel, deployment_delay, latency, baseline, update_baseline, output):
+    global_config.silent = True
+    for module in STANDARD_MODULES:
+        importlib.import_module(module)  # Not measured as part of the first read_config
+    results = dict()
+    for size in [int(size) for size in sizes.split(",")]:
+        results[str(size)] = run_size(size, parallel, deployment_delay, latency)
+    if output:
+        with open(output, "w") as output_file:
+            json.dump(results, output_file, indent=2, sort_keys=True)
+    baseline_values = dict()
+    if os.path.exists(baseline):
+        with open(baseline) as baseline_file:
+            baseline_values = json.load(baseline_file)
+    _print_results(results, dict() if update_baseline else baseline_values)
+    if update_baseline:
+        baseline_values.update(results)
+        with open(baseline, "w") as baseline_file:
+            json.dump(baseline_values, baseline_file, indent=2, sort_keys=True)
+        click.echo("Updated baseline %s" % baseline)
+        return
+    regressions = compare(results, baseline_values)
+    for regression in regressions:
+        click.echo("Regression: %s" % regression, err=True)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ from ..util.output import echo_error
 class BouncerAdapter:
     def __init__(self):
         self.base_url = get_base_url() + "/acs/api/v1"
+        self._cache_rids = None
 
     def get_account(self, name):
         response = http.get(self.base_url+"/users/"+name)
@@ -102,13 +103,16 @@ class BouncerAdapter:
         if not response.ok:
             echo_error(response.text)
             raise APIRequestException("Error occured when creating permission", response)
+        self._cache_rids = None
 
     def get_rids(self):
-        response = http.get(self.base_url+"/acls")
-        if not response.ok:
-            echo_error(response.text)
-            raise APIRequestException("Error occured when listing permission", response)
-        return [acl["rid"] for acl in response.json()["array"]]
+        if self._cache_rids is None:
+            response = http.get(self.base_url+"/acls")
+            if not response.ok:
+                echo_error(response.text)
+                raise APIRequestException("Error occured when listing permission", response)
+            self._cache_rids = [acl["rid"] for acl in response.json()["array"]]
+        return list(self._cache_rids)
 
     def create_group(self, name, description, provider_type):
         data = dict(description=description)
@@ -1,16 +1,23 @@
-import time
+from copy import deepcopy
 from ..auth import get_base_url
 from ..base import APIRequestException
 from ..util import http
 from ..util.output import echo_error
+from ..util.wait import wait_for, WaitTimeoutException
 
 
 class CosmosAdapter:
     def __init__(self):
         self.service_url = get_base_url() + "/cosmos/service"
         self.package_url = get_base_url() + "/package"
+        self._cache_repositories = None
 
     def list_repositories(self):
+        if self._cache_repositories is None:
+            self._cache_repositories = self._list_repositories()
+        return deepcopy(self._cache_repositories)
+
+    def _list_repositories(self):
         headers = {
             "Accept": "application/vnd.dcos.package.repository.list-response+json;charset=utf-8;version=v1",
             "Content-Type": "application/vnd.dcos.package.repository.list-request+json;charset=utf-8;version=v1",
@@ -30,6 +37,7 @@ class CosmosAdapter:
         if index is not None:
             data["index"] = index
         response = http.post(self.package_url+"/repository/add", json=data, headers=headers)
+        self._cache_repositories = None
         if not response.ok:
             echo_error(response.text)
             raise APIRequestException("Failed to add package repository %s" % name, response)
@@ -41,6 +49,7 @@ class CosmosAdapter:
             "Content-Type": "application/vnd.dcos.package.repository.delete-request+json;charset=utf-8;version=v1",
         }
         response = http.post(self.package_url+"/repository/delete", json=dict(name=name), headers=headers)
+        self._cache_repositories = None
         if not response.ok:
             echo_error(response.text)
             raise APIRequestException("Failed to delete package repository %s" % name, response)
@@ -94,20 +103,15 @@ class CosmosAdapter:
             echo_error(response.text)
             raise APIRequestException("Failed to uninstall service %s" % service_name, response)
 
-    def wait_for_plan_complete(self, service_name, plan, timeout=10*60):
-        wait_time = 0
-        status = self._get_plan_status(service_name, plan)
-        if not status:
-            # Wait for scheduler to come back online
-            time.sleep(40)
-        while wait_time < timeout:
+    def wait_for_plan_complete(self, service_name, plan, timeout=None):
+        def _complete():
+            # The status is None while the scheduler is restarting
             status = self._get_plan_status(service_name, plan)
-            if status == "COMPLETE":
-                break
-            else:
-                time.sleep(20)
-                wait_time += 20
-        return status
+            return status if status == "COMPLETE" else None
+        try:
+            return wait_for(_complete, "Plan %s of %s did not complete" % (plan, service_name), timeout=timeout)
+        except WaitTimeoutException:
+            return self._get_plan_status(service_name, plan)
 
     def has_plans_api(self, service_name):
         if service_name[0] == "/":
@@ -1,15 +1,62 @@
-import time
+import threading
+from copy import deepcopy
 from ..auth import get_base_url
 from ..base import APIRequestException
-from ..util import http
-from ..util.output import echo_error
+from ..util import http, global_config
+from ..util.output import echo_error, echo_debug
+from ..util.wait import wait_for, current_timeout
+from .marathon_events import get_event_listener, DEPLOYMENT_FAILED
 
 
 class MarathonAdapter:
     def __init__(self):
         self.marathon_url = get_base_url() + "/service/marathon/v2"
+        self._app_index = dict()  # app id -> app state, filled by prefetch_apps
+        self._indexed_prefixes = list()
+        self._changed_apps = set()  # apps changed since the prefetch, their state must be fetched again
+
+    def prefetch_apps(self, app_ids, max_prefixes=10):
+        """Loads the state of all apps below the top-level groups of the given app ids with one request per group
+        (or one request for all apps if there are more than max_prefixes groups) into an index used by get_app_state"""
+        if "/" in self._indexed_prefixes:
+            return
+        # Groups that were already loaded (e.g. for other managers) are not loaded again
+        prefixes = sorted(set("/" + _normalize_app_id(app_id)[1:].split("/")[0] for app_id in app_ids) - set(self._indexed_prefixes))
+        if not prefixes:
+            return
+        if len(prefixes) > max_prefixes:
+            prefixes = ["/"]
+        for prefix in prefixes:
+            response = http.get(self.marathon_url+"/apps", params=dict(id=prefix, embed="apps.counts"))
+            if not response.ok:
+                echo_error(response.text)
+                raise APIRequestException("Failed to get apps for %s" % prefix, response)
+            for app in response.json()["apps"]:
+                self._app_index[app["id"]] = app
+            self._indexed_prefixes.append(prefix)
+
+    def _indexed(self, app_id):
+        if app_id in self._changed_apps:
+            return False
+        for prefix in self._indexed_prefixes:
+            if prefix == "/" or app_id == prefix or app_id.startswith(prefix + "/"):
+                return True
+        return False
+
+    def _invalidate(self, app_id):
+        app_id = _normalize_app_id(app_id)
+        self._changed_apps.add(app_id)
+        self._app_index.pop(app_id, None)
 
     def get_app_state(self, app_id):
+        """State of the app, served from the index if the app was prefetched. Returns None if the app does not exist"""
+        app_id = _normalize_app_id(app_id)
+        if self._indexed(app_id):
+            app = self._app_index.get(app_id)
+            return deepcopy(app) if app else None
+        return self._fetch_app_state(app_id)
+
+    def _fetch_app_state(self, app_id):
         if not app_id[0] == "/":
             app_id = "/" + app_id
         response = http.get(self.marathon_url+"/apps%s/?embed=app.counts" % app_id)
@@ -35,41 +82,36 @@ class MarathonAdapter:
         return None
 
     def wait_for_specific_deployment(self, deployment_id):
-        wait_time = 0
-        deployment = self.get_deployment(deployment_id)
-        while deployment:
-            if wait_time > 10*60:
-                raise Exception("Deployment did not complete after 10 minutes")
-            time.sleep(10)
-            wait_time += 10
-            deployment = self.get_deployment(deployment_id)
+        if global_config.marathon_events:
+            listener = get_event_listener(self.marathon_url)
+            if listener:
+                # The listener is connected at this point, so the deployment either finishes later or the check sees it
+                if not self.get_deployment(deployment_id):
+                    return
+                result = listener.wait(deployment_id, current_timeout())
+                if result == DEPLOYMENT_FAILED:
+                    raise Exception("Deployment %s failed" % deployment_id)
+                elif result:
+                    return
+                echo_debug("Lost marathon event stream. Falling back to polling")
+        if self.get_deployment(deployment_id):
+            wait_for(lambda: not self.get_deployment(deployment_id), "Deployment %s did not complete" % deployment_id)
 
     def wait_for_deployment(self, app_id):
-        wait_time = 0
-        state = self.get_app_state(app_id)
-        while state and len(state["deployments"]) != 0:
-            if wait_time > 10*60:
-                raise Exception("Deployment for %s did not complete after 10 minutes" % app_id)
-            time.sleep(10)
-            wait_time += 10
-            state = self.get_app_state(app_id)
-    
+        def _finished():
+            state = self._fetch_app_state(app_id)
+            return not state or len(state["deployments"]) == 0
+        if not _finished():
+            wait_for(_finished, "Deployment for %s did not complete" % app_id)
+
     def wait_for_deletion(self, app_id):
-        wait_time = 0
-        state = self.get_app_state(app_id)
-        while state:
-            if wait_time > 10*60:
-                raise Exception("Deployment for %s did not complete after 10 minutes" % app_id)
-            time.sleep(10)
-            wait_time += 10
-            state = self.get_app_state(app_id)
+        if self._fetch_app_state(app_id):
+            wait_for(lambda: not self._fetch_app_state(app_id), "Deletion of %s did not complete" % app_id)
 
     def deploy_app(self, app_definition, wait_for_deployment=False, force=False):
-        response = http.put(self.marathon_url + "/apps?force=%s" % force, json=[app_definition])
-        if not response.ok:
-            echo_error(response.text)
-            raise APIRequestException("Failed to deploy app %s" % app_definition["id"], response)
-        deployment_id = response.json()["deploymentId"]
+        if global_config.marathon_batch_size > 1:
+            return _get_batcher(self).deploy_app(app_definition, wait_for_deployment, force)
+        deployment_id = self.put_apps([app_definition], force)
         deployment = self.get_deployment(deployment_id)
         if not deployment:
             return False
@@ -77,7 +119,18 @@ class MarathonAdapter:
             self.wait_for_specific_deployment(deployment_id)
         return True
 
+    def put_apps(self, app_definitions, force=False):
+        """Creates or updates the given apps with one request, marathon handles them in one deployment. Returns the deployment id"""
+        for app in app_definitions:
+            self._invalidate(app["id"])
+        response = http.put(self.marathon_url + "/apps?force=%s" % force, json=app_definitions)
+        if not response.ok:
+            echo_error(response.text)
+            raise APIRequestException("Failed to deploy app %s" % ", ".join(app["id"] for app in app_definitions), response)
+        return response.json()["deploymentId"]
+
     def restart_app(self, app_id, wait_for_deployment=False, force=False):
+        self._invalidate(app_id)
         response = http.post(self.marathon_url + "/apps/%s/restart?force=%s" % (app_id, force))
         if not response.ok:
             echo_error(response.text)
@@ -87,6 +140,7 @@ class MarathonAdapter:
             self.wait_for_specific_deployment(deployment_id)
 
     def delete_app(self, app_id, wait_for_deployment=False, force=False):
+        self._invalidate(app_id)
         response = http.delete(self.marathon_url + "/apps/%s?force=%s" % (app_id, force))
         if not response.ok:
             if response.status_code == 404:
@@ -124,3 +178,110 @@ class MarathonAdapter:
         if not response.ok:
             raise APIRequestException("Error while removing marathon group %s" % name, response)
         return response.json()
+
+
+def _normalize_app_id(app_id):
+    return app_id if app_id.startswith("/") else "/" + app_id
+
+
+class _AppBatch:
+    def __init__(self, force):
+        self.force = force
+        self.apps = list()
+        self.wait_for_deployment = False
+        self.closed = False
+        self.done = threading.Event()
+        self.changed = dict()  # app id -> changed
+        self.errors = dict()  # app id -> exception
+
+
+class AppBatcher:
+    """Coalesces deploy_app calls that arrive at the same time (e.g. from independent entities deployed in parallel) into
+    one PUT /v2/apps request and one marathon deployment. The first caller of a batch waits up to window seconds for more
+    apps (or until the batch is full), sends the request and waits for the deployment, the other callers wait for it.
+    If marathon rejects the batch every app is submitted on its own so that errors are reported for the right entity"""
+    def __init__(self, api, batch_size, window=0.5):
+        self.api = api
+        self.batch_size = batch_size
+        self.window = window
+        self._condition = threading.Condition()
+        self._open = dict()  # force -> open batch
+
+    def deploy_app(self, app_definition, wait_for_deployment=False, force=False):
+        app_id = _normalize_app_id(app_definition["id"])
+        with self._condition:
+            batch = self._open.get(force)
+            leader = batch is None
+            if leader:
+                batch = _AppBatch(force)
+                self._open[force] = batch
+            batch.apps.append(app_definition)
+            batch.wait_for_deployment = batch.wait_for_deployment or wait_for_deployment
+            if len(batch.apps) >= self.batch_size:
+                self._close(batch)
+            if leader:
+                self._condition.wait_for(lambda: batch.closed, timeout=self.window)
+                self._close(batch)
+        if leader:
+            try:
+                self._execute(batch)
+            except Exception as ex:
+                for app in batch.apps:
+                    batch.errors.setdefault(_normalize_app_id(app["id"]), ex)
+            finally:
+                batch.done.set()
+        else:
+            batch.done.wait()
+        if app_id in batch.errors:
+            raise batch.errors[app_id]
+        return batch.changed[app_id]
+
+    def _close(self, batch):
+        if not batch.closed:
+            batch.closed = True
+            del self._open[batch.force]
+            self._condition.notify_all()
+
+    def _execute(self, batch):
+        app_ids = [_normalize_app_id(app["id"]) for app in batch.apps]
+        try:
+            deployment_ids = [self.api.put_apps(batch.apps, batch.force)]
+            apps_per_deployment = [app_ids]
+        except APIRequestException as ex:
+            if len(batch.apps) == 1:
+                batch.errors[app_ids[0]] = ex
+                return
+            echo_debug("Marathon rejected the batch of %s. Deploying the apps one by one" % ", ".join(app_ids))
+            deployment_ids = list()
+            apps_per_deployment = list()
+            for app_id, app in zip(app_ids, batch.apps):
+                try:
+                    deployment_ids.append(self.api.put_apps([app], batch.force))
+                    apps_per_deployment.append([app_id])
+                except APIRequestException as app_ex:
+                    batch.errors[app_id] = app_ex
+        deployments = dict((deployment["id"], deployment) for deployment in self.api.get_deployments())
+        for deployment_id, deployment_app_ids in zip(deployment_ids, apps_per_deployment):
+            deployment = deployments.get(deployment_id)
+            affected = set(deployment.get("affectedApps", list())) if deployment else set()
+            for app_id in deployment_app_ids:
+                batch.changed[app_id] = app_id in affected
+            if deployment and batch.wait_for_deployment:
+                try:
+                    self.api.wait_for_specific_deployment(deployment_id)
+                except Exception as ex:
+                    for app_id in deployment_app_ids:
+                        batch.errors[app_id] = ex
+
+
+_batchers = dict()
+_batchers_lock = threading.Lock()
+
+
+def _get_batcher(api):
+    with _batchers_lock:
+        batcher = _batchers.get(api.marathon_url)
+        if not batcher or batcher.batch_size != global_config.marathon_batch_size:
+            batcher = AppBatcher(api, global_config.marathon_batch_size)
+            _batchers[api.marathon_url] = batcher
+        return batcher
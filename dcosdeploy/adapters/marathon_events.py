@@ -0,0 +1,137 @@
+import codecs
+import json
+import threading
+import time
+from ..util import http, trace
+from ..util.output import echo_debug
+from ..util.wait import WaitTimeoutException
+
+
+DEPLOYMENT_SUCCESS = "deployment_success"
+DEPLOYMENT_FAILED = "deployment_failed"
+CONNECT_TIMEOUT = 5
+
+
+class MarathonEventListener:
+    """Subscribes to the server-sent event stream of marathon (/v2/events) in a background thread and records the
+    result of all finished deployments so that deployment waits can be resolved without polling"""
+    def __init__(self, marathon_url):
+        self.events_url = marathon_url + "/events?event_type=%s&event_type=%s" % (DEPLOYMENT_SUCCESS, DEPLOYMENT_FAILED)
+        self._condition = threading.Condition()
+        self._finished = dict()  # deployment id -> event type
+        self._connected = False
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="marathon-events", daemon=True)
+
+    def start(self):
+        """Starts the listener and waits until the stream is connected. Returns False if the connection failed"""
+        self._thread.start()
+        with self._condition:
+            self._condition.wait_for(lambda: self._connected or not self._running, timeout=CONNECT_TIMEOUT)
+            return self._connected
+
+    @property
+    def running(self):
+        return self._running
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+    def wait(self, deployment_id, timeout):
+        """Waits for the deployment to finish and returns the event type (deployment_success or deployment_failed).
+        Returns None if the stream was lost before, the caller must then fall back to polling"""
+        deadline = time.monotonic() + timeout
+        with trace.span("wait", "wait", deployment=deployment_id, timeout=timeout), self._condition:
+            while deployment_id not in self._finished:
+                if not self._running:
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise WaitTimeoutException("Deployment %s did not complete after %d seconds" % (deployment_id, timeout))
+                self._condition.wait(remaining)
+            return self._finished[deployment_id]
+
+    def _run(self):
+        try:
+            response = http.get(self.events_url, headers={"Accept": "text/event-stream"}, stream=True, timeout=(CONNECT_TIMEOUT, None))
+            if not response.ok:
+                echo_debug("Could not subscribe to marathon events: %s" % response.status_code)
+                return
+            with self._condition:
+                self._connected = True
+                self._condition.notify_all()
+            for event_type, data in _parse_events(response.iter_content(chunk_size=None)):
+                if not self._running:
+                    break
+                self._handle_event(event_type, data)
+            response.close()
+        except Exception as ex:
+            echo_debug("Marathon event stream failed: %s" % ex)
+        finally:
+            self.stop()
+
+    def _handle_event(self, event_type, data):
+        try:
+            event = json.loads(data)
+        except ValueError:
+            return
+        event_type = event.get("eventType", event_type)
+        if event_type not in (DEPLOYMENT_SUCCESS, DEPLOYMENT_FAILED):
+            return
+        deployment_id = event.get("plan", dict()).get("id") or event.get("id")
+        if deployment_id:
+            with self._condition:
+                self._finished[deployment_id] = event_type
+                self._condition.notify_all()
+
+
+def _parse_events(chunks):
+    """Parses a server-sent event stream given as utf-8 encoded chunks into (event type, data) tuples"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    event_type = None
+    data = list()
+    for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        while "\n" in buffer:
+            line, buffer = buffer.split("\n", 1)
+            line = line.rstrip("\r")
+            if not line:
+                if data:
+                    yield event_type, "\n".join(data)
+                event_type = None
+                data = list()
+            elif line.startswith(":"):
+                continue  # comment / keepalive
+            else:
+                field, _, value = line.partition(":")
+                if value.startswith(" "):
+                    value = value[1:]
+                if field == "event":
+                    event_type = value
+                elif field == "data":
+                    data.append(value)
+
+
+_listeners = dict()
+_listeners_lock = threading.Lock()
+
+
+def get_event_listener(marathon_url):
+    """Returns a connected listener for the given marathon or None if the event stream is not available.
+    A listener whose stream dropped is replaced by a new one, if the first subscription failed no new attempts are made"""
+    with _listeners_lock:
+        if marathon_url in _listeners and _listeners[marathon_url] is None:
+            return None  # Subscribing failed before, do not try again for every wait
+        listener = _listeners.get(marathon_url)
+        if listener and listener.running:
+            return listener
+        listener = MarathonEventListener(marathon_url)
+        if not listener.start():
+            listener.stop()
+            _listeners[marathon_url] = None
+            return None
+        _listeners[marathon_url] = listener
+        return listener
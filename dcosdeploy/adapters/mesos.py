@@ -1,6 +1,7 @@
 import uuid
 import base64
 import json
+from copy import deepcopy
 from ..auth import get_base_url
 from ..base import APIRequestException
 from ..util import http
@@ -11,6 +12,7 @@ class MesosAdapter:
     def __init__(self):
         self.base_url = get_base_url()
         self.mesos_url = self.base_url + "/mesos/"
+        self._cache_roles = None
 
     def launch_nested_container(self, slave_id, parent_container_id, command, shell=False):
         url = "%s/slave/%s/api/v1" % (self.base_url, slave_id)
@@ -87,12 +89,15 @@ class MesosAdapter:
             }
         }
         response = http.post(self.mesos_url+"/api/v1", json=request_body)
+        self._cache_roles = None
         if not response.ok:
             raise APIRequestException("Error while updating quota", response)
         return response.status_code
 
     def get_quota(self, name):
-        roles = http.get(self.mesos_url+"roles").json()["roles"]
+        if self._cache_roles is None:
+            self._cache_roles = http.get(self.mesos_url+"roles").json()["roles"]
+        roles = deepcopy(self._cache_roles)
         try:
             return [x for x in roles if x['name'] == name][0]["quota"]
         except:
@@ -1,15 +1,49 @@
-import time
+import threading
+from copy import deepcopy
 from ..auth import get_base_url
 from ..base import APIRequestException
 from ..util import http
 from ..util.output import echo_error
+from ..util.wait import wait_for
 
 
 class MetronomeAdapter:
     def __init__(self):
         self.metronome_url = get_base_url() + "/service/metronome/"
+        self._job_index = None  # job id -> job definition with embedded schedules, loaded once per run
+        self._changed_jobs = set()  # jobs changed since the index was loaded, their state must be fetched again
+        self._index_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def prefetch_jobs(self):
+        """Loads all jobs together with their schedules with one request into an index used by does_job_exist and get_job_state"""
+        response = http.get(self.metronome_url+"v1/jobs", params=dict(embed="schedules"))
+        if not response.ok:
+            echo_error(response.text)
+            raise APIRequestException("Unknown error occured", response)
+        with self._index_lock:
+            self._job_index = dict((job["id"], job) for job in response.json())
+            self._changed_jobs = set()
+
+    def _indexed_job(self, job_id):
+        """Returns (True, job) if the index knows the current state of the job (job is None if it does not exist), (False, None) otherwise"""
+        with self._load_lock:
+            if self._job_index is None:
+                self.prefetch_jobs()
+        with self._index_lock:
+            if job_id in self._changed_jobs:
+                return False, None
+            return True, self._job_index.get(job_id)
+
+    def _invalidate(self, job_id):
+        job_id = _normalize_job_id(job_id)
+        with self._index_lock:
+            self._changed_jobs.add(job_id)
+            if self._job_index:
+                self._job_index.pop(job_id, None)
 
     def create_job(self, definition):
+        self._invalidate(definition["id"])
         response = http.post(self.metronome_url+"v1/jobs", json=definition)
         if response.ok:
             return
@@ -21,6 +55,7 @@ class MetronomeAdapter:
             raise APIRequestException("Unknown error occured", response)
 
     def update_job(self, job_id, definition):
+        self._invalidate(job_id)
         response = http.put(self.metronome_url+"v1/jobs/%s" % job_id, json=definition)
         if response.ok:
             return
@@ -57,6 +92,21 @@ class MetronomeAdapter:
             echo_error(response.text)
             raise APIRequestException("Unknown error occured", response)
 
+    def get_job_state(self, job_id):
+        """Returns the job definition and its schedules, served from the index if possible. Returns (None, None) if the job does not exist"""
+        job_id = _normalize_job_id(job_id)
+        indexed, job = self._indexed_job(job_id)
+        if not indexed:
+            job = self.get_job(job_id)
+            if job is None:
+                return None, None
+            return job, self.get_schedules(job_id)
+        if job is None:
+            return None, None
+        job = deepcopy(job)
+        schedules = job.pop("schedules", list())
+        return job, schedules
+
     def get_schedules(self, job_id):
         if job_id[0] == "/":
             job_id = job_id[1:]
@@ -70,9 +120,14 @@ class MetronomeAdapter:
             raise APIRequestException("Unknown error occured", response)
 
     def does_job_exist(self, job_id):
-        return job_id in list(self.get_jobs())
+        job_id = _normalize_job_id(job_id)
+        indexed, job = self._indexed_job(job_id)
+        if indexed:
+            return job is not None
+        return self.get_job(job_id) is not None
 
     def delete_job(self, job_id):
+        self._invalidate(job_id)
         if job_id[0] == "/":
             job_id = job_id[1:]
         response = http.delete(self.metronome_url+"v1/jobs/%s" % job_id)
@@ -85,6 +140,7 @@ class MetronomeAdapter:
             raise APIRequestException("Unknown error occured", response)
 
     def create_schedule(self, job_id, definition):
+        self._invalidate(job_id)
         response = http.post(self.metronome_url+"v1/jobs/%s/schedules" % job_id, json=definition)
         if response.ok:
             return
@@ -96,6 +152,7 @@ class MetronomeAdapter:
             raise APIRequestException("Unknown error occured", response)
 
     def update_schedule(self, job_id, definition):
+        self._invalidate(job_id)
         response = http.put(self.metronome_url+"v1/jobs/%s/schedules/%s" % (job_id, definition["id"]), json=definition)
         if response.ok:
             return
@@ -107,6 +164,7 @@ class MetronomeAdapter:
             raise APIRequestException("Unknown error occured", response)
 
     def delete_schedule(self, job_id, schedule_id):
+        self._invalidate(job_id)
         response = http.delete(self.metronome_url+"v1/jobs/%s/schedules/%s" % (job_id, schedule_id))
         if response.ok:
             return True
@@ -134,18 +192,21 @@ class MetronomeAdapter:
             echo_error(response.text)
             raise APIRequestException("Failed to get job status", response)
 
-    def wait_for_job_run(self, job_id, run_id, timeout=10*60):
-        wait_time = 0
-        status = self.get_job_run_status(job_id, run_id)
-        while status and status not in ("SUCCESS", "FAILED"):
-            if wait_time > timeout:
-                raise Exception("Job %s run %s did not finish after %s seconds" % (job_id, run_id, timeout))
-            time.sleep(10)
-            wait_time += 10
-            status = status = self.get_job_run_status(job_id, run_id)
+    def wait_for_job_run(self, job_id, run_id, timeout=None):
+        def _finished():
+            status = self.get_job_run_status(job_id, run_id)
+            return not status or status in ("SUCCESS", "FAILED")
+        if not _finished():
+            wait_for(_finished, "Job %s run %s did not finish" % (job_id, run_id), timeout=timeout)
         job = self.get_job(job_id, embed_history=True)
         history = job.get("history", dict())
         for run in history.get("successfulFinishedRuns", list()):
             if run["id"] == run_id:
                 return True
         raise Exception("Job %s run %s failed" % (job_id, run_id))
+
+
+def _normalize_job_id(job_id):
+    if job_id and job_id[0] == "/":
+        return job_id[1:]
+    return job_id
@@ -0,0 +1,17 @@
+import threading
+
+
+class AdapterRegistry:
+    """Adapter instances shared by all managers of a run, so that caches of remote state (e.g. the secrets list or the
+    marathon app index) are filled once and invalidated in one place. Adapters are created on first use"""
+    def __init__(self):
+        self._adapters = dict()
+        self._lock = threading.Lock()
+
+    def get(self, adapter_class):
+        with self._lock:
+            adapter = self._adapters.get(adapter_class)
+            if adapter is None:
+                adapter = adapter_class()
+                self._adapters[adapter_class] = adapter
+            return adapter
@@ -11,13 +11,13 @@ class SecretsAdapter:
 
     def list_secrets(self):
         """Retrive a list of secrets names"""
-        if not self._cache_secrets_list:
+        if self._cache_secrets_list is None:
             response = http.get(self.base_url + "secret/default/?list=true")
             if not response.ok:
                 echo_error(response.text)
                 raise APIRequestException("Failed to list secrets", response)
             self._cache_secrets_list = response.json()["array"]
-        return self._cache_secrets_list
+        return list(self._cache_secrets_list)
 
     def get_secret(self, name):
         """Get value of a specific secret"""
@@ -53,9 +53,12 @@ class SecretsAdapter:
         if not response.ok:
             echo_error(response.text)
             raise APIRequestException("Failed to create secret", response)
+        if not update:
+            self._cache_secrets_list = None
 
     def delete_secret(self, name):
         response = http.delete(self.base_url + "secret/default/%s" % name)
+        self._cache_secrets_list = None
         if response.ok:
             return True
         elif response.status_code == 404:
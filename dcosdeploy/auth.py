@@ -153,6 +153,13 @@ def get_auth():
     return _auth
 
 
+def configure(base_url, auth):
+    """Use the given cluster url and authentication instead of searching for a configured cluster"""
+    global _base_url, _auth
+    _base_url = base_url
+    _auth = auth
+
+
 def reset():
     global _base_url, _auth
     _base_url = None
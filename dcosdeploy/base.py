@@ -8,4 +8,28 @@ class APIRequestException(Exception):
     """An adapter encountered an error while calling a remote API. The response field contains the Response object from the requests library"""
     def __init__(self, expression, response):
         super().__init__(expression)
-        self.response = response
\ No newline at end of file
+        self.response = response
+
+
+class EntityPlan:
+    """Result of the dry-run for one entity: the action that would be done and, if the manager needs it to act, a snapshot
+    of the remote state that was read to decide it. Managers can return it from dry_run instead of a bool. The runner
+    then passes it to deploy via the plan argument so the remote state does not need to be fetched and compared again.
+    Plans are saved with --plan-out, so they must not contain secret values"""
+    NONE = "none"
+    CREATE = "create"
+    UPDATE = "update"
+    RESTART = "restart"
+
+    def __init__(self, action, remote_state=None):
+        self.action = action
+        self.remote_state = remote_state
+
+    def __bool__(self):
+        return self.action != EntityPlan.NONE
+
+    def matches(self, exists):
+        """Cheap check before acting on the plan, exists should come from an index that is loaded once per run (e.g. the
+        list of secrets): True if the entity exists on the cluster as the plan expects. If not the cluster changed since
+        the dry-run and managers must check the remote state again"""
+        return (self.action != EntityPlan.CREATE) == bool(exists)
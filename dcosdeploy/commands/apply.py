@@ -1,8 +1,12 @@
 import click
 from . import maingroup
 from ..deploy import DeploymentRunner
+from ..plan import DEFAULT_MAX_AGE
 from ..util import detect_yml_file, read_yaml, global_config
+from ..util.cassette import cassette
 from ..util.output import echo
+from ..util.stats import request_stats
+from ..util.trace import tracing
 from ..util.vars import get_variables
 
 
@@ -14,21 +18,69 @@ from ..util.vars import get_variables
 @click.option("--yes", help="Do deployment without asking", is_flag=True)
 @click.option("--debug", help="Enable debug logging", is_flag=True)
 @click.option("--force", help="Forces deployment of entity provided with --only", is_flag=True)
-def apply(config_file, var, only, dry_run, yes, debug, force):
+@click.option("--parallel", "-p", help="Number of entities to check and deploy concurrently, default is 1", type=click.IntRange(min=1), default=1)
+@click.option("--plan-out", help="Save the result of the dry-run to this file so it can be executed later with --plan-in", type=click.Path(dir_okay=False, writable=True))
+@click.option("--plan-in", help="Execute a plan saved with --plan-out instead of reading the configuration and doing a dry-run. The plan is rejected if planned apps, frameworks, jobs, repositories or secrets changed on the cluster. Plan files are loaded with pickle and can execute code, only use plan files from trusted sources", type=click.Path(exists=True, dir_okay=False))
+@click.option("--plan-max-age", help="Maximum age in seconds of a plan used with --plan-in, default is %d" % DEFAULT_MAX_AGE, type=click.IntRange(min=0), default=DEFAULT_MAX_AGE)
+@click.option("--history-file", help="File to record entity deployment durations in. They are used to start long running entities first and to estimate the duration. Disabled by default", type=click.Path(dir_okay=False))
+@click.option("--marathon-events", help="Detect finished marathon deployments using the marathon event stream instead of polling", is_flag=True)
+@click.option("--marathon-batch-size", help="Submit up to this many marathon apps that are deployed at the same time with one request, default is 1 (no batching). Ignored without --parallel", type=click.IntRange(min=1), default=1)
+@click.option("--http-cache", help="Reuse the responses of identical read requests during the dry-run", is_flag=True)
+@click.option("--stats", help="Print the number, duration and size of the HTTP requests per API endpoint at the end", is_flag=True)
+@click.option("--stats-file", help="Write the HTTP request statistics as json to this file", type=click.Path(dir_okay=False, writable=True))
+@click.option("--trace-file", help="Write a timeline of the run to this file that can be opened with chrome://tracing or ui.perfetto.dev", type=click.Path(dir_okay=False, writable=True))
+@click.option("--record-cassette", help="Record all requests and their responses into this file so the run can be replayed offline with --replay-cassette", type=click.Path(dir_okay=False, writable=True))
+@click.option("--replay-cassette", help="Answer all requests from a file recorded with --record-cassette instead of contacting the cluster. Requires --dry-run", type=click.Path(exists=True, dir_okay=False))
+@click.option("--replay-latency-scale", help="Factor for the recorded request durations that are waited while replaying, default is 1, 0 replays without delays", type=click.FloatRange(min=0), default=1.0)
+@click.option("--diff-max-size", help="Only summarize changes of texts (secrets, templates, s3 files) if the changed part is larger than this many bytes, default is %d" % global_config.diff_max_bytes, type=click.IntRange(min=0), default=global_config.diff_max_bytes)
+@click.option("--diff-timeout", help="Summarize the rest of a text diff after this many seconds, default is %s" % global_config.diff_max_seconds, type=click.FloatRange(min=0), default=global_config.diff_max_seconds)
+def apply(config_file, var, only, dry_run, yes, debug, force, parallel, plan_out, plan_in, plan_max_age, history_file, marathon_events, marathon_batch_size, http_cache, stats, stats_file, trace_file, record_cassette, replay_cassette, replay_latency_scale, diff_max_size, diff_timeout):
+    if replay_cassette and (record_cassette or not dry_run):
+        raise click.UsageError("--replay-cassette requires --dry-run and can not be combined with --record-cassette")
     global_config.debug = debug
+    global_config.http_cache = http_cache
+    global_config.diff_max_bytes = diff_max_size
+    global_config.diff_max_seconds = diff_timeout
+    global_config.marathon_events = marathon_events
+    # With a single worker no other app can join a batch, its leader would only wait for the batch window
+    global_config.marathon_batch_size = marathon_batch_size if parallel > 1 else 1
+    with request_stats(print_summary=stats, filename=stats_file), tracing(trace_file), \
+            cassette(record=record_cassette, replay=replay_cassette, latency_scale=replay_latency_scale):
+        _apply(config_file, var, only, dry_run, yes, force, parallel, plan_out, plan_in, plan_max_age, history_file)
+
+
+def _apply(config_file, var, only, dry_run, yes, force, parallel, plan_out, plan_in, plan_max_age, history_file):
+    if plan_in:
+        if config_file or var or only or force or dry_run or plan_out:
+            raise click.UsageError("--plan-in can not be combined with --config-file, --var, --only, --force, --dry-run or --plan-out")
+        runner = DeploymentRunner.from_plan(plan_in, max_age=plan_max_age, history_file=history_file)
+        _, _, changed = runner.planned_run
+        if not changed:
+            echo("Plan contains no changes. Not doing anything")
+        elif yes or click.confirm("Do you want to apply the changes from the plan?", default=False):
+            runner.run_planned_deployment(parallel=parallel)
+        else:
+            echo("Not doing anything")
+        return
     provided_variables = get_variables(var)
     if not config_file:
         config_file = detect_yml_file("dcos")
-    runner = DeploymentRunner(config_file, provided_variables)
+    runner = DeploymentRunner(config_file, provided_variables, history_file=history_file)
     if only:
-        if runner.partial_dry_run(only, force=force) and not dry_run:
+        changed = runner.partial_dry_run(only, force=force, parallel=parallel)
+        if plan_out:
+            runner.save_plan(plan_out, changed, only=only, force=force)
+        if changed and not dry_run:
             if yes or click.confirm("Do you want to apply these changes?", default=False):
-                runner.run_partial_deployment(only, force=force)
+                runner.run_partial_deployment(only, force=force, parallel=parallel)
             else:
                 echo("Not doing anything")
     else:
-        if runner.dry_run() and not dry_run:
+        changed = runner.dry_run(parallel=parallel)
+        if plan_out:
+            runner.save_plan(plan_out, changed, force=force)
+        if changed and not dry_run:
             if yes or click.confirm("Do you want to apply these changes?", default=False):
-                runner.run_deployment(force=force)
+                runner.run_deployment(force=force, parallel=parallel)
             else:
                 echo("Not doing anything")
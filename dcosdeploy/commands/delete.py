@@ -1,8 +1,11 @@
 import click
 from . import maingroup
 from ..delete import DeletionRunner
-from ..util import detect_yml_file, read_yaml
+from ..util import detect_yml_file, read_yaml, global_config
+from ..util.cassette import cassette
 from ..util.output import echo
+from ..util.stats import request_stats
+from ..util.trace import tracing
 from ..util.vars import get_variables
 
 
@@ -12,20 +15,39 @@ from ..util.vars import get_variables
 @click.option("--only", help="Deploy only specified object")
 @click.option("--dry-run", "-d", help="Only check what would be done", is_flag=True)
 @click.option("--yes", help="Do deletion without asking", is_flag=True)
-def delete(config_file, var, only, dry_run, yes):
+@click.option("--parallel", "-p", help="Number of entities to check and delete concurrently, default is 1", type=click.IntRange(min=1), default=1)
+@click.option("--marathon-events", help="Detect finished marathon deployments using the marathon event stream instead of polling", is_flag=True)
+@click.option("--http-cache", help="Reuse the responses of identical read requests during the dry-run", is_flag=True)
+@click.option("--stats", help="Print the number, duration and size of the HTTP requests per API endpoint at the end", is_flag=True)
+@click.option("--stats-file", help="Write the HTTP request statistics as json to this file", type=click.Path(dir_okay=False, writable=True))
+@click.option("--trace-file", help="Write a timeline of the run to this file that can be opened with chrome://tracing or ui.perfetto.dev", type=click.Path(dir_okay=False, writable=True))
+@click.option("--record-cassette", help="Record all requests and their responses into this file so the run can be replayed offline with --replay-cassette", type=click.Path(dir_okay=False, writable=True))
+@click.option("--replay-cassette", help="Answer all requests from a file recorded with --record-cassette instead of contacting the cluster. Requires --dry-run", type=click.Path(exists=True, dir_okay=False))
+@click.option("--replay-latency-scale", help="Factor for the recorded request durations that are waited while replaying, default is 1, 0 replays without delays", type=click.FloatRange(min=0), default=1.0)
+def delete(config_file, var, only, dry_run, yes, parallel, marathon_events, http_cache, stats, stats_file, trace_file, record_cassette, replay_cassette, replay_latency_scale):
+    if replay_cassette and (record_cassette or not dry_run):
+        raise click.UsageError("--replay-cassette requires --dry-run and can not be combined with --record-cassette")
+    global_config.http_cache = http_cache
+    global_config.marathon_events = marathon_events
+    with request_stats(print_summary=stats, filename=stats_file), tracing(trace_file), \
+            cassette(record=record_cassette, replay=replay_cassette, latency_scale=replay_latency_scale):
+        _delete(config_file, var, only, dry_run, yes, parallel)
+
+
+def _delete(config_file, var, only, dry_run, yes, parallel):
     provided_variables = get_variables(var)
     if not config_file:
         config_file = detect_yml_file("dcos")
     runner = DeletionRunner(config_file, provided_variables)
     if only:
-        if runner.partial_dry_run(only) and not dry_run:
+        if runner.partial_dry_run(only, parallel=parallel) and not dry_run:
             if yes or click.confirm("Do you want to apply these changes?", default=False):
-                runner.run_partial_deletion(only)
+                runner.run_partial_deletion(only, parallel=parallel)
             else:
                 echo("Not doing anything")
     else:
-        if runner.dry_run() and not dry_run:
+        if runner.dry_run(parallel=parallel) and not dry_run:
             if yes or click.confirm("Do you want to apply these changes?", default=False):
-                runner.run_deletion()
+                runner.run_deletion(parallel=parallel)
             else:
                 echo("Not doing anything")
@@ -1,2 +1,3 @@
-from .reader import ConfigHelper, StateEnum, read_config
-from .variables import VariableContainer
\ No newline at end of file
+from .reader import ConfigHelper, ConfigResult, StateEnum, read_config, module_imports, init_managers
+from .variables import VariableContainer
+from .graph import DependencyGraph
@@ -0,0 +1,100 @@
+from ..base import ConfigurationException
+
+
+class DependencyGraph:
+    """Dependencies between the entities of a configuration with indexes in both directions.
+    All traversals are iterative so that deep dependency chains do not hit the recursion limit."""
+    def __init__(self, entities):
+        self.names = list(entities.keys())
+        self._dependencies = dict()
+        self._dependents = dict((name, list()) for name in self.names)
+        for name, entity in entities.items():
+            dependencies = list()
+            for dependency_name, _ in entity.dependencies:
+                if dependency_name not in self._dependents:
+                    raise ConfigurationException("Unknown entity '%s' as dependency in '%s'" % (dependency_name, name))
+                if dependency_name not in dependencies:
+                    dependencies.append(dependency_name)
+                    self._dependents[dependency_name].append(name)
+            self._dependencies[name] = dependencies
+
+    def dependencies(self, name):
+        """Entities the given entity directly depends on"""
+        return self._dependencies[name]
+
+    def dependents(self, name):
+        """Entities that directly depend on the given entity"""
+        return self._dependents[name]
+
+    def closure(self, name):
+        """The entity and all entities it transitively depends on"""
+        return self._collect(name, self._dependencies)
+
+    def reverse_closure(self, name):
+        """The entity and all entities that transitively depend on it"""
+        return self._collect(name, self._dependents)
+
+    def levels(self):
+        """Topological levels: every entity is in a level after all its dependencies. Raises a ConfigurationException on cycles"""
+        remaining = dict((name, len(self._dependencies[name])) for name in self.names)
+        level = [name for name in self.names if remaining[name] == 0]
+        levels = list()
+        while level:
+            levels.append(level)
+            next_level = list()
+            for name in level:
+                for dependent in self._dependents[name]:
+                    remaining[dependent] -= 1
+                    if remaining[dependent] == 0:
+                        next_level.append(dependent)
+            level = next_level
+        if sum(len(level) for level in levels) < len(self.names):
+            raise ConfigurationException("Dependency cycle found: %s" % " -> ".join(self.find_cycle()))
+        return levels
+
+    def longest_paths(self, names, weight):
+        """For every given entity the highest sum of weights on a path from it through the given entities that depend on it.
+        Scheduling entities with the longest remaining path first shortens the overall run"""
+        selected = set(names)
+        paths = dict()
+        for level in reversed(self.levels()):
+            for name in level:
+                if name not in selected:
+                    continue
+                remaining = [paths[dependent] for dependent in self._dependents[name] if dependent in selected]
+                paths[name] = weight(name) + max(remaining, default=0)
+        return paths
+
+    def find_cycle(self):
+        """Returns a list of entities forming a cycle (first and last element are the same) or None if there is no cycle"""
+        state = dict()  # name -> 1 (on current path) or 2 (finished)
+        for start in self.names:
+            if start in state:
+                continue
+            path = [start]
+            stack = [iter(self._dependencies[start])]
+            state[start] = 1
+            while stack:
+                dependency = next(stack[-1], None)
+                if dependency is None:
+                    state[path.pop()] = 2
+                    stack.pop()
+                elif state.get(dependency) == 1:
+                    return path[path.index(dependency):] + [dependency]
+                elif dependency not in state:
+                    state[dependency] = 1
+                    path.append(dependency)
+                    stack.append(iter(self._dependencies[dependency]))
+        return None
+
+    def _collect(self, name, index):
+        names = [name]
+        seen = set(names)
+        idx = 0
+        while idx < len(names):
+            for other in index[names[idx]]:
+                if other not in seen:
+                    seen.add(other)
+                    names.append(other)
+            idx += 1
+        return names
@@ -1,16 +1,18 @@
 import copy
 import enum
 import importlib
+import inspect
 import itertools
 import sys
 import os
 import json
-import pystache
 import oyaml as yaml
-from ..util import decrypt_data, update_dict_with_defaults, md5_hash_str
+from ..util import decrypt_data, update_dict_with_defaults, md5_hash_str, trace
 from ..util.file import check_if_encrypted_is_older
 from ..base import ConfigurationException
-from .variables import VariableContainerBuilder
+from ..adapters.registry import AdapterRegistry
+from .graph import DependencyGraph
+from .variables import VariableContainerBuilder, render_template
 from .predefined import calculate_predefined_variables
 
 
@@ -101,6 +103,17 @@ class ConfigHelper:
                 yield (key, value)
 
 
+class ConfigResult:
+    """Result of read_config: the entities, their managers, the variables, the dependency graph and the global section
+    of the configuration (e.g. the concurrency limits)"""
+    def __init__(self, entities, managers, variables, graph, global_config):
+        self.entities = entities
+        self.managers = managers
+        self.variables = variables
+        self.graph = graph
+        self.global_config = global_config
+
+
 class StateEnum(enum.Enum):
     NONE = 0
     REMOVED = 1
@@ -116,16 +129,16 @@ class StateEnum(enum.Enum):
 
 
 class EntityContainer:
-    def __init__(self, entity, entity_type, dependencies, when_condition, state, pre_script, post_script, entity_variables):
+    def __init__(self, entity, entity_type, dependencies, when_condition, state, pre_script, post_script, entity_variables, wait_timeout=None):
         self.entity = entity
         self.entity_type = entity_type
         self.dependencies = dependencies
-        self.reverse_dependencies = list()
         self.when_condition = when_condition
         self.state = state
         self.pre_script = pre_script
         self.post_script = post_script
         self.entity_variables = entity_variables
+        self.wait_timeout = wait_timeout
 
 
 class EntityScript:
@@ -157,23 +170,25 @@ def read_config(filenames, provided_variables):
     entities = dict()
     global_config = dict()
     variables = VariableContainerBuilder(provided_variables)
-    variables.add_direct_variables(calculate_predefined_variables())
+    with trace.span("predefined variables", "config"):
+        variables.add_direct_variables(calculate_predefined_variables())
     additional_modules = list()
 
     while idx < len(config_files):
         config_filename, encryption_key, only_restriction, except_restriction = config_files[idx]
         config_basepath = os.path.dirname(config_filename)
-        with open(config_filename) as config_file:
-            config = config_file.read()
-        if encryption_key:
-            check_if_encrypted_is_older(config_filename)
-            if encryption_key == DUMMY_GLOBAL_ENCRYPTION_KEY:
-                if not global_config or "vault" not in global_config or "key" not in global_config["vault"]:
-                    raise ConfigurationException("vault definition without key but no key is defined in global config: %s" % config_filename)
-                encryption_key = global_config["vault"]["key"]
-            encryption_key = variables.render_value(encryption_key)
-            config = decrypt_data(encryption_key, config)
-        config = yaml.safe_load(config)
+        with trace.span("load file", "config", filename=config_filename):
+            with open(config_filename) as config_file:
+                config = config_file.read()
+            if encryption_key:
+                check_if_encrypted_is_older(config_filename)
+                if encryption_key == DUMMY_GLOBAL_ENCRYPTION_KEY:
+                    if not global_config or "vault" not in global_config or "key" not in global_config["vault"]:
+                        raise ConfigurationException("vault definition without key but no key is defined in global config: %s" % config_filename)
+                    encryption_key = global_config["vault"]["key"]
+                encryption_key = variables.render_value(encryption_key)
+                config = decrypt_data(encryption_key, config)
+            config = yaml.safe_load(config)
         # Read variables
         variables.add_variables(config_basepath, config.get("variables", dict()))
         # Read global config
@@ -234,16 +249,21 @@ def read_config(filenames, provided_variables):
     variables = variables.build()
     config_helper = ConfigHelper(variables, global_config)
     # init managers
-    managers, modules = _init_modules(additional_modules)
+    with trace.span("init modules", "config"):
+        managers, modules = _init_modules(additional_modules)
     # read config sections
-    entities = _read_config_entities(modules, variables, entities, config_helper, global_config)
+    with trace.span("parse entities", "config"):
+        entities = _read_config_entities(modules, variables, entities, config_helper, global_config)
     variables.set_extra_vars(dict()) # Reset extra vars
-    return entities, managers, variables
+    with trace.span("dependency graph", "config"):
+        graph = DependencyGraph(entities)
+        graph.levels()  # Fail early on dependency cycles
+    return ConfigResult(entities, managers, variables, graph, global_config)
 
 
 def _read_config_entities(modules, variables, config, config_helper, global_config):
     deployment_objects = dict()
-    excluded_entities = list()
+    excluded_entities = set()
     for name, entity_config in config.items():
         entity_type = entity_config["type"]
         module = modules[entity_type]
@@ -274,14 +294,17 @@ def _read_config_entities(modules, variables, config, config_helper, global_conf
             if when_condition and when_condition not in ["dependencies-changed"]:
                 raise ConfigurationException("Unknown when '%s' for '%s'" % (when_condition, name))
             if _entity_should_be_excluded(variables, include_only, include_except):
-                excluded_entities.append(name)
+                excluded_entities.add(name)
                 continue
             if _entity_should_be_excluded(variables, only_restriction, except_restriction):
-                excluded_entities.append(name)
+                excluded_entities.add(name)
                 continue
             if state and state not in ["removed"]:
                 raise ConfigurationException("Unknown state '%s for '%s" % (state, name))
             state = StateEnum.convert(state)
+            wait_timeout = entity_config.get("wait_timeout")
+            if wait_timeout is not None and (not isinstance(wait_timeout, int) or isinstance(wait_timeout, bool) or wait_timeout < 1):
+                raise ConfigurationException("wait_timeout for '%s' must be a positive number of seconds" % name)
             dependencies_config = entity_config.get("dependencies", list())
             entity_object = parse_config_func(name, entity_config, config_helper)
             dependencies = list()
@@ -291,7 +314,7 @@ def _read_config_entities(modules, variables, config, config_helper, global_conf
                 else:
                     dep_type = "create"
                 dependencies.append((dependency, dep_type))
-            container = EntityContainer(entity_object, entity_config["type"], dependencies, when_condition, state, pre_script, post_script, entity_vars)
+            container = EntityContainer(entity_object, entity_config["type"], dependencies, when_condition, state, pre_script, post_script, entity_vars, wait_timeout)
             deployment_objects[name] = container
     _validate_dependencies(deployment_objects, excluded_entities)
     return deployment_objects
@@ -315,6 +338,7 @@ def _prepare_entity_variables(name, entity_config, pre_script, post_script):
 def _init_modules(additional_modules):
     managers = dict()
     modules = dict()
+    adapters = AdapterRegistry()
     def _init_module(base_path, module_import):
         if ":" in module_import:
             module_path, module_import = module_import.split(":")
@@ -322,7 +346,7 @@ def _init_modules(additional_modules):
                 module_path = os.path.join(base_path, module_path)
             sys.path.insert(0, module_path)
         module = importlib.import_module(module_import)
-        managers[module.__config_name__] = module.__manager__()
+        managers[module.__config_name__] = _create_manager(module.__manager__, adapters)
         preprocess_config = None
         if "preprocess_config" in module.__dict__:
             preprocess_config = module.preprocess_config
@@ -334,6 +358,35 @@ def _init_modules(additional_modules):
     return managers, modules
 
 
+def _create_manager(manager_class, adapters):
+    """Managers that accept an adapters argument share the adapter instances (and with them their caches) of the run"""
+    if "adapters" in inspect.signature(manager_class).parameters:
+        return manager_class(adapters=adapters)
+    return manager_class()
+
+
+def module_imports(managers):
+    """Import specs ("path:module") of the modules of the given managers that can be passed to init_managers in a later run"""
+    imports = list()
+    for manager in managers.values():
+        module_name = type(manager).__module__
+        if module_name in STANDARD_MODULES:
+            continue
+        module_file = sys.modules[module_name].__file__
+        module_root = os.path.dirname(module_file)
+        if os.path.basename(module_file) == "__init__.py":
+            module_root = os.path.dirname(module_root)
+        for _ in range(module_name.count(".")):
+            module_root = os.path.dirname(module_root)
+        imports.append("%s:%s" % (module_root, module_name))
+    return imports
+
+
+def init_managers(module_imports):
+    managers, _ = _init_modules([(None, module_import) for module_import in module_imports])
+    return managers
+
+
 def _validate_dependencies(entities, excluded_entities):
     for name, entity in entities.items():
         # Remove all dependencies for entities that were excluded (based on only/except restrictions)
@@ -374,8 +427,9 @@ def _expand_loop(key, values):
     else:
         name_template = "%s-%s" % (key, '-'.join(["{{%s}}" % var for var in loop_vars]))
     for combination in itertools.product(*[loop[var] for var in loop_vars]):
-        variables = {**extra_vars, **dict([(var, combination[idx]) for idx, var in enumerate(loop_vars)])}
-        name = pystache.render(name_template, variables)
+        loop_variables = dict(zip(loop_vars, combination))
+        name = render_template(name_template, extra_vars, loop_variables)
+        variables = {**extra_vars, **loop_variables}
         entity_config = copy.deepcopy(values)
         entity_config["extra_vars"] = variables
         yield name, entity_config
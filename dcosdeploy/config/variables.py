@@ -1,5 +1,6 @@
 import os
 import base64
+import functools
 import pystache
 from ..base import ConfigurationException
 from ..util import decrypt_data
@@ -7,6 +8,26 @@ from ..util.output import echo
 from ..util.file import check_if_encrypted_is_older
 
 
+TEMPLATE_CACHE_SIZE = 1024
+
+_renderer = pystache.Renderer()
+
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def _parse_template(text):
+    return pystache.parse(text)
+
+
+def render_template(text, *scopes):
+    """Renders the mustache template text like pystache.render, variables of later scopes take precedence over earlier
+    ones. The scopes are searched in place instead of being merged. Parsed templates are cached by their text"""
+    if not isinstance(text, str):
+        return _renderer.render(text, *scopes)
+    if "{{" not in text:
+        return text
+    return _renderer.render(_parse_template(text), *scopes)
+
+
 class VariableContainer:
     def __init__(self, variables):
         self.variables = variables
@@ -16,8 +37,7 @@ class VariableContainer:
         self.extra_vars = extra_vars
 
     def render(self, text):
-        variables = {**self.variables, **self.extra_vars}
-        result_text = pystache.render(text, variables)
+        result_text = render_template(text, self.variables, self.extra_vars)
         if result_text.count("{{"):
             raise ConfigurationException("Unresolved variable")
         return result_text
@@ -61,7 +81,7 @@ class VariableContainerBuilder:
             key = self.render_value(key)
             value = decrypt_data(key, value)
         if render:
-            value = pystache.render(value, self.variables)
+            value = render_template(value, self.variables)
         return value
 
     def _encode_value(self, value, encoder):
@@ -125,11 +145,7 @@ class VariableContainerBuilder:
             self.variables[name] = value
 
     def render_value(self, value, extra_vars=dict()):
-        if extra_vars:
-            variables = {**self.variables, **extra_vars}
-        else:
-            variables = self.variables
-        return pystache.render(value, variables)
+        return render_template(value, self.variables, extra_vars)
 
     def _render_file_variables(self):
         for name, file_base_path, config in self._file_variables:
@@ -1,7 +1,10 @@
 from .config import read_config
 from .adapters.dcos import fail_on_missing_connectivity
-from .util.output import echo
+from .util.executor import DependencyExecutor, ConcurrencyLimits
+from .util import http, global_config, trace
+from .util.output import echo, echo_debug, OrderedOutput
 from .util.script import run_script
+from .util.wait import wait_timeout
 
 
 class DeletionRunner:
@@ -9,50 +12,86 @@ class DeletionRunner:
         fail_on_missing_connectivity()
         self._already_deleted = dict()  # entitiy-name -> newly deleted
         self._dry_deleted = dict()  # entity-name -> newly deleted
-        self._config, self._managers, self.variables = read_config(config_filenames, provided_variables)
-        self._calculate_reserve_dependencies()
+        with trace.span("read_config", "config"):
+            result = read_config(config_filenames, provided_variables)
+        self._config = result.entities
+        self._managers = result.managers
+        self.variables = result.variables
+        self._graph = result.graph
+        self._limits = ConcurrencyLimits.from_config(result.global_config.get("concurrency"), self._managers.keys())
 
-    def run_deletion(self):
-        for name, deployment_object in self._config.items():
-            self._delete(name, deployment_object)
+    def run_deletion(self, parallel=1):
+        self._run(list(self._config.keys()), parallel)
 
-    def run_partial_deletion(self, only):
+    def run_partial_deletion(self, only, parallel=1):
         deployment_object = self._config.get(only)
         if not deployment_object:
             raise Exception("Could not find %s" % only)
-        self._delete(only, deployment_object)
+        self._run(self._graph.reverse_closure(only), parallel)
 
-    def dry_run(self):
-        to_delete = False
-        for name, deployment_object in self._config.items():
-            if self._dry_delete(name, deployment_object):
-                to_delete = True
-        return to_delete
+    def _run(self, names, parallel):
+        executor = self._executor(parallel)
+        return executor.run(names, self._graph.dependents, lambda name: self._delete(name, self._config[name]))
+
+    def _executor(self, parallel):
+        return DependencyExecutor(parallel, self._limits, lambda name: self._config[name].entity_type)
 
-    def partial_dry_run(self, only, force=False):
+    def dry_run(self, parallel=1):
+        results = self._run_dry(list(self._config.keys()), parallel)
+        return any(results.values())
+
+    def partial_dry_run(self, only, force=False, parallel=1):
         deployment_object = self._config.get(only)
         if not deployment_object:
             raise Exception("Could not find %s" % only)
-        return self._dry_delete(only, deployment_object)
+        results = self._run_dry(self._graph.reverse_closure(only), parallel)
+        return results[only]
+
+    def _prefetch(self, names):
+        entities = dict()
+        for name in names:
+            entities.setdefault(self._config[name].entity_type, list()).append(self._config[name].entity)
+        for entity_type, configs in entities.items():
+            manager = self._managers[entity_type]
+            if hasattr(manager, "prefetch"):
+                manager.prefetch(configs)
+
+    def _run_dry(self, names, parallel):
+        with http.response_cache(global_config.http_cache) as cache:
+            results = self._check(names, parallel)
+        if cache is not None:
+            echo_debug("HTTP cache: %d hits, %d misses" % (cache.hits, cache.misses))
+        return results
+
+    def _check(self, names, parallel):
+        self._prefetch(names)
+        executor = self._executor(parallel)
+        if executor.workers == 1:
+            return executor.run(names, self._graph.dependents, lambda name: self._dry_delete(name, self._config[name]))
+        output = OrderedOutput(names)
+        try:
+            return executor.run(names, self._graph.dependents, lambda name: output.run(name, self._dry_delete, name, self._config[name]))
+        finally:
+            output.flush()
 
     def _delete(self, name, config):
         if name in self._already_deleted:
             return self._already_deleted[name]
-        for dependency_name in config.reverse_dependencies:
-            dependency = self._config[dependency_name]
-            self._delete(dependency_name, dependency)
         manager = self._managers[config.entity_type]
         if not manager:
             raise Exception("Could not find manager for '%s'" % config.entity_type)
         if not hasattr(manager, "delete"):
             echo("Module %s does not yet support deletion. Not deleting entity '%s'" % (config.entity_type, name))
+            self._already_deleted[name] = False
             return False
         echo("Deleting %s:" % name)
-        if config.pre_script and config.pre_script.delete_script:
-            run_script(config.pre_script.delete_script, config.entity, self.variables, config.entity_variables)
-        deleted = manager.delete(config.entity)
-        if config.post_script and config.post_script.delete_script:
-            run_script(config.post_script.delete_script, config.entity, self.variables, config.entity_variables)
+        with trace.span(name, "delete", type=config.entity_type):
+            if config.pre_script and config.pre_script.delete_script:
+                run_script(config.pre_script.delete_script, config.entity, self.variables, config.entity_variables, "pre_script")
+            with wait_timeout(config.wait_timeout):
+                deleted = manager.delete(config.entity)
+            if config.post_script and config.post_script.delete_script:
+                run_script(config.post_script.delete_script, config.entity, self.variables, config.entity_variables, "post_script")
         self._already_deleted[name] = deleted
         return deleted
 
@@ -60,24 +99,19 @@ class DeletionRunner:
         if name in self._dry_deleted:
             return self._dry_deleted[name]
         to_delete = False
-        for dependency_name in config.reverse_dependencies:
-            dependency = self._config[dependency_name]
-            if self._dry_delete(dependency_name, dependency):
+        for dependency_name in self._graph.dependents(name):
+            if self._dry_deleted[dependency_name]:
                 to_delete = True
         manager = self._managers[config.entity_type]
         if not manager:
             raise Exception("Could not find manager for '%s'" % config.entity_type)
         if not hasattr(manager, "dry_delete"):
             echo("Module %s does not yet support deletion. Not deleting entity '%s'" % (config.entity_type, name))
+            self._dry_deleted[name] = to_delete
             return to_delete
-        deleted = manager.dry_delete(config.entity)
+        with trace.span(name, "dry-run", type=config.entity_type):
+            deleted = manager.dry_delete(config.entity)
         if not deleted:
             self._already_deleted[name] = False
-        self._dry_deleted[name] = deleted
+        self._dry_deleted[name] = deleted or to_delete
         return deleted or to_delete
-
-    def _calculate_reserve_dependencies(self):
-        for name, deployment_object in self._config.items():
-            for dependency_name, _ in deployment_object.dependencies:
-                dependency = self._config[dependency_name]
-                dependency.reverse_dependencies.append(name)
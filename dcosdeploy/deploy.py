@@ -1,37 +1,115 @@
-from .config import read_config, StateEnum
+import time
+from .base import ConfigurationException, EntityPlan
+from .config import read_config, StateEnum, DependencyGraph
 from .adapters.dcos import fail_on_missing_connectivity
-from .util.output import echo
+from .plan import write_plan, read_plan, DEFAULT_MAX_AGE
+from .util.executor import DependencyExecutor, ConcurrencyLimits
+from .util.history import DurationHistory, format_duration
+from .util import http, global_config, trace
+from .util.output import echo, echo_debug, OrderedOutput
 from .util.script import run_script
+from .util.wait import wait_timeout
 
 
 class DeploymentRunner:
-    def __init__(self, config_filenames, provided_variables):
+    def __init__(self, config_filenames, provided_variables, history_file=None):
         fail_on_missing_connectivity()
+        self.history = DurationHistory(history_file)
         self.already_deployed = dict()  # entitiy-name -> changed
         self.dry_deployed = dict()  # entity-name -> changed
-        self.config, self.managers, self.variables = read_config(config_filenames, provided_variables)
-
-    def run_deployment(self, force=False):
-        changed = False
-        for name, deployment_object in self.config.items():
-            entitiy_changed = self.deploy(name, deployment_object, force=force)
-            if entitiy_changed:
-                changed = True
-        return changed
+        self.plans = dict()  # entity-name -> EntityPlan from the dry-run
+        self.planned_run = None  # (only, force, changed) if the runner was loaded from a plan file
+        with trace.span("read_config", "config"):
+            result = read_config(config_filenames, provided_variables)
+        self.config = result.entities
+        self.managers = result.managers
+        self.variables = result.variables
+        self.graph = result.graph
+        self.concurrency = result.global_config.get("concurrency")
+        self.limits = ConcurrencyLimits.from_config(self.concurrency, self.managers.keys())
+
+    @classmethod
+    def from_plan(cls, plan_filename, max_age=DEFAULT_MAX_AGE, history_file=None):
+        """Create a runner from a plan file written by save_plan. Neither the configuration is read nor is a dry-run needed"""
+        fail_on_missing_connectivity()
+        runner = cls.__new__(cls)
+        runner.history = DurationHistory(history_file)
+        runner.managers, data = read_plan(plan_filename, max_age)
+        runner.config = data["config"]
+        runner.variables = data["variables"]
+        runner.already_deployed = data["already_deployed"]
+        runner.dry_deployed = data["dry_deployed"]
+        runner.plans = data["plans"]
+        runner.planned_run = (data["only"], data["force"], data["changed"])
+        runner.graph = DependencyGraph(runner.config)
+        runner.concurrency = data["concurrency"]
+        runner.limits = ConcurrencyLimits.from_config(runner.concurrency, runner.managers.keys())
+        # The indexes loaded here are also used by the managers to check whether the plan still fits each entity
+        runner._prefetch(list(runner.config.keys()))
+        fingerprints = data["fingerprints"]
+        changed = [name for name, fingerprint in runner._fingerprints(fingerprints.keys()).items() if fingerprint != fingerprints[name]]
+        if changed:
+            raise ConfigurationException("%s changed on the cluster since the plan was created. Please create a new plan" % ", ".join(sorted(changed)))
+        return runner
+
+    def save_plan(self, plan_filename, changed, only=None, force=False):
+        """Save the result of the dry-run so that a later run can execute it with from_plan"""
+        data = dict(config=self.config, variables=self.variables, already_deployed=self.already_deployed, dry_deployed=self.dry_deployed,
+                    plans=self.plans, concurrency=self.concurrency, only=only, force=force, changed=changed,
+                    fingerprints=self._fingerprints(self.dry_deployed.keys()))
+        write_plan(plan_filename, self.managers, data)
+
+    def run_planned_deployment(self, parallel=1):
+        only, force, _ = self.planned_run
+        if only:
+            return self.run_partial_deployment(only, force=force, parallel=parallel)
+        return self.run_deployment(force=force, parallel=parallel)
 
-    def run_partial_deployment(self, only, force=False):
+    def run_deployment(self, force=False, parallel=1):
+        results = self._run(list(self.config.keys()), lambda name: force, parallel)
+        return any(results.values())
+
+    def run_partial_deployment(self, only, force=False, parallel=1):
         deployment_object = self.config.get(only)
         if not deployment_object:
             raise Exception("Could not find %s" % only)
-        return self.deploy(only, deployment_object, force=force)
+        names = self.graph.closure(only)
+        results = self._run(names, lambda name: force and name == only, parallel)
+        return results[only]
+
+    def _run(self, names, force_for, parallel):
+        executor = self._executor(parallel)
+        durations = self._expected_durations(names)
+        # Entities on the longest remaining path of the graph are started first
+        priorities = self.graph.longest_paths(names, durations.get)
+        if self.history.has_data():
+            eta = executor.estimate(names, self.graph.dependencies, durations.get, priorities.get)
+            echo("Estimated duration: %s" % format_duration(eta))
+        try:
+            return executor.run(names, self.graph.dependencies, lambda name: self._deploy_entity(name, self.config[name], force_for(name)),
+                                priority=priorities.get)
+        finally:
+            self.history.save()
 
-    def deploy(self, name, config, force=False):
+    def _executor(self, parallel):
+        return DependencyExecutor(parallel, self.limits, lambda name: self.config[name].entity_type)
+
+    def _expected_durations(self, names):
+        default = self.history.average() or 0
+        durations = dict()
+        for name in names:
+            if self.already_deployed.get(name) is False:
+                durations[name] = 0  # Unchanged in the dry-run, will be skipped
+            else:
+                durations[name] = self.history.get(name, default)
+        return durations
+
+    def _deploy_entity(self, name, config, force=False):
         if name in self.already_deployed:
             return self.already_deployed[name]
         dependency_changed = False
         for dependency_name, dependency_type in config.dependencies:
-            dependency = self.config[dependency_name]
-            if self.deploy(dependency_name, dependency) and dependency_type == "update":
+            if self.already_deployed[dependency_name] and dependency_type == "update":
                 dependency_changed = True
         manager = self.managers[config.entity_type]
         if not manager:
@@ -39,42 +117,87 @@ class DeploymentRunner:
         if config.when_condition == "dependencies-changed" and not dependency_changed and not force:
             changed = False
         else:
-            echo("Deploying %s:" % name)
-            if config.state == StateEnum.REMOVED:
-                if config.pre_script and config.pre_script.delete_script:
-                    run_script(config.pre_script.delete_script, config.entity, self.variables, config.entity_variables)
-                changed = manager.delete(config.entity, force=force)
-                if config.post_script and config.post_script.delete_script:
-                    run_script(config.post_script.delete_script, config.entity, self.variables, config.entity_variables)
-            else:
-                if config.pre_script and config.pre_script.apply_script:
-                    run_script(config.pre_script.apply_script, config.entity, self.variables, config.entity_variables)
-                changed = manager.deploy(config.entity, dependencies_changed=dependency_changed, force=force)
-                if config.post_script and config.post_script.apply_script:
-                    run_script(config.post_script.apply_script, config.entity, self.variables, config.entity_variables)
+            with trace.span(name, "deploy", type=config.entity_type):
+                echo("Deploying %s:" % name)
+                start = time.time()
+                if config.state == StateEnum.REMOVED:
+                    if config.pre_script and config.pre_script.delete_script:
+                        run_script(config.pre_script.delete_script, config.entity, self.variables, config.entity_variables, "pre_script")
+                    with wait_timeout(config.wait_timeout):
+                        changed = manager.delete(config.entity, force=force)
+                    if config.post_script and config.post_script.delete_script:
+                        run_script(config.post_script.delete_script, config.entity, self.variables, config.entity_variables, "post_script")
+                else:
+                    if config.pre_script and config.pre_script.apply_script:
+                        run_script(config.pre_script.apply_script, config.entity, self.variables, config.entity_variables, "pre_script")
+                    with wait_timeout(config.wait_timeout):
+                        if name in self.plans:
+                            changed = manager.deploy(config.entity, dependencies_changed=dependency_changed, force=force, plan=self.plans[name])
+                        else:
+                            changed = manager.deploy(config.entity, dependencies_changed=dependency_changed, force=force)
+                    if config.post_script and config.post_script.apply_script:
+                        run_script(config.post_script.apply_script, config.entity, self.variables, config.entity_variables, "post_script")
+                self.history.record(name, time.time() - start)
         self.already_deployed[name] = changed
         return changed
 
-    def dry_run(self):
-        changed = False
-        for name, deployment_object in self.config.items():
-            if self.dry_deploy(name, deployment_object):
-                changed = True
-        return changed
+    def dry_run(self, parallel=1):
+        results = self._run_dry(list(self.config.keys()), lambda name: False, parallel)
+        return any(results.values())
 
-    def partial_dry_run(self, only, force=False):
+    def partial_dry_run(self, only, force=False, parallel=1):
         deployment_object = self.config.get(only)
         if not deployment_object:
             raise Exception("Could not find %s" % only)
-        return self.dry_deploy(only, deployment_object, force=force)
+        names = self.graph.closure(only)
+        results = self._run_dry(names, lambda name: force and name == only, parallel)
+        return results[only]
+
+    def _prefetch(self, names):
+        """Lets managers that support it load the remote state of all their entities at once before the dry-run"""
+        entities = dict()
+        for name in names:
+            entities.setdefault(self.config[name].entity_type, list()).append(self.config[name].entity)
+        for entity_type, configs in entities.items():
+            manager = self.managers[entity_type]
+            if hasattr(manager, "prefetch"):
+                manager.prefetch(configs)
 
-    def dry_deploy(self, name, config, force=False):
+    def _fingerprints(self, names):
+        """Cheap fingerprints of the remote state (e.g. the version of a marathon app) from managers that support it,
+        served from their indexes"""
+        fingerprints = dict()
+        for name in names:
+            config = self.config[name]
+            manager = self.managers[config.entity_type]
+            if hasattr(manager, "fingerprint"):
+                fingerprints[name] = manager.fingerprint(config.entity)
+        return fingerprints
+
+    def _run_dry(self, names, force_for, parallel):
+        with http.response_cache(global_config.http_cache) as cache:
+            results = self._check(names, force_for, parallel)
+        if cache is not None:
+            echo_debug("HTTP cache: %d hits, %d misses" % (cache.hits, cache.misses))
+        return results
+
+    def _check(self, names, force_for, parallel):
+        self._prefetch(names)
+        executor = self._executor(parallel)
+        if executor.workers == 1:
+            return executor.run(names, self.graph.dependencies, lambda name: self._dry_deploy_entity(name, self.config[name], force_for(name)))
+        output = OrderedOutput(names)
+        try:
+            return executor.run(names, self.graph.dependencies, lambda name: output.run(name, self._dry_deploy_entity, name, self.config[name], force_for(name)))
+        finally:
+            output.flush()
+
+    def _dry_deploy_entity(self, name, config, force=False):
         if name in self.dry_deployed:
             return self.dry_deployed[name]
         dependency_changed = False
         for dependency_name, dependency_type in config.dependencies:
-            dependency = self.config[dependency_name]
-            if self.dry_deploy(dependency_name, dependency) and dependency_type == "update":
+            if self.dry_deployed[dependency_name] and dependency_type == "update":
                 dependency_changed = True
         if force:
             dependency_changed = True
@@ -84,10 +207,14 @@ class DeploymentRunner:
         if config.when_condition == "dependencies-changed" and not dependency_changed:
             changed = False
         else:
-            if config.state == StateEnum.REMOVED:
-                changed = manager.dry_delete(config.entity)
-            else:
-                changed = manager.dry_run(config.entity, dependencies_changed=dependency_changed)
+            with trace.span(name, "dry-run", type=config.entity_type):
+                if config.state == StateEnum.REMOVED:
+                    changed = manager.dry_delete(config.entity)
+                else:
+                    changed = manager.dry_run(config.entity, dependencies_changed=dependency_changed)
+                    if isinstance(changed, EntityPlan):
+                        self.plans[name] = changed
+                    changed = bool(changed)
         if not changed and not force:
             self.already_deployed[name] = False
         self.dry_deployed[name] = changed
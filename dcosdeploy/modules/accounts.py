@@ -5,6 +5,7 @@ from cryptography.hazmat.primitives.asymmetric import rsa
 from ..base import ConfigurationException
 from ..util.output import echo
 from ..adapters.secrets import SecretsAdapter
+from ..adapters.registry import AdapterRegistry
 from .iam_users import IamUserBaseManager, render_permissions
 
 
@@ -35,9 +36,10 @@ def parse_config(entity_name, config, config_helper):
 
 
 class AccountsManager(IamUserBaseManager):
-    def __init__(self):
-        super().__init__()
-        self.secrets = SecretsAdapter()
+    def __init__(self, adapters=None):
+        adapters = adapters or AdapterRegistry()
+        super().__init__(adapters)
+        self.secrets = adapters.get(SecretsAdapter)
 
     def _does_serviceaccount_exist(self, name):
         return self.bouncer.get_account(name) is not None
@@ -2,8 +2,10 @@ import json
 from copy import deepcopy
 from ..base import ConfigurationException
 from ..adapters.marathon import MarathonAdapter
-from ..util import compare_dicts, update_dict_with_defaults
+from ..adapters.registry import AdapterRegistry
+from ..util import diff_dicts
 from ..util.output import echo, echo_diff
+from ..util.schema import Schema, ALL
 
 
 class MarathonApp:
@@ -59,8 +61,12 @@ def parse_config(name, config, config_helper):
 
 
 class MarathonAppsManager:
-    def __init__(self):
-        self.api = MarathonAdapter()
+    def __init__(self, adapters=None):
+        adapters = adapters or AdapterRegistry()
+        self.api = adapters.get(MarathonAdapter)
+
+    def prefetch(self, configs):
+        self.api.prefetch_apps([config.app_id for config in configs])
 
     def deploy(self, config, dependencies_changed=False, force=False):
         echo("\tStarting deployment...")
@@ -73,6 +79,10 @@ class MarathonAppsManager:
             echo("\tFinished")
         return changed or dependencies_changed
 
+    def fingerprint(self, config):
+        app_state = self.api.get_app_state(config.app_id)
+        return app_state["version"] if app_state else None
+
     def dry_run(self, config, dependencies_changed=False):
         app_state = self.api.get_app_state(config.app_id)
         if not app_state:
@@ -105,7 +115,7 @@ class MarathonAppsManager:
             if key in remote_definition:
                 del remote_definition[key]
         local_definition, remote_definition = _normalize_app_definition(local_definition, remote_definition)
-        return compare_dicts(remote_definition, local_definition)
+        return diff_dicts(remote_definition, local_definition)
 
 
 _app_defaults = dict(
@@ -159,82 +169,61 @@ _health_check_defaults = dict(
 )
 
 
+_port_mapping_schema = Schema(
+    unset_if_zero=["servicePort"],
+    defaults=dict(protocol="tcp", labels={}),
+    remote_defaults=dict(hostPort=0),
+)
+
+_port_definition_schema = Schema(
+    unset_if_zero=["port"],
+    defaults=dict(protocol="tcp"),
+    remote_defaults=dict(hostPort=0),
+)
+
+_app_schema = Schema(
+    inherit=_app_defaults.keys(),
+    defaults=_app_defaults,
+    both=True,
+    floats=["cpus", "disk", "mem"],
+    fields=dict(
+        container=Schema(
+            remote_defaults=dict(portMappings=[dict(containerPort=0, labels={}, name="default", protocol="tcp", servicePort=0)]),
+            fields=dict(docker=Schema(defaults=_docker_defaults)),
+            items=dict(
+                portMappings=_port_mapping_schema,
+                volumes=Schema(fields=dict(persistent=Schema(defaults=dict(constraints=[], type="root")))),
+            ),
+        ),
+        unreachableStrategy=Schema(floats=ALL),
+        upgradeStrategy=Schema(floats=ALL),
+    ),
+    items=dict(
+        portDefinitions=_port_definition_schema,
+        healthChecks=Schema(defaults=_health_check_defaults),
+    ),
+)
+
+_residency_defaults = dict(
+    relaunchEscalationTimeoutSeconds=3600,
+    taskLostBehavior="WAIT_FOREVER",
+)
+
+
 def _normalize_app_definition(local_definition, remote_definition):
-    local_definition, remote_definition = _align_app_definitions(local_definition, remote_definition)
-    update_dict_with_defaults(local_definition, _app_defaults)
-    update_dict_with_defaults(remote_definition, _app_defaults)
     if local_definition["id"][0] != "/":
         local_definition["id"] = "/" + local_definition["id"]
-    if "docker" in local_definition["container"]:
-        update_dict_with_defaults(local_definition["container"]["docker"], _docker_defaults)
-
     if "portDefinitions" in remote_definition and "portDefinitions" not in local_definition:
         if len(remote_definition["portDefinitions"]) > 0:
             local_definition["portDefinitions"] = [{'protocol': 'tcp', 'port': 0, 'name': 'default'}]
         else:
             local_definition["portDefinitions"] = []
-    local_container = local_definition["container"]
-    remote_container = remote_definition["container"]
-    if "portMappings" in remote_container and "portMappings" not in local_container:
-        local_container["portMappings"] = [{
-            "containerPort": 0,
-            "labels": {},
-            "name": "default",
-            "protocol": "tcp",
-            "servicePort": 0
-        }]
-
-    for local_mapping, remote_mapping in zip(local_definition["container"].get("portMappings", list()),
-                                             remote_definition["container"].get("portMappings", list())):
-        if local_mapping.get("servicePort", 0) == 0:
-            if "servicePort" in local_mapping:
-                del local_mapping["servicePort"]
-            del remote_mapping["servicePort"]
-        local_mapping.setdefault("protocol", "tcp")
-        if "hostPort" in remote_mapping and "hostPort" not in local_mapping:
-            local_mapping["hostPort"] = 0
-        if "labels" not in local_mapping:
-            local_mapping["labels"] = dict()
-    for local_def, remote_def in zip(local_definition.get("portDefinitions", list()), remote_definition.get("portDefinitions", list())):
-        if local_def.get("port", 0) == 0:
-            if "port" in local_def:
-                del local_def["port"]
-            del remote_def["port"]
-        local_def.setdefault("protocol", "tcp")
-        if "hostPort" in remote_def and "hostPort" not in local_def:
-            local_def["hostPort"] = 0
-    for health_check in local_definition["healthChecks"]:
-        update_dict_with_defaults(health_check, _health_check_defaults)
-
-    has_local_persistent_volume = False
-    for volume in local_container["volumes"]:
-        if "persistent" in volume:
-            has_local_persistent_volume = True
-            volume["persistent"].setdefault("constraints", [])
-            volume["persistent"].setdefault("type", "root")
-    if has_local_persistent_volume:
-        residency = local_definition.setdefault("residency", dict())
-        residency.setdefault("relaunchEscalationTimeoutSeconds", 3600)
-        residency.setdefault("taskLostBehavior", "WAIT_FOREVER")
-
-    for item in ["cpus", "disk", "mem"]:
-        if not isinstance(local_definition[item], float) and isinstance(remote_definition[item], float):
-            local_definition[item] = float(local_definition[item])
+    local_definition, remote_definition = _app_schema.normalize(local_definition, remote_definition)
 
-    for group in ["unreachableStrategy", "upgradeStrategy"]:
-        if not isinstance(local_definition[group], dict) or not isinstance(remote_definition[group], dict):
-            continue
-        for item in local_definition[group].keys():
-            if not isinstance(local_definition[group][item], float) and isinstance(remote_definition[group][item], float):
-                local_definition[group][item] = float(local_definition[group][item])
-
-    return local_definition, remote_definition
-
-
-def _align_app_definitions(local_definition, remote_definition):
-    for key in _app_defaults.keys():
-        if key in remote_definition and not key in local_definition:
-            local_definition[key] = remote_definition[key]
+    if any("persistent" in volume for volume in local_definition["container"]["volumes"]):
+        residency = local_definition.setdefault("residency", dict())
+        for key, value in _residency_defaults.items():
+            residency.setdefault(key, value)
     return local_definition, remote_definition
 
 
@@ -4,6 +4,7 @@ from ..base import ConfigurationException
 from ..util.output import echo
 from ..adapters.ca import CAAdapter
 from ..adapters.secrets import SecretsAdapter
+from ..adapters.registry import AdapterRegistry
 
 
 class Cert:
@@ -63,9 +64,10 @@ def parse_config(name, config, config_helper):
 
 
 class CertsManager:
-    def __init__(self):
-        self.ca = CAAdapter()
-        self.secrets = SecretsAdapter()
+    def __init__(self, adapters=None):
+        adapters = adapters or AdapterRegistry()
+        self.ca = adapters.get(CAAdapter)
+        self.secrets = adapters.get(SecretsAdapter)
 
     def deploy(self, config, dependencies_changed=False, force=False):
         cert_secret = self.secrets.get_secret(config.cert_secret)
@@ -1,8 +1,10 @@
-import time
 from ..adapters.edgelb import EdgeLbAdapter
+from ..adapters.registry import AdapterRegistry
 from ..base import ConfigurationException
-from ..util import compare_dicts, update_dict_with_defaults, compare_text
+from ..util import diff_dicts, diff_text
 from ..util.output import echo, echo_diff
+from ..util.schema import Schema
+from ..util.wait import wait_for, WaitTimeoutException
 
 
 class EdgeLbPool:
@@ -53,19 +55,18 @@ def parse_config(name, config, config_helper):
 
 
 class EdgeLbPoolsManager:
-    def __init__(self):
-        self.api = EdgeLbAdapter()
+    def __init__(self, adapters=None):
+        adapters = adapters or AdapterRegistry()
+        self.api = adapters.get(EdgeLbAdapter)
 
     def deploy(self, config, dependencies_changed=False, force=False):
         if not self.api.ping(config.api_server):
             echo("\tEdgeLB api not yet available. Waiting ...")
-            waiting = 0
-            while not self.api.ping(config.api_server):
-                time.sleep(10)
-                waiting += 1
-                if waiting > 12:
-                    echo("\tCould not reach edgelb api. Giving up")
-                    raise Exception("EdgeLB api not available.")
+            try:
+                wait_for(lambda: self.api.ping(config.api_server), "EdgeLB api not available", default_timeout=2*60)
+            except WaitTimeoutException:
+                echo("\tCould not reach edgelb api. Giving up")
+                raise
         pool_exists = config.name in self.api.get_pools(config.api_server)
         if pool_exists:
             echo("\tUpdating pool")
@@ -97,7 +98,7 @@ class EdgeLbPoolsManager:
 
         existing_pool_config = self.api.get_pool(config.api_server, config.name)
         local_pool_config, existing_pool_config = _normalize_pool_definition(config.pool_config, existing_pool_config)
-        pool_diff = compare_dicts(existing_pool_config, local_pool_config)
+        pool_diff = diff_dicts(existing_pool_config, local_pool_config)
         if pool_diff:
             echo_diff("Would update pool %s" % config.name, pool_diff)
             pool_updated = True
@@ -106,7 +107,7 @@ class EdgeLbPoolsManager:
         if config.pool_template:
             remote_pool_template = self.api.get_pool_template(config.api_server, config.name)
             remote_pool_template = remote_pool_template.replace(r'\n', '\n')
-            template_diff = compare_text(remote_pool_template.strip(), config.pool_template.strip())
+            template_diff = diff_text(remote_pool_template.strip(), config.pool_template.strip())
             if template_diff:
                 template_updated = True
                 echo_diff("Would update template for pool %s" % config.name, template_diff)
@@ -186,42 +187,36 @@ _service_defaults = dict(
 _frontend_defaults = dict(
     bindAddress="0.0.0.0",
     certificates=[],
-    miscStrs=[]
+    miscStrs=[],
+    linkBackend=dict(map=[])
+)
+
+
+_pool_schema = Schema(
+    drop=["packageVersion", "packageName"],
+    inherit=["namespace"],
+    defaults=_pool_defaults,
+    fields=dict(
+        haproxy=Schema(
+            items=dict(
+                backends=Schema(defaults=_backend_defaults, items=dict(services=Schema(defaults=_service_defaults))),
+                frontends=Schema(defaults=_frontend_defaults),
+            ),
+        ),
+    ),
 )
 
+_pool_schema_123 = Schema(defaults=_pool_defaults_123)
+
 
 def _normalize_pool_definition(local_pool_config, remote_pool_config):
-    # Remove meta values
-    for key in ["packageVersion", "packageName"]:
-        if key in local_pool_config:
-            del local_pool_config[key]
-        if key in remote_pool_config:
-            del remote_pool_config[key]
-    if "namespace" in remote_pool_config and "namespace" not in local_pool_config:
-        local_pool_config["namespace"] = remote_pool_config["namespace"]
-    # Apply default values on top level
-    update_dict_with_defaults(local_pool_config, _pool_defaults)
+    local_pool_config, remote_pool_config = _pool_schema.normalize(local_pool_config, remote_pool_config)
     # Detect if new parameters introduced in v1.2.3 are present in remote config and add their defaults to the local config to avoid false positives
     if "poolHealthcheckGracePeriod" in remote_pool_config:
-        update_dict_with_defaults(local_pool_config, _pool_defaults_123)
-
-    local_haproxy = local_pool_config["haproxy"]
-    # Normalize backends
-    for backend in local_haproxy["backends"]:
-        update_dict_with_defaults(backend, _backend_defaults)
-        for service in backend["services"]:
-            update_dict_with_defaults(service, _service_defaults)
-    for frontend in local_haproxy["frontends"]:
-        update_dict_with_defaults(frontend, _frontend_defaults)
+        _pool_schema_123.normalize(local_pool_config, remote_pool_config)
+    for frontend in local_pool_config["haproxy"]["frontends"]:
         if "name" not in frontend:
             frontend["name"] = "frontend_{}_{}".format(frontend["bindAddress"], frontend["bindPort"])
-
-    # Normalize frontends
-    for frontend in local_haproxy["frontends"]:
-        if "linkBackend" not in frontend:
-            frontend["linkBackend"] = dict(map=list())
-        elif "linkBackend" in frontend and "map" not in frontend["linkBackend"]:
-            frontend["linkBackend"]["map"] = list()
     return local_pool_config, remote_pool_config
 
 
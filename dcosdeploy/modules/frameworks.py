@@ -1,9 +1,10 @@
 import time
 from ..adapters.cosmos import CosmosAdapter
 from ..adapters.marathon import MarathonAdapter
-from ..util import compare_dicts
+from ..adapters.registry import AdapterRegistry
+from ..util import diff_dicts
 from ..util.output import echo, echo_diff
-from ..base import ConfigurationException
+from ..base import ConfigurationException, EntityPlan
 
 
 class Framework:
@@ -48,12 +49,26 @@ def parse_config(name, config, config_helper):
 
 
 class FrameworksManager:
-    def __init__(self):
-        self.api = CosmosAdapter()
-        self.marathon = MarathonAdapter()
+    def __init__(self, adapters=None):
+        adapters = adapters or AdapterRegistry()
+        self.api = adapters.get(CosmosAdapter)
+        self.marathon = adapters.get(MarathonAdapter)
 
-    def deploy(self, config, dependencies_changed=False, force=False):
-        old_description = self.api.describe_service(config.app_id)
+    def prefetch(self, configs):
+        self.marathon.prefetch_apps([config.app_id for config in configs])
+
+    def fingerprint(self, config):
+        app_state = self.marathon.get_app_state(config.app_id)
+        return app_state["version"] if app_state else None
+
+    def deploy(self, config, dependencies_changed=False, force=False, plan=None):
+        # The marathon app of the framework (from the app index) is a cheap check if the plan still fits
+        if plan and plan.matches(self.marathon.get_app_state(config.app_id)):
+            old_description = plan.remote_state
+        else:
+            if plan:
+                echo("\tFramework changed since the dry-run. Checking again")
+            old_description = self.api.describe_service(config.app_id)
         package_version = config.package_version
         if not old_description:
             echo("\tInstalling framework")
@@ -66,7 +81,7 @@ class FrameworksManager:
                 self.api.wait_for_plan_complete(config.app_id, "deploy")
         else:
             old_options = old_description["userProvidedOptions"]
-            options_diff = compare_dicts(old_options, config.options)
+            options_diff = diff_dicts(old_options, config.options)
             version_equal = old_description["package"]["version"] == config.package_version
             if version_equal and not options_diff and dependencies_changed:
                 echo("\tNo change in config. Restarting framework")
@@ -91,9 +106,9 @@ class FrameworksManager:
         description = self.api.describe_service(config.app_id)
         if not description:
             echo("Would install %s" % config.service_name)
-            return True
+            return EntityPlan(EntityPlan.CREATE)
         old_options = description["userProvidedOptions"]
-        options_diff = compare_dicts(old_options, config.options)
+        options_diff = diff_dicts(old_options, config.options)
         version_equal = description["package"]["version"] == config.package_version
         if not version_equal:
             echo("Would update %s from %s to %s" % (config.service_name, description["package"]["version"], config.package_version))
@@ -101,8 +116,10 @@ class FrameworksManager:
             echo_diff("Would change config of %s" % config.service_name, options_diff)
         if dependencies_changed and version_equal and not options_diff and not self.api.has_plans_api(config.service_name):
             echo("Would restart framework %s" % config.service_name)
-            return True
-        return options_diff or not version_equal
+            return EntityPlan(EntityPlan.RESTART, remote_state=description)
+        if options_diff or not version_equal:
+            return EntityPlan(EntityPlan.UPDATE, remote_state=description)
+        return EntityPlan(EntityPlan.NONE, remote_state=description)
 
     def delete(self, config, force=False):
         echo("\tDeleting framework")
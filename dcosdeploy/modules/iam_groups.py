@@ -2,6 +2,7 @@ from ..base import ConfigurationException
 from ..util import global_config
 from ..util.output import echo
 from ..adapters.bouncer import BouncerAdapter
+from ..adapters.registry import AdapterRegistry
 from .iam_users import render_permissions
 
 
@@ -28,8 +29,9 @@ def parse_config(name, config, config_helper):
 
 
 class IAMGroupsManager:
-    def __init__(self):
-        self.bouncer = BouncerAdapter()
+    def __init__(self, adapters=None):
+        adapters = adapters or AdapterRegistry()
+        self.bouncer = adapters.get(BouncerAdapter)
 
     def deploy(self, config, dependencies_changed=False, force=False):
         changed = False
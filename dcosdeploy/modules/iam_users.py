@@ -2,6 +2,7 @@ from ..base import ConfigurationException
 from ..util import global_config
 from ..util.output import echo
 from ..adapters.bouncer import BouncerAdapter
+from ..adapters.registry import AdapterRegistry
 
 
 class IAMUser:
@@ -54,8 +55,9 @@ def parse_config(name, config, config_helper):
 
 
 class IamUserBaseManager:
-    def __init__(self):
-        self.bouncer = BouncerAdapter()
+    def __init__(self, adapters=None):
+        adapters = adapters or AdapterRegistry()
+        self.bouncer = adapters.get(BouncerAdapter)
 
     def _update_groups_permissions(self, name, groups, permissions):
         changed = False
@@ -129,9 +131,8 @@ class IamUserBaseManager:
 
 
 class IAMUsersManager(IamUserBaseManager):
-    def __init__(self):
-        super().__init__()
-        self.bouncer = BouncerAdapter()
+    def __init__(self, adapters=None):
+        super().__init__(adapters)
 
     def deploy(self, config, dependencies_changed=False, force=False):
         changed = False
@@ -1,8 +1,10 @@
 import json
-from ..base import ConfigurationException
+from ..base import ConfigurationException, EntityPlan
 from ..adapters.metronome import MetronomeAdapter
-from ..util import compare_dicts, update_dict_with_defaults
+from ..adapters.registry import AdapterRegistry
+from ..util import diff_dicts, md5_hash_str
 from ..util.output import echo, echo_diff
+from ..util.schema import Schema
 
 
 class MetronomeJob:
@@ -47,11 +49,24 @@ def parse_config(name, config, config_helper):
 
 
 class JobsManager:
-    def __init__(self):
-        self.api = MetronomeAdapter()
-
-    def deploy(self, config, dependencies_changed=False, force=False):
-        if self.api.does_job_exist(config.job_id):
+    def __init__(self, adapters=None):
+        adapters = adapters or AdapterRegistry()
+        self.api = adapters.get(MetronomeAdapter)
+
+    def prefetch(self, configs):
+        self.api.prefetch_jobs()
+
+    def fingerprint(self, config):
+        job_definition, schedule_definitions = self.api.get_job_state(config.job_id)
+        if job_definition is None:
+            return None
+        return md5_hash_str(json.dumps([job_definition, schedule_definitions], sort_keys=True))
+
+    def deploy(self, config, dependencies_changed=False, force=False, plan=None):
+        exists = self.api.does_job_exist(config.job_id)
+        if plan and not plan.matches(exists):
+            echo("\tJob was %s since the dry-run" % ("created" if exists else "deleted"))
+        if exists:
             echo("\tUpdating existing job")
             self.api.update_job(config.job_id, config.job_definition)
             if config.schedule_definition:
@@ -83,27 +98,27 @@ class JobsManager:
             return True
 
     def dry_run(self, config, dependencies_changed=False):
-        if not self.api.does_job_exist(config.job_id):
+        existing_job_definition, existing_schedule_definition = self.api.get_job_state(config.job_id)
+        if existing_job_definition is None:
             echo("Would create job %s" % config.job_id)
             if config.run.on_create:
                 echo("Would run job %s" % config.job_id)
-            return True
-        existing_job_definition = self.api.get_job(config.job_id)
-        existing_schedule_definition = self.api.get_schedules(config.job_id)
+            return EntityPlan(EntityPlan.CREATE)
         job_diff = self._compare_job_definitions(config.job_definition, existing_job_definition)
         if job_diff:
             echo_diff("Would update job %s" % config.job_id, job_diff)
         schedule_diff = self._compare_schedule_definitions(config.schedule_definition, existing_schedule_definition)
         if schedule_diff:
             echo_diff("Would update schedule for job %s" % config.job_id, schedule_diff)
-        changed = job_diff is not None or schedule_diff is not None
+        changed = bool(job_diff) or bool(schedule_diff)
         if changed:
             if config.run.on_update:
                 echo("Would run job %s" % config.job_id)
+            return EntityPlan(EntityPlan.UPDATE)
         elif dependencies_changed and config.run.on_update:
             echo("Would run job %s" % config.job_id)
-            return True
-        return changed
+            return EntityPlan(EntityPlan.RESTART)
+        return EntityPlan(EntityPlan.NONE)
 
     def delete(self, config, force=False):
         echo("\tDeleting job")
@@ -120,11 +135,11 @@ class JobsManager:
 
     def _compare_job_definitions(self, local_definition, remote_definition):
         local_definition, remote_definition = _normalize_job_definitions(local_definition, remote_definition)
-        return compare_dicts(remote_definition, local_definition)
+        return diff_dicts(remote_definition, local_definition)
 
     def _compare_schedule_definitions(self, local_definition, remote_definition):
         local_definition, remote_definition = _normalize_schedule_definitions(local_definition, remote_definition)
-        return compare_dicts(remote_definition, local_definition)
+        return diff_dicts(remote_definition, local_definition)
 
 
 _job_defaults = dict(
@@ -152,19 +167,23 @@ _ucr_defaults = dict(
 )
 
 
-def _normalize_job_definitions(local_definition, remote_definition):
-    update_dict_with_defaults(local_definition, _job_defaults)
+_job_schema = Schema(
+    defaults=_job_defaults,
+    fields=dict(
+        run=Schema(
+            defaults=_run_defaults,
+            remote_defaults=dict(gpus=0),
+            fields=dict(
+                docker=Schema(defaults=_docker_defaults),
+                ucr=Schema(defaults=_ucr_defaults),
+            ),
+        ),
+    ),
+)
 
-    local_run = local_definition.get("run", dict())
-    update_dict_with_defaults(local_run, _run_defaults)
-    if "docker" in local_run:
-        update_dict_with_defaults(local_run["docker"], _docker_defaults)
-    if "ucr" in local_run:
-        update_dict_with_defaults(local_run["ucr"], _ucr_defaults)
-    if "gpus" in remote_definition["run"] and "gpus" not in local_run:
-        local_run["gpus"] = 0
 
-    return local_definition, remote_definition
+def _normalize_job_definitions(local_definition, remote_definition):
+    return _job_schema.normalize(local_definition, remote_definition)
 
 
 def _normalize_schedule_definitions(local_definition, remote_definition):
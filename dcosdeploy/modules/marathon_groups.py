@@ -2,6 +2,7 @@ from ..base import ConfigurationException
 from ..util.output import echo
 from ..adapters.marathon import MarathonAdapter
 from ..adapters.mesos import MesosAdapter
+from ..adapters.registry import AdapterRegistry
 
 
 class MarathonGroup:
@@ -43,9 +44,10 @@ def parse_config(name, config, config_helper):
 
 
 class MarathonGroupsManager:
-    def __init__(self):
-        self.marathon_api = MarathonAdapter()
-        self.mesos_api = MesosAdapter()
+    def __init__(self, adapters=None):
+        adapters = adapters or AdapterRegistry()
+        self.marathon_api = adapters.get(MarathonAdapter)
+        self.mesos_api = adapters.get(MesosAdapter)
 
     def deploy(self, config, dependencies_changed=False, force=False):
         group = self.marathon_api.get_group(config.name)
@@ -1,7 +1,8 @@
-from ..base import ConfigurationException
+from ..base import ConfigurationException, EntityPlan
 from ..util.output import echo
 from ..util import global_config
 from ..adapters.cosmos import CosmosAdapter
+from ..adapters.registry import AdapterRegistry
 
 
 class PackageRepository:
@@ -23,11 +24,18 @@ def parse_config(name, config, config_helper):
 
 
 class PackageRepositoriesManager:
-    def __init__(self):
-        self.api = CosmosAdapter()
+    def __init__(self, adapters=None):
+        adapters = adapters or AdapterRegistry()
+        self.api = adapters.get(CosmosAdapter)
 
-    def deploy(self, config, dependencies_changed=False, force=False):
+    def fingerprint(self, config):
         repo = self._get_repo(config.name)
+        return repo["uri"] if repo else None
+
+    def deploy(self, config, dependencies_changed=False, force=False, plan=None):
+        repo = self._get_repo(config.name)
+        if plan and not plan.matches(repo):
+            echo("\tRepository was %s since the dry-run" % ("added" if repo else "removed"))
         if repo:
             if repo["uri"] != config.uri:
                 echo("\tURIs do not match. Deleting old repository")
@@ -44,15 +52,15 @@ class PackageRepositoriesManager:
         repo = self._get_repo(config.name)
         if not repo:
             echo("Would add repository %s" % config.name)
-            return True
+            return EntityPlan(EntityPlan.CREATE)
         elif repo["uri"] != config.uri:
             if global_config.debug:
                 echo("Would change URI of repository %s from %s to %s" % (config.name, repo["uri"], config.uri))
             else:
                 echo("Would change URI of repository %s" % config.name)
-            return True
+            return EntityPlan(EntityPlan.UPDATE)
         else:
-            return False
+            return EntityPlan(EntityPlan.NONE)
 
     def delete(self, config, force=False):
         echo("\tDeleting repository")
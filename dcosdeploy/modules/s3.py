@@ -1,10 +1,11 @@
 import os
 from io import BytesIO
-import time
 from ..adapters.s3 import S3FileAdapter
+from ..adapters.registry import AdapterRegistry
 from ..base import ConfigurationException
-from ..util import md5_hash_file, md5_hash_file_object, md5_hash_str, list_path_recursive, compare_text
+from ..util import md5_hash_file, md5_hash_file_object, md5_hash_str, list_path_recursive, diff_text
 from ..util.output import echo, echo_diff
+from ..util.wait import wait_for, WaitTimeoutException
 from ..util import global_config
 
 
@@ -122,17 +123,17 @@ def _collect_files(name, source, key, compress, config_helper):
 
 
 class S3FilesManager:
-    def __init__(self):
-        self.api = S3FileAdapter()
+    def __init__(self, adapters=None):
+        adapters = adapters or AdapterRegistry()
+        self.api = adapters.get(S3FileAdapter)
 
     def deploy(self, config, dependencies_changed=False, force=False):
-        if config.server.wait_for_endpoint:
-            for i in range(5*6):
-                if self.api.ping(config.server):
-                    break
-                if i == 0:
-                    echo("\tWaiting for s3 endpoint to be reachable")
-                time.sleep(10)
+        if config.server.wait_for_endpoint and not self.api.ping(config.server):
+            echo("\tWaiting for s3 endpoint to be reachable")
+            try:
+                wait_for(lambda: self.api.ping(config.server), "S3 endpoint not reachable", default_timeout=5*60)
+            except WaitTimeoutException:
+                pass  # Try anyway, the following calls fail with a meaningful error
         if config.create_bucket and not self.api.does_bucket_exist(config.server, config.bucket):
             echo("\tCreating bucket %s" % config.bucket)
             self.api.create_bucket(config.server, config.bucket)
@@ -228,9 +229,9 @@ class S3FilesManager:
             if global_config.debug:
                 echo("Would upload file to %s. Changes:" % key)
                 server_file_content = self.api.get_file(server, bucket, key)
-                with open(filename, "r") as local_file:
+                with open(filename, "rb") as local_file:
                     local_file_content = local_file.read()
-                echo(compare_text(server_file_content, local_file_content))
+                echo(str(diff_text(server_file_content, local_file_content)))
             else:
                 echo("Would upload file to %s due to changes" % key)
             return True
@@ -246,12 +247,12 @@ class S3FilesManager:
                 else:
                     with zip_file.open(name, "r") as remote_file:
                         remote_file_content = remote_file.read()
-                    with open(local_files[name], "r") as local_file:
+                    with open(local_files[name], "rb") as local_file:
                         local_file_content = local_file.read()
-                    diff = compare_text(remote_file_content, local_file_content)
+                    diff = diff_text(remote_file_content, local_file_content)
                     if diff:
                         echo("  %s changed:" % name)
-                        echo(diff)
+                        echo(str(diff))
             for name in local_files.keys():
                 if name not in zip_file.namelist():
                     echo("  %s will be added" % name)
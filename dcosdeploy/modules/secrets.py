@@ -1,6 +1,7 @@
 from ..adapters.secrets import SecretsAdapter
-from ..base import ConfigurationException
-from ..util import compare_text
+from ..adapters.registry import AdapterRegistry
+from ..base import ConfigurationException, EntityPlan
+from ..util import diff_text
 from ..util.output import echo, echo_diff
 
 
@@ -39,21 +40,22 @@ def parse_config(name, config, config_helper):
 
 
 class SecretsManager:
-    def __init__(self):
-        self.api = SecretsAdapter()
+    def __init__(self, adapters=None):
+        adapters = adapters or AdapterRegistry()
+        self.api = adapters.get(SecretsAdapter)
 
-    def deploy(self, config, dependencies_changed=False, force=False):
+    def fingerprint(self, config):
+        # Only the existence, the content of secrets can not be checked without reading it
+        return config.path in self.api.list_secrets()
+
+    def deploy(self, config, dependencies_changed=False, force=False, plan=None):
         exists = config.path in self.api.list_secrets()
+        if plan and not plan.matches(exists):
+            echo("\tSecret was %s since the dry-run" % ("created" if exists else "deleted"))
+            plan = None
         if exists:
-            content = self.api.get_secret(config.path)
-            if config.value:
-                changed = content != config.value
-            elif config.file_content:
-                if isinstance(config.file_content, str):
-                    content = content.decode("utf-8")
-                changed = content != config.file_content
-            else:
-                raise Exception("Specified neither value nor file_content for secret")
+            # The plan only records that the content differs, the content itself is not kept in it
+            changed = bool(plan) or self._compare_content(config, self.api.get_secret(config.path))[0]
             if not changed and not force:
                 echo("\tSecret already exists. No update needed.")
                 return False
@@ -71,20 +73,14 @@ class SecretsManager:
         exists = config.path in self.api.list_secrets()
         if not exists:
             echo("Would create secret %s" % config.path)
-            return True
-        content = self.api.get_secret(config.path)
-        if config.value:
-            changed = content != config.value
-        elif config.file_content:
-            if isinstance(config.file_content, str):
-                content = content.decode("utf-8")
-            changed = content != config.file_content
-        else:
-            raise Exception("Specified neither value nor file_content for secret")
-        if changed:
-            new_content = config.file_content if config.file_content else config.value
-            echo_diff("Would update secret %s" % config.path, compare_text(content, new_content))
-        return changed
+            return EntityPlan(EntityPlan.CREATE)
+        changed, content = self._compare_content(config, self.api.get_secret(config.path))
+        if not changed:
+            return EntityPlan(EntityPlan.NONE)
+        new_content = config.file_content if config.file_content else config.value
+        diff = diff_text(content, new_content)
+        echo_diff("Would update secret %s" % config.path, diff)
+        return EntityPlan(EntityPlan.UPDATE)
 
     def delete(self, config, force=False):
         echo("\tDeleting secret")
@@ -99,6 +95,16 @@ class SecretsManager:
         else:
             return False
 
+    def _compare_content(self, config, content):
+        if config.value:
+            return content != config.value, content
+        elif config.file_content:
+            if isinstance(config.file_content, str):
+                content = content.decode("utf-8")
+            return content != config.file_content, content
+        else:
+            raise Exception("Specified neither value nor file_content for secret")
+
 
 __config__ = Secret
 __manager__ = SecretsManager
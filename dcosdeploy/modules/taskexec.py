@@ -1,4 +1,5 @@
 from ..adapters.mesos import MesosAdapter
+from ..adapters.registry import AdapterRegistry
 from ..base import ConfigurationException
 from ..util.output import echo
 
@@ -24,8 +25,9 @@ def parse_config(name, config, config_helper):
 
 
 class TaskExecManager:
-    def __init__(self):
-        self.api = MesosAdapter()
+    def __init__(self, adapters=None):
+        adapters = adapters or AdapterRegistry()
+        self.api = adapters.get(MesosAdapter)
 
     def deploy(self, config, dependencies_changed=False, force=False):
         echo("\tRunning command")
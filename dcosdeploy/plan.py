@@ -0,0 +1,43 @@
+import pickle
+import time
+from . import __version__
+from .auth import get_base_url
+from .base import ConfigurationException
+from .config import module_imports, init_managers
+
+
+PLAN_FORMAT = 1
+DEFAULT_MAX_AGE = 60*60
+
+
+def write_plan(filename, managers, data):
+    """Write the result of a dry-run to a plan file. The plan contains the rendered configuration including decrypted secrets
+    so it must be protected like the vault keys"""
+    header = dict(format=PLAN_FORMAT, version=__version__, base_url=get_base_url(), created=time.time(), modules=module_imports(managers))
+    with open(filename, "wb") as plan_file:
+        pickle.dump(header, plan_file)
+        pickle.dump(data, plan_file)
+
+
+def read_plan(filename, max_age=DEFAULT_MAX_AGE):
+    """Read a plan file written by write_plan and check that it can still be used. Returns the managers and the data.
+    Plan files are loaded with pickle which can execute arbitrary code, so only read plans from trusted sources"""
+    with open(filename, "rb") as plan_file:
+        try:
+            header = pickle.load(plan_file)
+        except pickle.UnpicklingError:
+            header = None
+        if not isinstance(header, dict) or header.get("format") != PLAN_FORMAT:
+            raise ConfigurationException("%s is not a valid plan file" % filename)
+        if header["version"] != __version__:
+            raise ConfigurationException("Plan was created with dcos-deploy %s but this is %s" % (header["version"], __version__))
+        if header["base_url"] != get_base_url():
+            raise ConfigurationException("Plan was created for cluster %s but the current cluster is %s" % (header["base_url"], get_base_url()))
+        age = time.time() - header["created"]
+        if max_age and age > max_age:
+            raise ConfigurationException("Plan is %d seconds old, the maximum age is %d seconds. Please create a new plan" % (age, max_age))
+        # Additional modules must be importable before the entities can be unpickled
+        managers = init_managers(header["modules"])
+        data = pickle.load(plan_file)
+    return managers, data
+
@@ -0,0 +1,151 @@
+"""
+Records the requests of a run and their responses into a cassette file and replays them later without a cluster.
+Requests are matched by method, url, params and a hash of the body. Responses to the same request are replayed in the
+order they were recorded, the last one is repeated if the request is sent more often (e.g. while waiting).
+Streamed responses (the marathon event stream) are not recorded. The values of secrets are replaced with a placeholder
+before they are written to the cassette.
+"""
+import base64
+import collections
+import hashlib
+import json
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+import requests
+from requests.structures import CaseInsensitiveDict
+from .. import auth
+from . import http
+
+
+VERSION = 1
+REDACTED = "<redacted>"
+
+
+class CassetteException(Exception):
+    pass
+
+
+def _request_key(method, url, kwargs):
+    params = kwargs.get("params") or dict()
+    if isinstance(params, dict):
+        params = sorted(params.items())
+    if kwargs.get("json") is not None:
+        body = json.dumps(kwargs["json"], sort_keys=True).encode("utf-8")
+    else:
+        body = kwargs.get("data") or b""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+    return "%s %s %s %s" % (method.upper(), url, json.dumps(params), hashlib.md5(body).hexdigest())
+
+
+class CassetteRecorder:
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.interactions = list()
+        self._lock = threading.Lock()
+
+    def record(self, method, url, kwargs, response, seconds):
+        if kwargs.get("stream"):
+            return
+        content = response.content
+        if _is_secret_value(method, url, response):
+            content = _redact(response)
+        try:
+            text, encoding = content.decode("utf-8"), "utf-8"
+        except UnicodeDecodeError:
+            text, encoding = base64.b64encode(content).decode("ascii"), "base64"
+        interaction = dict(request=_request_key(method, url, kwargs), status=response.status_code, reason=response.reason,
+                           content_type=response.headers.get("Content-Type"), content=text, encoding=encoding, seconds=round(seconds, 4))
+        with self._lock:
+            self.interactions.append(interaction)
+
+    def save(self, filename):
+        with self._lock:
+            data = dict(version=VERSION, base_url=self.base_url, interactions=list(self.interactions))
+        with open(filename, "w") as cassette_file:
+            json.dump(data, cassette_file, indent=1)
+
+
+def _is_secret_value(method, url, response):
+    path = urlsplit(url).path
+    return method.lower() == "get" and response.ok and "/secrets/v1/secret/" in path and not path.endswith("/")
+
+
+def _redact(response):
+    if (response.headers.get("Content-Type") or "").startswith("application/json"):
+        data = response.json()
+        if isinstance(data, dict) and "value" in data:
+            data["value"] = REDACTED
+        return json.dumps(data).encode("utf-8")
+    return REDACTED.encode("utf-8")
+
+
+class CassetteReplay:
+    def __init__(self, filename, latency_scale=1.0):
+        with open(filename) as cassette_file:
+            data = json.load(cassette_file)
+        if data.get("version") != VERSION:
+            raise CassetteException("Cassette %s has unsupported version %s" % (filename, data.get("version")))
+        self.base_url = data["base_url"]
+        self.latency_scale = latency_scale
+        self._interactions = collections.defaultdict(collections.deque)
+        for interaction in data["interactions"]:
+            self._interactions[interaction["request"]].append(interaction)
+        self._lock = threading.Lock()
+
+    def respond(self, method, url, kwargs):
+        key = _request_key(method, url, kwargs)
+        with self._lock:
+            interactions = self._interactions.get(key)
+            if not interactions:
+                raise CassetteException("Request was not recorded: %s" % key)
+            interaction = interactions.popleft() if len(interactions) > 1 else interactions[0]
+        if self.latency_scale:
+            time.sleep(interaction["seconds"] * self.latency_scale)
+        return _response(url, interaction)
+
+
+def _response(url, interaction):
+    response = requests.Response()
+    response.url = url
+    response.status_code = interaction["status"]
+    response.reason = interaction["reason"]
+    response.headers = CaseInsensitiveDict()
+    if interaction["content_type"]:
+        response.headers["Content-Type"] = interaction["content_type"]
+    if interaction["encoding"] == "base64":
+        response._content = base64.b64decode(interaction["content"])
+    else:
+        response._content = interaction["content"].encode("utf-8")
+    response.headers["Content-Length"] = str(len(response._content))
+    return response
+
+
+@contextmanager
+def cassette(record=None, replay=None, latency_scale=1.0):
+    """Records all requests sent in the scope into the cassette file record or answers them from the cassette file
+    replay, waiting latency_scale times the recorded duration. While replaying the recorded cluster url is used and no
+    credentials are needed"""
+    if record and replay:
+        raise CassetteException("A cassette can not be recorded and replayed at the same time")
+    if replay:
+        player = CassetteReplay(replay, latency_scale)
+        auth.configure(player.base_url, auth.StaticTokenAuth("replay"))
+        http.set_replay(player)
+        try:
+            yield player
+        finally:
+            http.set_replay(None)
+            auth.reset()
+    elif record:
+        recorder = CassetteRecorder(auth.get_base_url())
+        http.set_recorder(recorder)
+        try:
+            yield recorder
+        finally:
+            http.set_recorder(None)
+            recorder.save(record)
+    else:
+        yield None
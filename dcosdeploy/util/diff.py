@@ -1,6 +1,9 @@
 import base64
 import difflib
+import hashlib
 import json
+import re
+import time
 from copy import deepcopy
 from colorama import Fore, init
 from . import global_config
@@ -53,38 +56,215 @@ def _base64_decoded_copy(dictionary):
     return cp
 
 
+class DictDiff:
+    """Changes between two json documents as a list of (operation, JSON pointer, old value, new value) with the
+    operations add, remove and replace. Evaluates to False if the documents are equal. The unified text diff is only
+    rendered when the diff is converted to a string"""
+    def __init__(self, left, right, changes):
+        self.left = left
+        self.right = right
+        self.changes = changes
+        self._text = None
+
+    def __bool__(self):
+        return bool(self.changes)
+
+    def __str__(self):
+        return self.text() or ""
+
+    def text(self):
+        """The unified diff of the indented json documents as returned by compare_dicts, None if they are equal"""
+        if self._text is None and self.changes:
+            left = json.dumps(_base64_decoded_copy(self.left), indent=2, sort_keys=True)
+            right = json.dumps(_base64_decoded_copy(self.right), indent=2, sort_keys=True)
+            self._text = compare_text(left, right)
+        return self._text
+
+
+def diff_dicts(left, right):
+    """Structural diff of two json documents. Values of base64 keys are compared decoded. Like the json representation
+    the comparison is strict about types, 1, 1.0 and True are all different"""
+    changes = list()
+    _collect_changes(left, right, "", changes)
+    return DictDiff(left, right, changes)
+
+
+_SCALAR_TYPES = {str, int, float, bool}
+
+
+def _collect_changes(left, right, pointer, changes):
+    if left is right:
+        return
+    if isinstance(left, dict) and isinstance(right, dict):
+        for key, value in left.items():
+            if key not in right:
+                changes.append(("remove", pointer + "/" + _escape_pointer(key), value, None))
+                continue
+            other = right[key]
+            if type(value) is type(other) and type(value) in _SCALAR_TYPES and value == other:
+                continue  # Shortcut for the most common case of equal leaves
+            key_pointer = pointer + "/" + _escape_pointer(key)
+            if isinstance(value, str) and isinstance(other, str) and _is_base64_key(str(key)):
+                if _base64_decoded(value) != _base64_decoded(other):
+                    changes.append(("replace", key_pointer, value, other))
+            else:
+                _collect_changes(value, other, key_pointer, changes)
+        for key, value in right.items():
+            if key not in left:
+                changes.append(("add", pointer + "/" + _escape_pointer(key), None, value))
+    elif isinstance(left, (list, tuple)) and isinstance(right, (list, tuple)):
+        for index in range(min(len(left), len(right))):
+            _collect_changes(left[index], right[index], "%s/%d" % (pointer, index), changes)
+        for index in range(len(right), len(left)):
+            changes.append(("remove", "%s/%d" % (pointer, index), left[index], None))
+        for index in range(len(left), len(right)):
+            changes.append(("add", "%s/%d" % (pointer, index), None, right[index]))
+    elif type(left) is not type(right) or left != right:
+        changes.append(("replace", pointer, left, right))
+
+
+def _escape_pointer(key):
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def _base64_decoded(value):
+    try:
+        return base64.b64decode(value.encode('utf-8'), validate=True)
+    except Exception:
+        return value
+
+
 def compare_dicts(left, right):
-    left = _base64_decoded_copy(left)
-    right = _base64_decoded_copy(right)
-    left_str = json.dumps(left, indent=2, sort_keys=True)
-    right_str = json.dumps(right, indent=2, sort_keys=True)
-    return compare_text(left_str, right_str)
+    """Unified diff of the indented json documents, None if they are equal"""
+    return diff_dicts(left, right).text()
 
 
-def compare_text(left, right):
-    is_binary = False
-    if not isinstance(left, str):
-        try:
-            left = left.decode("utf-8")
-        except UnicodeDecodeError:
-            is_binary = True
-    if not is_binary and not isinstance(right, str):
-        try:
-            right = right.decode("utf-8")
-        except UnicodeDecodeError:
-            is_binary = True
-    if is_binary:
-        if left != right:
-            return "    <no diff for binary content>"
+class TextDiff:
+    """Difference of two texts or binary contents. Evaluates to False if they are equal line by line (literal \\n in the
+    texts count as line breaks). The unified diff is only computed when the diff is converted to a string, see
+    _bounded_diff_lines for the limits that apply to it"""
+    def __init__(self, left, right):
+        left, right, self.binary = _decoded_texts(left, right)
+        self._lines = None
+        if self.binary or left == right:
+            self.changed = left != right
         else:
+            left_lines = left.replace(r'\n', '\n').splitlines()
+            right_lines = right.replace(r'\n', '\n').splitlines()
+            self.changed = left_lines != right_lines
+            self._lines = (left_lines, right_lines)
+        self._text = None
+
+    def __bool__(self):
+        return self.changed
+
+    def __str__(self):
+        return self.text() or ""
+
+    def text(self):
+        """The unified diff as returned by compare_text, None if the texts are equal"""
+        if not self.changed:
             return None
-    left = left.replace(r'\n', '\n')
-    right = right.replace(r'\n', '\n')
-    diff = list(difflib.unified_diff(left.splitlines(), right.splitlines(), lineterm=''))
-    if diff:
-        return "    " + '\n    '.join([_color_diff_line(line) for line in diff])
-    else:
-        return None
+        if self.binary:
+            return "    <no diff for binary content>"
+        if self._text is None:
+            left_lines, right_lines = self._lines
+            diff = _bounded_diff_lines(left_lines, right_lines, global_config.diff_max_bytes, global_config.diff_max_seconds)
+            self._text = "    " + '\n    '.join([_color_diff_line(_printable(line)) for line in diff])
+        return self._text
+
+
+BINARY_CHECK_BYTES = 8000
+DIFF_CONTEXT_LINES = 3
+DIFF_CHUNK_LINES = 2000
+
+
+def _decoded_texts(left, right):
+    """left and right as str and False, or unchanged and True if one of them is binary content. Like git content is
+    binary if its beginning contains a NUL byte. Invalid utf-8 in text is kept as surrogates, see _printable"""
+    if _is_binary(left) or _is_binary(right):
+        return left, right, True
+    left_text = left if isinstance(left, str) else left.decode("utf-8", "surrogateescape")
+    right_text = right if isinstance(right, str) else right.decode("utf-8", "surrogateescape")
+    return left_text, right_text, False
+
+
+def _is_binary(content):
+    return isinstance(content, bytes) and b"\0" in content[:BINARY_CHECK_BYTES]
+
+
+def _printable(line):
+    try:
+        line.encode("utf-8")
+        return line
+    except UnicodeEncodeError:
+        return line.encode("utf-8", "surrogateescape").decode("utf-8", "replace")
+
+
+def _bounded_diff_lines(left_lines, right_lines, max_bytes, max_seconds):
+    """Unified diff lines like difflib.unified_diff(lineterm=''). Lines that are equal at the beginning and the end
+    are skipped before diffing. If the differing part is larger than max_bytes only a summary is returned. The rest
+    is diffed in chunks of DIFF_CHUNK_LINES lines, if that takes longer than max_seconds the remaining chunks are
+    summarized"""
+    prefix = 0
+    max_prefix = min(len(left_lines), len(right_lines))
+    while prefix < max_prefix and left_lines[prefix] == right_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    max_suffix = max_prefix - prefix
+    while suffix < max_suffix and left_lines[-suffix-1] == right_lines[-suffix-1]:
+        suffix += 1
+    start = max(prefix - DIFF_CONTEXT_LINES, 0)
+    left_middle = left_lines[start:len(left_lines) - max(suffix - DIFF_CONTEXT_LINES, 0)]
+    right_middle = right_lines[start:len(right_lines) - max(suffix - DIFF_CONTEXT_LINES, 0)]
+    result = ["--- ", "+++ "]
+    size = sum(len(line) for line in left_middle) + sum(len(line) for line in right_middle)
+    if max_bytes is not None and size > max_bytes:
+        result.append(_summary(left_lines, right_lines, prefix, suffix, "changed part is larger than %d bytes" % max_bytes))
+        return result
+    deadline = time.monotonic() + max_seconds if max_seconds is not None else None
+    for offset in range(0, max(len(left_middle), len(right_middle)), DIFF_CHUNK_LINES):
+        if deadline is not None and time.monotonic() > deadline:
+            result.append(_summary(left_lines, right_lines, start + offset, suffix, "diff took longer than %s seconds" % max_seconds))
+            break
+        chunk = difflib.unified_diff(left_middle[offset:offset+DIFF_CHUNK_LINES], right_middle[offset:offset+DIFF_CHUNK_LINES], lineterm='')
+        for line in list(chunk)[2:]:
+            result.append(_shift_hunk_header(line, start + offset) if line.startswith("@@") else line)
+    return result
+
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(,\d+)? \+(\d+)(,\d+)? @@")
+
+
+def _shift_hunk_header(line, offset):
+    match = _HUNK_HEADER.match(line)
+    return "@@ -%d%s +%d%s @@" % (int(match.group(1)) + offset, match.group(2) or "", int(match.group(3)) + offset, match.group(4) or "")
+
+
+def _summary(left_lines, right_lines, start, suffix, reason):
+    left_part = left_lines[start:len(left_lines) - suffix]
+    right_part = right_lines[start:len(right_lines) - suffix]
+    return "<%s: lines %d-%d (%d lines, sha1 %s) would be replaced by lines %d-%d (%d lines, sha1 %s)>" % (
+        reason, start + 1, start + len(left_part), len(left_part), _lines_hash(left_part),
+        start + 1, start + len(right_part), len(right_part), _lines_hash(right_part))
+
+
+def _lines_hash(lines):
+    digest = hashlib.sha1()
+    for line in lines:
+        digest.update(line.encode("utf-8", "surrogateescape"))
+        digest.update(b"\n")
+    return digest.hexdigest()[:12]
+
+
+def diff_text(left, right):
+    """Line diff of two texts that is only rendered when it is printed, see TextDiff"""
+    return TextDiff(left, right)
+
+
+def compare_text(left, right):
+    """Unified diff of the texts, None if they are equal"""
+    return TextDiff(left, right).text()
 
 
 def update_dict_with_defaults(dct, default_dct):
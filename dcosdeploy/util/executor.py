@@ -0,0 +1,208 @@
+import collections
+import heapq
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from ..base import ConfigurationException
+
+
+class _Schedule:
+    """Bookkeeping of which nodes are ready to start. Ready nodes are ordered by descending priority, then by their position in the list of nodes"""
+    def __init__(self, nodes, dependencies, priority):
+        self._index = dict((node, idx) for idx, node in enumerate(nodes))
+        self._priority = priority or (lambda node: 0)
+        self._waiting_for = dict()
+        self._dependents = dict((node, list()) for node in nodes)
+        for node in nodes:
+            node_dependencies = set(dep for dep in dependencies(node) if dep in self._index)
+            self._waiting_for[node] = len(node_dependencies)
+            for dependency in node_dependencies:
+                self._dependents[dependency].append(node)
+        self._ready = [self._key(node) for node in nodes if self._waiting_for[node] == 0]
+        heapq.heapify(self._ready)
+
+    def _key(self, node):
+        return -self._priority(node), self._index[node], node
+
+    def has_ready(self):
+        return bool(self._ready)
+
+    def pop(self, admit=None):
+        """Removes and returns the ready node with the highest priority that admit accepts or None if there is none"""
+        skipped = list()
+        node = None
+        while self._ready:
+            key = heapq.heappop(self._ready)
+            if admit is None or admit(key[2]):
+                node = key[2]
+                break
+            skipped.append(key)
+        for key in skipped:
+            heapq.heappush(self._ready, key)
+        return node
+
+    def finished(self, node):
+        for dependent in self._dependents[node]:
+            self._waiting_for[dependent] -= 1
+            if self._waiting_for[dependent] == 0:
+                heapq.heappush(self._ready, self._key(dependent))
+
+
+class ConcurrencyLimits:
+    """Limits how many nodes of a group (e.g. an entity type) and how many nodes in total may run at the same time.
+    Every limit is a semaphore that is acquired without blocking when a node is started and released when it finishes"""
+    TOTAL = "total"
+
+    def __init__(self, limits=None, total=None):
+        self.limits = dict(limits or dict())
+        self._semaphores = dict((group, threading.BoundedSemaphore(limit)) for group, limit in self.limits.items())
+        self._total = threading.BoundedSemaphore(total) if total else None
+        self.total = total
+
+    @classmethod
+    def from_config(cls, config, groups):
+        """Parse the concurrency section of the global config: a limit per group and the overall limit as total"""
+        if not config:
+            return cls()
+        if not isinstance(config, dict):
+            raise ConfigurationException("global.concurrency must be a mapping of entity types to numbers")
+        limits = dict()
+        for group, limit in config.items():
+            if group != cls.TOTAL and group not in groups:
+                raise ConfigurationException("Unknown entity type '%s' in global.concurrency" % group)
+            if not isinstance(limit, int) or isinstance(limit, bool) or limit < 1:
+                raise ConfigurationException("Concurrency limit for '%s' must be a positive number" % group)
+            limits[group] = limit
+        total = limits.pop(cls.TOTAL, None)
+        return cls(limits, total)
+
+    def try_acquire(self, group):
+        if self._total and not self._total.acquire(blocking=False):
+            return False
+        semaphore = self._semaphores.get(group)
+        if semaphore and not semaphore.acquire(blocking=False):
+            if self._total:
+                self._total.release()
+            return False
+        return True
+
+    def release(self, group):
+        semaphore = self._semaphores.get(group)
+        if semaphore:
+            semaphore.release()
+        if self._total:
+            self._total.release()
+
+    def simulation(self):
+        """Limits with the same values that count running nodes in plain counters, for simulated runs that must not
+        share the semaphores of a real run"""
+        return _SimulatedLimits(self.limits, self.total)
+
+
+class _SimulatedLimits:
+    def __init__(self, limits, total):
+        self.limits = limits
+        self.total = total
+        self._running = collections.Counter()  # group -> running nodes
+        self._running_total = 0
+
+    def try_acquire(self, group):
+        if self.total and self._running_total >= self.total:
+            return False
+        if group in self.limits and self._running[group] >= self.limits[group]:
+            return False
+        self._running[group] += 1
+        self._running_total += 1
+        return True
+
+    def release(self, group):
+        self._running[group] -= 1
+        self._running_total -= 1
+
+
+class DependencyExecutor:
+    """Runs a function for a set of nodes so that a node is only started after all its dependencies have finished.
+    With more than one worker independent nodes are run concurrently on a thread pool."""
+    def __init__(self, workers=1, limits=None, group=None):
+        """limits: optional ConcurrencyLimits, group: function returning the limit group of a node"""
+        self.workers = max(1, int(workers))
+        self.limits = limits
+        self.group = group or (lambda node: None)
+        if limits and limits.total:
+            self.workers = min(self.workers, limits.total)
+
+    def run(self, nodes, dependencies, func, priority=None):
+        """nodes: list of node names in preferred start order, dependencies: function returning the nodes a node depends on,
+        func: called with the node name, its return value is collected, priority: optional function, ready nodes with a higher
+        priority are started first. Returns a dict node -> result"""
+        schedule = _Schedule(nodes, dependencies, priority)
+        admit = self._admission(self.limits)
+        results = dict()
+
+        def _finished(node, result):
+            results[node] = result
+            schedule.finished(node)
+
+        if self.workers == 1:
+            while schedule.has_ready():
+                node = schedule.pop()
+                _finished(node, func(node))
+        else:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                running = dict()
+                error = None
+                while schedule.has_ready() or running:
+                    while schedule.has_ready() and not error and len(running) < self.workers:
+                        node = schedule.pop(admit)
+                        if node is None:
+                            break  # All ready nodes are blocked by concurrency limits
+                        running[pool.submit(func, node)] = node
+                    if not running:
+                        break
+                    done, _ = wait(running.keys(), return_when=FIRST_COMPLETED)
+                    for future in done:
+                        node = running.pop(future)
+                        if self.limits:
+                            self.limits.release(self.group(node))
+                        if future.exception():
+                            error = error or future.exception()
+                        else:
+                            _finished(node, future.result())
+                if error:
+                    raise error
+        _check_finished(nodes, results)
+        return results
+
+    def estimate(self, nodes, dependencies, duration, priority=None):
+        """Simulates a run where each node takes duration(node) seconds and returns the total duration in seconds"""
+        schedule = _Schedule(nodes, dependencies, priority)
+        limits = self.limits.simulation() if self.limits else None
+        admit = self._admission(limits)
+        running = list()  # heap of (end time, start order, node)
+        counter = itertools.count()
+        now = 0
+        finished = dict()
+        while schedule.has_ready() or running:
+            while schedule.has_ready() and len(running) < self.workers:
+                node = schedule.pop(admit)
+                if node is None:
+                    break
+                heapq.heappush(running, (now + duration(node), next(counter), node))
+            now, _, node = heapq.heappop(running)
+            if limits:
+                limits.release(self.group(node))
+            finished[node] = True
+            schedule.finished(node)
+        _check_finished(nodes, finished)
+        return now
+
+    def _admission(self, limits):
+        if not limits:
+            return None
+        return lambda node: limits.try_acquire(self.group(node))
+
+
+def _check_finished(nodes, results):
+    if len(results) < len(nodes):
+        unfinished = [node for node in nodes if node not in results]
+        raise ConfigurationException("Dependency cycle detected between: %s" % ", ".join(unfinished))
@@ -3,4 +3,9 @@
 
 silent = False
 debug = False
-color_diffs = True
\ No newline at end of file
+color_diffs = True
+marathon_events = False
+marathon_batch_size = 1
+http_cache = False
+diff_max_bytes = 1024 * 1024
+diff_max_seconds = 5.0
@@ -0,0 +1,55 @@
+import json
+import os
+import threading
+
+
+# Weight of the newest measurement, older measurements decay exponentially
+_SMOOTHING = 0.5
+
+
+class DurationHistory:
+    """Wall-clock durations of past entity deployments, stored as a json file (entity name -> seconds).
+    Without a filename nothing is read or written"""
+    def __init__(self, filename=None):
+        self.filename = filename
+        self._durations = dict()
+        self._lock = threading.Lock()
+        if filename and os.path.exists(filename):
+            try:
+                with open(filename) as history_file:
+                    self._durations = json.load(history_file)
+            except ValueError:
+                self._durations = dict()  # A broken history only costs scheduling quality
+
+    def get(self, name, default=None):
+        return self._durations.get(name, default)
+
+    def has_data(self):
+        return bool(self._durations)
+
+    def average(self):
+        if not self._durations:
+            return None
+        return sum(self._durations.values()) / len(self._durations)
+
+    def record(self, name, seconds):
+        with self._lock:
+            previous = self._durations.get(name)
+            if previous is None:
+                self._durations[name] = seconds
+            else:
+                self._durations[name] = _SMOOTHING * seconds + (1 - _SMOOTHING) * previous
+
+    def save(self):
+        if not self.filename:
+            return
+        with self._lock:
+            with open(self.filename, "w") as history_file:
+                json.dump(self._durations, history_file, indent=2, sort_keys=True)
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    if minutes:
+        return "%dm %ds" % (minutes, seconds)
+    return "%ds" % seconds
@@ -1,11 +1,19 @@
 """
 The functions in this module work as thin wrappers around their corresponding requests functions. They handle DC/OS adminrouter authentication and ssl verification.
 If the URL provided does not start with 'http:' or 'https:' it will be prefixed with the base url of the DC/OS cluster.
+Inside a response_cache() scope GET responses are reused for identical requests, any other request invalidates the cached
+responses of the same resource (the URL, its parents and its children).
+While a replay is set requests are answered by it instead of being sent, see util/cassette.py.
 """
 
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
 import requests
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
 from ..auth import get_base_url, get_auth
+from . import trace
 
 requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
 
@@ -14,24 +22,170 @@ requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
 _session = requests.Session()
 
 
+_cache = None
+_scope = threading.local()
+_stats = None
+_recorder = None
+_replay = None
+
+
+class ResponseCache:
+    """GET responses by method, url, params and headers. Server errors and streamed responses are not cached"""
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._responses = dict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            response = self._responses.get(key)
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return response
+
+    def put(self, key, response):
+        if response.status_code < 500:
+            with self._lock:
+                self._responses[key] = response
+
+    def invalidate(self, url):
+        path = _resource(url)
+        with self._lock:
+            for key in list(self._responses.keys()):
+                cached_path = _resource(key[1])
+                if _is_parent(path, cached_path) or _is_parent(cached_path, path):
+                    del self._responses[key]
+
+
+@contextmanager
+def response_cache(enabled=True):
+    """Caches GET responses until the end of the scope and yields the cache (None if not enabled).
+    Only use it where the remote state is not expected to change by itself, e.g. during a dry-run, not for waits"""
+    global _cache
+    if not enabled:
+        yield None
+        return
+    previous = _cache
+    _cache = ResponseCache()
+    try:
+        yield _cache
+    finally:
+        _cache = previous
+
+
+@contextmanager
+def request_timeout(seconds):
+    """Applies a timeout of seconds to all requests sent by the current thread in the scope that do not set one"""
+    previous = getattr(_scope, "timeout", None)
+    _scope.timeout = seconds
+    try:
+        yield
+    finally:
+        _scope.timeout = previous
+
+
+def set_stats(stats):
+    """Records every request sent with stats.record(method, url, status code, seconds, response bytes), None to stop"""
+    global _stats
+    _stats = stats
+
+
+def set_recorder(recorder):
+    """Passes every request sent and its response to recorder.record(method, url, kwargs, response, seconds), None to stop"""
+    global _recorder
+    _recorder = recorder
+
+
+def set_replay(replay):
+    """Answers every request with replay.respond(method, url, kwargs) instead of sending it, None to send requests again"""
+    global _replay
+    _replay = replay
+
+
 def get(url, **kwargs):
-    return _session.get(_format_url(url), auth=get_auth(), verify=False, **kwargs)
+    return _request("get", url, **kwargs)
 
 
 def post(url, **kwargs):
-    return _session.post(_format_url(url), auth=get_auth(), verify=False, **kwargs)
+    return _request("post", url, **kwargs)
 
 
 def put(url, **kwargs):
-    return _session.put(_format_url(url), auth=get_auth(), verify=False, **kwargs)
+    return _request("put", url, **kwargs)
 
 
 def patch(url, **kwargs):
-    return _session.patch(_format_url(url), auth=get_auth(), verify=False, **kwargs)
+    return _request("patch", url, **kwargs)
 
 
 def delete(url, **kwargs):
-    return _session.delete(_format_url(url), auth=get_auth(), verify=False, **kwargs)
+    return _request("delete", url, **kwargs)
+
+
+def _request(method, url, **kwargs):
+    url = _format_url(url)
+    cache = _cache
+    if cache is None:
+        return _send(method, url, kwargs)
+    if method != "get":
+        response = _send(method, url, kwargs)
+        cache.invalidate(url)
+        return response
+    key = _cache_key(method, url, kwargs)
+    response = cache.get(key) if key else None
+    if response is None:
+        response = _send(method, url, kwargs)
+        if key:
+            cache.put(key, response)
+    return response
+
+
+def _send(method, url, kwargs):
+    timeout = getattr(_scope, "timeout", None)
+    if timeout is not None and not kwargs.get("stream"):
+        kwargs.setdefault("timeout", timeout)
+    stats = _stats
+    recorder = _recorder
+    replay = _replay
+    start = time.monotonic()
+    with trace.request_span(method, url) as span:
+        if replay is not None:
+            response = replay.respond(method, url, kwargs)
+        else:
+            response = _session.request(method, url, auth=get_auth(), verify=False, **kwargs)
+        span.set("status", response.status_code)
+    seconds = time.monotonic() - start
+    if recorder is not None:
+        recorder.record(method, url, kwargs, response, seconds)
+    if stats is None:
+        return response
+    if kwargs.get("stream"):
+        size = int(response.headers.get("Content-Length", 0))  # Reading the content would consume the stream
+    else:
+        size = len(response.content)
+    stats.record(method, url, response.status_code, seconds, size)
+    return response
+
+
+def _cache_key(method, url, kwargs):
+    if kwargs.get("stream"):
+        return None
+    params = kwargs.get("params") or dict()
+    if isinstance(params, dict):
+        params = sorted(params.items())
+    headers = sorted((kwargs.get("headers") or dict()).items())
+    return method, url, repr(params), repr(headers)
+
+
+def _resource(url):
+    return urlsplit(url).path.rstrip("/")
+
+
+def _is_parent(parent, path):
+    return path == parent or path.startswith(parent + "/")
 
 
 def _format_url(url):
@@ -1,10 +1,22 @@
 import sys
+import threading
 from . import global_config
 
 
+_capture = threading.local()
+
+
+def _print(text):
+    buffer = getattr(_capture, "buffer", None)
+    if buffer is not None:
+        buffer.append(text)
+    else:
+        print(text, flush=True)
+
+
 def echo(text):
     if not global_config.silent:
-        print(text, flush=True)
+        _print(text)
 
 
 def echo_error(text):
@@ -14,13 +26,47 @@ def echo_error(text):
 
 def echo_debug(text):
     if not global_config.silent and global_config.debug:
-        print(text, flush=True)
+        _print(text)
 
 
 def echo_diff(text, diff):
     if not global_config.silent:
         if global_config.debug:
-            print(text + ":")
-            print(diff, flush=True)
+            _print(text + ":\n" + str(diff))
         else:
-            print(text, flush=True)
\ No newline at end of file
+            _print(text)
+
+
+class OrderedOutput:
+    """Collects the output of tasks running in different threads and prints it in the order of the given keys.
+    The output of a task is printed as soon as the tasks for all keys before it have finished"""
+    def __init__(self, keys):
+        self._keys = list(keys)
+        self._buffers = dict()
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def run(self, key, func, *args, **kwargs):
+        _capture.buffer = list()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            buffer = _capture.buffer
+            _capture.buffer = None
+            self._finished(key, buffer)
+
+    def _finished(self, key, buffer):
+        with self._lock:
+            self._buffers[key] = buffer
+            while self._next < len(self._keys) and self._keys[self._next] in self._buffers:
+                for text in self._buffers.pop(self._keys[self._next]):
+                    print(text, flush=True)
+                self._next += 1
+
+    def flush(self):
+        """Print the output of all finished tasks, even if tasks before them did not finish (e.g. because of an error)"""
+        with self._lock:
+            for key in self._keys[self._next:]:
+                for text in self._buffers.pop(key, list()):
+                    print(text, flush=True)
+            self._next = len(self._keys)
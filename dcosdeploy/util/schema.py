@@ -0,0 +1,127 @@
+"""
+Declarative normalization of json definitions (marathon apps, metronome jobs, edgelb pools) before they are compared
+with the definitions on the cluster. A Schema describes the defaults and coercions for one object and its children and
+is compiled once when it is created, so normalizing a definition does not walk the default trees again.
+"""
+
+
+ALL = "*"
+
+
+class Schema:
+    """Normalization rules for a local json object and the corresponding remote one. All arguments are optional:
+
+    drop: keys that are removed from both objects
+    inherit: keys that are copied from the remote object if the local object does not have them
+    defaults: tree of default values for missing keys of the local object (of both objects if both is True)
+    remote_defaults: default values for keys that are missing in the local object but present in the remote object
+    unset_if_zero: keys that are removed from both objects if the local value is 0 or missing (assigned by the server)
+    floats: keys (or ALL) whose local value is cast to float if the remote value is a float
+    fields: schemas for the dict values of keys
+    items: schemas for the dicts in the list values of keys, they are paired with the remote item at the same index
+    """
+    def __init__(self, drop=(), inherit=(), defaults=None, both=False, remote_defaults=None, unset_if_zero=(), floats=(),
+                 fields=None, items=None):
+        self.drop = tuple(drop)
+        self.inherit = tuple(inherit)
+        self.fields = list((fields or dict()).items())
+        self.items = list((items or dict()).items())
+        # Like with update_dict_with_defaults default values are shared between definitions, only the values that
+        # are normalized further are copied as their schemas modify them
+        modified = set(key for key, _ in self.fields + self.items)
+        self.defaults = _compile_defaults(defaults or dict(), modified)
+        self.both = both
+        self.remote_defaults = [(key, value, _factory(value) if key in modified else None)
+                                for key, value in (remote_defaults or dict()).items()]
+        self.unset_if_zero = tuple(unset_if_zero)
+        self.floats = floats if floats == ALL else tuple(floats)
+
+    def normalize(self, local, remote):
+        """Normalizes both objects in place and returns them. Rules that are not used are skipped"""
+        if self.drop:
+            for key in self.drop:
+                local.pop(key, None)
+                remote.pop(key, None)
+        if self.inherit:
+            for key in self.inherit:
+                if key in remote and key not in local:
+                    local[key] = remote[key]
+        if self.defaults:
+            _fill_defaults(local, self.defaults)
+            if self.both:
+                _fill_defaults(remote, self.defaults)
+        if self.remote_defaults:
+            for key, value, factory in self.remote_defaults:
+                if key in remote and key not in local:
+                    local[key] = factory() if factory else value
+        if self.unset_if_zero:
+            for key in self.unset_if_zero:
+                if local.get(key, 0) == 0:
+                    local.pop(key, None)
+                    remote.pop(key, None)
+        if self.fields:
+            for key, schema in self.fields:
+                value = local.get(key)
+                if isinstance(value, dict):
+                    remote_value = remote.get(key)
+                    schema.normalize(value, remote_value if isinstance(remote_value, dict) else dict())
+        if self.items:
+            for key, schema in self.items:
+                local_items = local.get(key)
+                if not local_items or not isinstance(local_items, list):
+                    continue
+                remote_items = remote.get(key)
+                if not isinstance(remote_items, list):
+                    remote_items = list()
+                for index, item in enumerate(local_items):
+                    if isinstance(item, dict):
+                        remote_item = remote_items[index] if index < len(remote_items) else None
+                        schema.normalize(item, remote_item if isinstance(remote_item, dict) else dict())
+        if self.floats:
+            for key in (list(local.keys()) if self.floats == ALL else self.floats):
+                if key in local and not isinstance(local[key], float) and isinstance(remote.get(key), float):
+                    local[key] = float(local[key])
+        return local, remote
+
+
+def _compile_defaults(defaults, copied=()):
+    """Keys of the defaults, (key, value, copy factory) for each default and (key, compiled defaults) for dict values"""
+    if not defaults:
+        return None
+    entries = [(key, value, _factory(value) if key in copied else None) for key, value in defaults.items()]
+    nested = [(key, _compile_defaults(value)) for key, value in defaults.items() if isinstance(value, dict) and value]
+    return frozenset(defaults.keys()), entries, nested
+
+
+def _fill_defaults(dct, compiled):
+    keys, entries, nested = compiled
+    if not keys <= dct.keys():
+        for key, value, factory in entries:
+            if key not in dct:
+                dct[key] = factory() if factory else value
+    for key, children in nested:
+        value = dct[key]
+        if isinstance(value, dict):
+            _fill_defaults(value, children)
+
+
+def _factory(value):
+    """Function that returns a new copy of the json value, None for immutable values"""
+    if isinstance(value, dict):
+        nested = [(key, _factory(item)) for key, item in value.items() if isinstance(item, (dict, list))]
+        if not nested:
+            return value.copy
+        return lambda: _copy_dict(value, nested)
+    if isinstance(value, list):
+        factories = [_factory(item) for item in value]
+        if not any(factories):
+            return value.copy
+        return lambda: [factory() if factory else item for item, factory in zip(value, factories)]
+    return None
+
+
+def _copy_dict(value, nested):
+    copy = value.copy()
+    for key, factory in nested:
+        copy[key] = factory()
+    return copy
@@ -0,0 +1,119 @@
+import json
+import math
+import re
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from . import http
+from .output import echo
+
+
+# (pattern, template) applied in order to the path of a request, the first match wins
+_ENDPOINT_TEMPLATES = [
+    (r"^/service/marathon/v2/apps/.+/restart$", "/service/marathon/v2/apps/{id}/restart"),
+    (r"^/service/marathon/v2/apps/.+$", "/service/marathon/v2/apps/{id}"),
+    (r"^/service/marathon/v2/deployments/[^/]+$", "/service/marathon/v2/deployments/{id}"),
+    (r"^/service/metronome/v1/jobs/[^/]+/(runs|schedules)/[^/]+$", r"/service/metronome/v1/jobs/{id}/\1/{id}"),
+    (r"^/service/metronome/v1/jobs/[^/]+(/runs|/schedules)?$", r"/service/metronome/v1/jobs/{id}\1"),
+    (r"^/secrets/v1/secret/default/.+$", "/secrets/v1/secret/default/{path}"),
+    (r"^/acs/api/v1/acls/[^/]+/(users|groups)/[^/]+/[^/]+$", r"/acs/api/v1/acls/{rid}/\1/{id}/{action}"),
+    (r"^/acs/api/v1/groups/[^/]+/users/[^/]+$", "/acs/api/v1/groups/{id}/users/{user}"),
+    (r"^/acs/api/v1/(users|groups)/[^/]+/(groups|permissions)$", r"/acs/api/v1/\1/{id}/\2"),
+    (r"^/acs/api/v1/(users|groups|acls)/[^/]+$", r"/acs/api/v1/\1/{id}"),
+    (r"^/service/[^/]+/v1/plans/[^/]+$", "/service/{service}/v1/plans/{plan}"),
+    (r"^/service/[^/]+/v1/plans$", "/service/{service}/v1/plans"),
+    (r"^/service/[^/]+/v2/pools/[^/]+(/lbtemplate)?$", r"/service/{api_server}/v2/pools/{name}\1"),
+    (r"^/service/[^/]+/(v2/pools|ping)$", r"/service/{api_server}/\1"),
+]
+_ENDPOINT_TEMPLATES = [(re.compile(pattern), template) for pattern, template in _ENDPOINT_TEMPLATES]
+
+
+def endpoint_template(url):
+    """Normalizes the url of a request so that requests for different entities of the same API are grouped together"""
+    path = re.sub("/+", "/", urlsplit(url).path).rstrip("/") or "/"
+    for pattern, template in _ENDPOINT_TEMPLATES:
+        if pattern.match(path):
+            return pattern.sub(template, path)
+    return path
+
+
+class _EndpointStats:
+    def __init__(self):
+        self.durations = list()
+        self.status_codes = dict()
+        self.bytes = 0
+
+    def report(self):
+        durations = sorted(self.durations)
+        return dict(
+            count=len(durations),
+            total=sum(durations),
+            p50=_percentile(durations, 50),
+            p95=_percentile(durations, 95),
+            max=durations[-1],
+            bytes=self.bytes,
+            status_codes=dict((str(code), count) for code, count in sorted(self.status_codes.items())),
+        )
+
+
+class RequestStats:
+    """Count, latency, status codes and response size of all requests, grouped by method and endpoint template"""
+    def __init__(self):
+        self._endpoints = dict()
+        self._lock = threading.Lock()
+
+    def record(self, method, url, status_code, seconds, size):
+        key = (method.upper(), endpoint_template(url))
+        with self._lock:
+            endpoint = self._endpoints.get(key)
+            if endpoint is None:
+                endpoint = self._endpoints[key] = _EndpointStats()
+            endpoint.durations.append(seconds)
+            endpoint.status_codes[status_code] = endpoint.status_codes.get(status_code, 0) + 1
+            endpoint.bytes += size
+
+    def report(self):
+        """List of the statistics per endpoint, the endpoint with the most total time first"""
+        with self._lock:
+            report = [dict(method=method, endpoint=endpoint, **stats.report()) for (method, endpoint), stats in self._endpoints.items()]
+        return sorted(report, key=lambda entry: (-entry["total"], entry["endpoint"], entry["method"]))
+
+    def print_summary(self):
+        report = self.report()
+        if not report:
+            echo("No HTTP requests were sent")
+            return
+        width = max(len(entry["endpoint"]) for entry in report)
+        echo("%-6s %-*s %6s %9s %8s %8s %8s %10s  %s" % ("Method", width, "Endpoint", "Count", "Total(s)", "p50(s)", "p95(s)", "Max(s)", "Bytes", "Status codes"))
+        for entry in report:
+            status_codes = ", ".join("%s: %d" % (code, count) for code, count in entry["status_codes"].items())
+            echo("%-6s %-*s %6d %9.2f %8.3f %8.3f %8.3f %10d  %s" % (entry["method"], width, entry["endpoint"], entry["count"], entry["total"],
+                                                                     entry["p50"], entry["p95"], entry["max"], entry["bytes"], status_codes))
+
+    def write_json(self, filename):
+        with open(filename, "w") as stats_file:
+            json.dump(self.report(), stats_file, indent=2)
+
+
+def _percentile(sorted_values, percentile):
+    """Nearest-rank percentile"""
+    index = max(0, math.ceil(percentile / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+@contextmanager
+def request_stats(print_summary=False, filename=None):
+    """Records statistics of all requests sent in the scope, prints them and/or writes them as json to filename at the end"""
+    if not print_summary and not filename:
+        yield None
+        return
+    stats = RequestStats()
+    http.set_stats(stats)
+    try:
+        yield stats
+    finally:
+        http.set_stats(None)
+        if print_summary:
+            stats.print_summary()
+        if filename:
+            stats.write_json(filename)
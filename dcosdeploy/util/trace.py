@@ -0,0 +1,111 @@
+"""
+Timeline of a run in the trace event json format of chrome that can be loaded into chrome://tracing or https://ui.perfetto.dev.
+Spans are only recorded inside a tracing() scope, otherwise span() returns a shared no-op object.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+
+_tracer = None
+
+
+class _NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def set(self, key, value):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Span:
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type:
+            self.args["error"] = "%s: %s" % (exc_type.__name__, exc_value)
+        self.tracer.add(self.name, self.category, self.start, time.perf_counter(), self.args)
+        return False
+
+    def set(self, key, value):
+        self.args[key] = value
+
+
+class Tracer:
+    """Collects complete events (name, category, start, duration, thread) of all spans"""
+    def __init__(self):
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+        self._events = list()
+        self._threads = dict()  # thread id -> name
+        self._lock = threading.Lock()
+
+    def add(self, name, category, start, end, args):
+        thread = threading.current_thread()
+        event = dict(name=name, cat=category, ph="X", pid=self._pid, tid=thread.ident,
+                     ts=(start - self._origin) * 1e6, dur=(end - start) * 1e6)
+        if args:
+            event["args"] = args
+        with self._lock:
+            self._events.append(event)
+            self._threads.setdefault(thread.ident, thread.name)
+
+    def events(self):
+        with self._lock:
+            metadata = [dict(name="thread_name", ph="M", pid=self._pid, tid=tid, args=dict(name=name)) for tid, name in self._threads.items()]
+            return metadata + sorted(self._events, key=lambda event: event["ts"])
+
+    def write(self, filename):
+        with open(filename, "w") as trace_file:
+            json.dump(dict(traceEvents=self.events(), displayTimeUnit="ms"), trace_file, default=str)
+
+
+def span(name, category, **args):
+    """Context manager that records the time spent in its block, args are shown with the span in the trace viewer"""
+    tracer = _tracer
+    if tracer is None:
+        return _NO_SPAN
+    return _Span(tracer, name, category, args)
+
+
+def request_span(method, url):
+    """Span of an HTTP request named by method and path. The name is only built while tracing, as this is called for
+    every request"""
+    tracer = _tracer
+    if tracer is None:
+        return _NO_SPAN
+    return _Span(tracer, "%s %s" % (method.upper(), urlsplit(url).path), "http", dict(url=url))
+
+
+@contextmanager
+def tracing(filename=None):
+    """Records all spans in the scope and writes them to filename at the end. Does nothing without a filename"""
+    global _tracer
+    if not filename:
+        yield None
+        return
+    tracer = _tracer = Tracer()
+    try:
+        with span("dcos-deploy", "run"):
+            yield tracer
+    finally:
+        _tracer = None
+        tracer.write(filename)
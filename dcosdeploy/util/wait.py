@@ -0,0 +1,163 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from . import http, trace
+
+
+DEFAULT_TIMEOUT = 10*60
+POLL_WORKERS = 8
+POLL_REQUEST_TIMEOUT = 30
+
+_scope = threading.local()
+
+
+class WaitTimeoutException(Exception):
+    """A condition did not become true before the timeout"""
+    pass
+
+
+class Backoff:
+    """Poll intervals that start small and grow by factor up to maximum. Every interval is randomized by +/- jitter
+    so that many waits started at the same time do not poll in lockstep"""
+    def __init__(self, initial=1, factor=1.5, maximum=20, jitter=0.2):
+        self.initial = initial
+        self.factor = factor
+        self.maximum = maximum
+        self.jitter = jitter
+
+    def intervals(self):
+        interval = self.initial
+        while True:
+            yield interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+            interval = min(interval * self.factor, self.maximum)
+
+
+DEFAULT_BACKOFF = Backoff()
+
+
+@contextmanager
+def wait_timeout(seconds):
+    """Sets the default timeout for all waits in the current thread, e.g. from the wait_timeout field of an entity.
+    None keeps the timeout of the surrounding scope"""
+    previous = getattr(_scope, "timeout", None)
+    if seconds is not None:
+        _scope.timeout = seconds
+    try:
+        yield
+    finally:
+        _scope.timeout = previous
+
+
+def current_timeout(default=DEFAULT_TIMEOUT):
+    timeout = getattr(_scope, "timeout", None)
+    return timeout if timeout is not None else default
+
+
+def wait_for(check, message, timeout=None, default_timeout=DEFAULT_TIMEOUT, backoff=None):
+    """Blocks until check() returns a truthy value and returns it. check is called by the shared poller, first after
+    the initial interval of the backoff, and its HTTP requests time out after POLL_REQUEST_TIMEOUT seconds. Raises
+    WaitTimeoutException("<message> after <timeout> seconds") if the timeout is exceeded, even if a check still hangs.
+    Without an explicit timeout the one of the current scope is used, then default_timeout.
+    Exceptions raised by check are passed on to the caller"""
+    if timeout is None:
+        timeout = current_timeout(default_timeout)
+    waiter = _Wait(check, "%s after %d seconds" % (message, timeout), time.monotonic() + timeout, backoff or DEFAULT_BACKOFF)
+    with trace.span("wait", "wait", condition=message, timeout=timeout):
+        _poller.submit(waiter, waiter.next_poll())
+        if not waiter.done.wait(max(waiter.deadline - time.monotonic(), 0)):
+            waiter.cancel()
+    if waiter.error:
+        raise waiter.error
+    return waiter.result
+
+
+class _Wait:
+    def __init__(self, check, message, deadline, backoff):
+        self.check = check
+        self.message = message
+        self.deadline = deadline
+        self._intervals = backoff.intervals()
+        self._lock = threading.Lock()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+    def next_poll(self):
+        return min(time.monotonic() + next(self._intervals), self.deadline)
+
+    def cancel(self):
+        """Called by wait_for when the deadline passed while a check was still running"""
+        self._finish(None, WaitTimeoutException(self.message))
+
+    def poll(self):
+        """Called by a poller worker. Returns the time of the next poll or None if the wait is finished"""
+        if self.done.is_set():
+            return None
+        try:
+            with trace.span("poll", "wait", condition=self.message), http.request_timeout(POLL_REQUEST_TIMEOUT):
+                result = self.check()
+        except Exception as ex:
+            self._finish(None, ex)
+            return None
+        if result:
+            self._finish(result, None)
+        elif time.monotonic() < self.deadline:
+            return None if self.done.is_set() else self.next_poll()
+        else:
+            self._finish(None, WaitTimeoutException(self.message))
+        return None
+
+    def _finish(self, result, error):
+        with self._lock:
+            if self.done.is_set():
+                return
+            self.result = result
+            self.error = error
+            self.done.set()
+
+
+class _Poller:
+    """A single daemon thread that hands outstanding waits to a small pool of workers when they are due, so a check
+    that hangs does not delay the others"""
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._waits = list()  # heap of (due time, sequence, wait)
+        self._sequence = itertools.count()
+        self._thread = None
+        self._workers = None
+
+    def submit(self, waiter, due):
+        with self._condition:
+            heapq.heappush(self._waits, (due, next(self._sequence), waiter))
+            if not self._thread:
+                self._workers = ThreadPoolExecutor(POLL_WORKERS, thread_name_prefix="dcos-deploy-poll")
+                self._thread = threading.Thread(target=self._run, name="dcos-deploy-poller", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._waits:
+                    self._condition.wait()
+                    continue
+                due, _, waiter = self._waits[0]
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+                heapq.heappop(self._waits)
+            if not waiter.done.is_set():
+                self._workers.submit(self._poll, waiter)
+
+    def _poll(self, waiter):
+        next_due = waiter.poll()
+        if next_due is not None:
+            self.submit(waiter, next_due)
+
+
+_poller = _Poller()
@@ -0,0 +1,135 @@
+import json
+import queue
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from unittest import mock
+from dcosdeploy.adapters import marathon_events
+from dcosdeploy.util import global_config
+
+
+global_config.silent = True
+
+
+class FakeMarathon(ThreadingMixIn, HTTPServer):
+    """Serves /v2/deployments from a list and /v2/events as a chunked server-sent event stream fed from a queue"""
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.deployments = list()
+        self.events = queue.Queue()
+        self.deployment_requests = 0
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:%s" % self.server_address[1]
+
+    def send_event(self, event_type, deployment_id):
+        self.deployments = [d for d in self.deployments if d["id"] != deployment_id]
+        self.events.put((event_type, dict(eventType=event_type, plan=dict(id=deployment_id))))
+
+    def drop_stream(self):
+        self.events.put(None)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.startswith("/service/marathon/v2/deployments"):
+            self.server.deployment_requests += 1
+            body = json.dumps(self.server.deployments).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path.startswith("/service/marathon/v2/events"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self._write_chunk(": connected\n\n")
+            while True:
+                event = self.server.events.get()
+                if event is None:
+                    self.wfile.write(b"0\r\n\r\n")
+                    self.close_connection = True
+                    return
+                event_type, data = event
+                self._write_chunk("event: %s\ndata: %s\n\n" % (event_type, json.dumps(data)))
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    def _write_chunk(self, text):
+        data = text.encode("utf-8")
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+
+class MarathonEventsTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeMarathon()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        marathon_events._listeners.clear()
+        global_config.marathon_events = True
+        patches = [mock.patch("dcosdeploy.auth.get_base_url", lambda: "/bla"),
+                   mock.patch("dcosdeploy.adapters.marathon.get_base_url", lambda: self.server.url),
+                   mock.patch("dcosdeploy.util.http.get_auth", lambda: None)]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        global_config.marathon_events = False
+        self.server.drop_stream()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _adapter(self):
+        from dcosdeploy.adapters.marathon import MarathonAdapter
+        return MarathonAdapter()
+
+    def _send_later(self, func, *args):
+        timer = threading.Timer(0.2, func, args)
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+    def test_deployment_success(self):
+        self.server.deployments = [dict(id="d1")]
+        self._send_later(self.server.send_event, marathon_events.DEPLOYMENT_SUCCESS, "d1")
+        start = time.time()
+        self._adapter().wait_for_specific_deployment("d1")
+        self.assertLess(time.time() - start, 0.8)
+        self.assertEqual(self.server.deployment_requests, 1)
+
+    def test_deployment_failed(self):
+        self.server.deployments = [dict(id="d2")]
+        self._send_later(self.server.send_event, marathon_events.DEPLOYMENT_FAILED, "d2")
+        with self.assertRaises(Exception) as context:
+            self._adapter().wait_for_specific_deployment("d2")
+        self.assertIn("failed", str(context.exception))
+
+    def test_fallback_to_polling(self):
+        self.server.deployments = [dict(id="d3")]
+
+        def _drop():
+            self.server.drop_stream()
+            self.server.deployments = list()
+
+        self._send_later(_drop)
+        self._adapter().wait_for_specific_deployment("d3")
+        self.assertGreater(self.server.deployment_requests, 1)
+
+    def test_parse_events(self):
+        chunks = [b": keepalive\n\nevent: deployment_success\nda", b"ta: {\"a\": 1}\r\n\r\n", b"data: line1\ndata: line2\n\n"]
+        self.assertEqual(list(marathon_events._parse_events(chunks)), [("deployment_success", "{\"a\": 1}"), (None, "line1\nline2")])
@@ -0,0 +1,105 @@
+import json
+import threading
+import unittest
+from unittest import mock
+import requests_mock
+from dcosdeploy.base import APIRequestException
+from dcosdeploy.util import global_config
+
+
+global_config.silent = True
+
+MARATHON_URL = "https://my.cluster/service/marathon/v2"
+
+
+class _MarathonTest(unittest.TestCase):
+    def setUp(self):
+        patches = [mock.patch("dcosdeploy.auth.get_base_url", lambda: "https://my.cluster"),
+                   mock.patch("dcosdeploy.adapters.marathon.get_base_url", lambda: "https://my.cluster"),
+                   mock.patch("dcosdeploy.util.http.get_auth", lambda: None)]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+
+class MarathonAppIndexTest(_MarathonTest):
+    def test_prefetch(self):
+        from dcosdeploy.adapters.marathon import MarathonAdapter
+        adapter = MarathonAdapter()
+        with requests_mock.Mocker() as m:
+            m.get(MARATHON_URL + "/apps?id=/foo", json=dict(apps=[dict(id="/foo/a", deployments=[]), dict(id="/foo/b", deployments=[])]))
+            m.get(MARATHON_URL + "/apps?id=/bar", json=dict(apps=[]))
+            m.get(MARATHON_URL + "/apps/baz/c/?embed=app.counts", json=dict(app=dict(id="/baz/c")))
+            adapter.prefetch_apps(["/foo/a", "foo/b", "/foo/x", "/bar"])
+            self.assertEqual(m.call_count, 2)
+            state = adapter.get_app_state("/foo/a")
+            self.assertEqual(state["id"], "/foo/a")
+            state["id"] = "changed"
+            self.assertEqual(adapter.get_app_state("foo/a")["id"], "/foo/a")
+            self.assertIsNone(adapter.get_app_state("/foo/x"))
+            self.assertIsNone(adapter.get_app_state("/bar"))
+            self.assertEqual(m.call_count, 2)
+            self.assertEqual(adapter.get_app_state("/baz/c")["id"], "/baz/c")
+            self.assertEqual(m.call_count, 3)
+
+    def test_invalidation(self):
+        from dcosdeploy.adapters.marathon import MarathonAdapter
+        adapter = MarathonAdapter()
+        with requests_mock.Mocker() as m:
+            m.get(MARATHON_URL + "/apps?id=/foo", json=dict(apps=[]))
+            m.put(MARATHON_URL + "/apps?force=False", json=dict(deploymentId="d1"))
+            m.get(MARATHON_URL + "/apps/foo/a/?embed=app.counts", json=dict(app=dict(id="/foo/a")))
+            adapter.prefetch_apps(["/foo/a"])
+            self.assertIsNone(adapter.get_app_state("/foo/a"))
+            adapter.put_apps([dict(id="/foo/a")])
+            self.assertEqual(adapter.get_app_state("/foo/a")["id"], "/foo/a")
+
+
+class MarathonBatchTest(_MarathonTest):
+
+    def _deploy_concurrently(self, batcher, app_ids):
+        results = dict()
+
+        def _deploy(app_id):
+            try:
+                results[app_id] = batcher.deploy_app(dict(id=app_id), wait_for_deployment=False)
+            except Exception as ex:
+                results[app_id] = ex
+
+        threads = [threading.Thread(target=_deploy, args=(app_id,)) for app_id in app_ids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_batch(self):
+        from dcosdeploy.adapters.marathon import MarathonAdapter, AppBatcher
+        batcher = AppBatcher(MarathonAdapter(), batch_size=3, window=5)
+        with requests_mock.Mocker() as m:
+            m.put(MARATHON_URL + "/apps?force=False", json=dict(deploymentId="d1"))
+            m.get(MARATHON_URL + "/deployments", json=[dict(id="d1", affectedApps=["/a", "/b"])])
+            results = self._deploy_concurrently(batcher, ["a", "/b", "c"])
+            puts = [request for request in m.request_history if request.method == "PUT"]
+        self.assertEqual(results, {"a": True, "/b": True, "c": False})
+        self.assertEqual(len(puts), 1)
+        self.assertCountEqual([app["id"] for app in puts[0].json()], ["a", "/b", "c"])
+
+    def test_batch_rejected(self):
+        from dcosdeploy.adapters.marathon import MarathonAdapter, AppBatcher
+        batcher = AppBatcher(MarathonAdapter(), batch_size=2, window=5)
+
+        def _put(request, context):
+            apps = request.json()
+            if any(app["id"] == "bad" for app in apps):
+                context.status_code = 422
+                return dict(message="invalid")
+            return dict(deploymentId="d-" + apps[0]["id"])
+
+        with requests_mock.Mocker() as m:
+            m.put(MARATHON_URL + "/apps?force=False", json=_put)
+            m.get(MARATHON_URL + "/deployments", json=[dict(id="d-good", affectedApps=["/good"])])
+            results = self._deploy_concurrently(batcher, ["good", "bad"])
+        self.assertTrue(results["good"])
+        self.assertIsInstance(results["bad"], APIRequestException)
+        self.assertIn("bad", str(results["bad"]))
@@ -0,0 +1,50 @@
+import unittest
+from unittest import mock
+import requests_mock
+from dcosdeploy.util import global_config
+
+
+global_config.silent = True
+
+METRONOME_URL = "https://my.cluster/service/metronome/v1"
+
+
+class MetronomeJobIndexTest(unittest.TestCase):
+    def setUp(self):
+        patches = [mock.patch("dcosdeploy.auth.get_base_url", lambda: "https://my.cluster"),
+                   mock.patch("dcosdeploy.adapters.metronome.get_base_url", lambda: "https://my.cluster"),
+                   mock.patch("dcosdeploy.util.http.get_auth", lambda: None)]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        from dcosdeploy.adapters.metronome import MetronomeAdapter
+        self.adapter = MetronomeAdapter()
+
+    def test_index_loaded_once(self):
+        with requests_mock.Mocker() as m:
+            m.get(METRONOME_URL + "/jobs?embed=schedules", json=[dict(id="foo.a", run=dict(), schedules=[dict(id="default")]),
+                                                                dict(id="foo.b", run=dict(), schedules=[])])
+            self.assertTrue(self.adapter.does_job_exist("foo.a"))
+            self.assertTrue(self.adapter.does_job_exist("/foo.b"))
+            self.assertFalse(self.adapter.does_job_exist("foo.c"))
+            job, schedules = self.adapter.get_job_state("foo.a")
+            self.assertEqual(job, dict(id="foo.a", run=dict()))
+            self.assertEqual(schedules, [dict(id="default")])
+            self.assertEqual(self.adapter.get_job_state("foo.c"), (None, None))
+            self.assertEqual(m.call_count, 1)
+
+    def test_invalidation(self):
+        with requests_mock.Mocker() as m:
+            m.get(METRONOME_URL + "/jobs?embed=schedules", json=[dict(id="foo.a", run=dict(), schedules=[])])
+            m.post(METRONOME_URL + "/jobs", json=dict())
+            m.delete(METRONOME_URL + "/jobs/foo.a", json=dict())
+            m.get(METRONOME_URL + "/jobs/foo.b", json=dict(id="foo.b", run=dict()))
+            m.get(METRONOME_URL + "/jobs/foo.b/schedules", json=[])
+            m.get(METRONOME_URL + "/jobs/foo.a", status_code=404)
+            self.adapter.prefetch_jobs()
+            self.assertFalse(self.adapter.does_job_exist("foo.b"))
+            self.adapter.create_job(dict(id="foo.b"))
+            self.assertTrue(self.adapter.does_job_exist("foo.b"))
+            self.assertEqual(self.adapter.get_job_state("foo.b"), (dict(id="foo.b", run=dict()), []))
+            self.adapter.delete_job("foo.a")
+            self.assertFalse(self.adapter.does_job_exist("foo.a"))
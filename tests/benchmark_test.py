@@ -0,0 +1,48 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from dcosdeploy.config import read_config
+from dcosdeploy.util import global_config
+from fake_dcos import FakeDcos
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks"))
+from generate import generate
+from run import compare, run_size, PHASES
+
+
+global_config.silent = True
+
+
+class BenchmarkTest(unittest.TestCase):
+    def test_generate(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        config_file = generate(directory, 200)
+        self.assertTrue(os.path.exists(os.path.join(directory, "part-003.yml.encrypted")))
+        with FakeDcos():
+            result = read_config([config_file], dict())
+            entities, graph = result.entities, result.graph
+        self.assertEqual(len(entities), 200)
+        self.assertEqual(set(entity.entity_type for entity in entities.values()),
+                         {"app", "job", "secret", "marathon_group", "iam_group", "iam_user", "serviceaccount", "repository", "framework", "edgelb", "cert"})
+        self.assertIn("loopapp-2-c", entities)
+        self.assertIn("tplapp-5-z", entities)
+        self.assertEqual(entities["app-1"].dependencies, [("secret-0", "create")])
+        self.assertGreater(len(graph.levels()), 20)
+
+    def test_run_size(self):
+        results = run_size(10, 4, 0.0, 0.0)
+        self.assertEqual(sorted(results.keys()), sorted(PHASES))
+        for values in results.values():
+            self.assertGreater(values["requests"], 0)
+            self.assertGreater(values["peak_kib"], 0)
+
+    def test_compare(self):
+        baseline = {"10": dict(dry_run=dict(seconds=1.0, requests=10, peak_kib=100))}
+        self.assertEqual(compare({"10": dict(dry_run=dict(seconds=1.4, requests=15, peak_kib=300))}, baseline), list())
+        self.assertEqual(compare({"100": dict(dry_run=dict(seconds=10.0, requests=100, peak_kib=1000))}, baseline), list())
+        regressions = compare({"10": dict(dry_run=dict(seconds=2.0, requests=16, peak_kib=100))}, baseline)
+        self.assertEqual(regressions, ["10 entities, dry_run: seconds is 2.0, baseline is 1.0 (+50% allowed)",
+                                       "10 entities, dry_run: requests is 16, baseline is 10 (+10% allowed)"])
@@ -1,6 +1,9 @@
 import unittest
 from unittest import mock
+import pystache
 from dcosdeploy import config
+from dcosdeploy.config.variables import render_template
+from dcosdeploy.base import ConfigurationException
 from dcosdeploy.util import global_config
 import dummy_module
 
@@ -28,6 +31,21 @@ MARATHON_VARIABLES_APP_DEF = """
 }
 """
 
+DUMMY_WAIT_TIMEOUT = """
+modules:
+  - "./:dummy_module"
+global:
+  dummy:
+    wait_timeout: 30
+test1:
+  type: dummy
+  test: test1
+test2:
+  type: dummy
+  test: test2
+  wait_timeout: 120
+"""
+
 DUMMY_ONLY = """
 modules:
   - "./:dummy_module"
@@ -143,6 +161,26 @@ loop:
       - d
 """
 
+DUMMY_CYCLE = """
+modules:
+    - "./:dummy_module"
+test1:
+  type: dummy
+  test: bla
+  dependencies:
+    - test3
+test2:
+  type: dummy
+  test: bla
+  dependencies:
+    - test1:update
+test3:
+  type: dummy
+  test: bla
+  dependencies:
+    - test2
+"""
+
 LOOP_TEMPLATE_NAME = """
 modules:
     - "./:dummy_module"
@@ -160,44 +198,44 @@ modules:
 @mock.patch("dcosdeploy.config.reader.calculate_predefined_variables", lambda: dict())
 class ConfigTest(unittest.TestCase):
     def test_marathon_simple(self):
-        config, _, _ = read_config_mocked_open(dict(), MARATHON_SIMPLE, "{}")
+        config = read_config_mocked_open(dict(), MARATHON_SIMPLE, "{}").entities
         self.assertTrue("test1" in config)
         self.assertEqual(config["test1"].entity.app_id, "/hello")
         self.assertEqual(config["test1"].entity.app_definition, {})
         self.assertTrue(config["test1"].dependencies == list())
 
     def test_marathon_variables(self):
-        config, _, _ = read_config_mocked_open(dict(env="test"), MARATHON_VARIABLES, MARATHON_VARIABLES_APP_DEF)
+        config = read_config_mocked_open(dict(env="test"), MARATHON_VARIABLES, MARATHON_VARIABLES_APP_DEF).entities
         self.assertTrue("test1" in config)
         self.assertEqual(config["test1"].entity.app_id, "/hello/test")
         self.assertEqual(config["test1"].entity.app_definition, {"id": "/hello/test", "cmd": "echo test"})
 
     def test_only(self):
-        config, _, _ = read_config_mocked_open(dict(env="test"), DUMMY_ONLY)
+        config = read_config_mocked_open(dict(env="test"), DUMMY_ONLY).entities
         self.assertTrue("test1" not in config)
-        config, _, _ = read_config_mocked_open(dict(env="prod"), DUMMY_ONLY)
+        config = read_config_mocked_open(dict(env="prod"), DUMMY_ONLY).entities
         self.assertTrue("test1" in config)
 
     def test_only_list(self):
-        config, _, _ = read_config_mocked_open(dict(env="test"), DUMMY_ONLY_LIST)
+        config = read_config_mocked_open(dict(env="test"), DUMMY_ONLY_LIST).entities
         self.assertTrue("test1" not in config)
-        config, _, _ = read_config_mocked_open(dict(env="int"), DUMMY_ONLY_LIST)
+        config = read_config_mocked_open(dict(env="int"), DUMMY_ONLY_LIST).entities
         self.assertTrue("test1" in config)
 
     def test_except(self):
-        config, _, _ = read_config_mocked_open(dict(env="test"), DUMMY_EXCEPT)
+        config = read_config_mocked_open(dict(env="test"), DUMMY_EXCEPT).entities
         self.assertTrue("test1" not in config)
-        config, _, _ = read_config_mocked_open(dict(env="int"), DUMMY_EXCEPT)
+        config = read_config_mocked_open(dict(env="int"), DUMMY_EXCEPT).entities
         self.assertTrue("test1" in config)
 
     def test_except_list(self):
-        config, _, _ = read_config_mocked_open(dict(env="test"), DUMMY_EXCEPT_LIST)
+        config = read_config_mocked_open(dict(env="test"), DUMMY_EXCEPT_LIST).entities
         self.assertTrue("test1" not in config)
-        config, _, _ = read_config_mocked_open(dict(env="prod"), DUMMY_EXCEPT_LIST)
+        config = read_config_mocked_open(dict(env="prod"), DUMMY_EXCEPT_LIST).entities
         self.assertTrue("test1" in config)
 
     def test_except_dependency(self):
-        config, _, _ = read_config_mocked_open(dict(env="test"), DUMMY_EXCEPT_DEPENDENCY)
+        config = read_config_mocked_open(dict(env="test"), DUMMY_EXCEPT_DEPENDENCY).entities
         self.assertTrue("test1" not in config)
         self.assertTrue("test2" in config)
         self.assertTrue("test3" in config)
@@ -205,26 +243,54 @@ class ConfigTest(unittest.TestCase):
         self.assertTrue(("test1", "create") not in config["test3"].dependencies)
 
     def test_custom_module(self):
-        config, managers, _ = read_config_mocked_open(dict(), CUSTOM_MODULE)
+        result = read_config_mocked_open(dict(), CUSTOM_MODULE)
+        config, managers = result.entities, result.managers
         self.assertTrue("dummy" in managers)
         self.assertTrue("test1" in config)
         self.assertTrue("test2" in config)
         self.assertEqual(len(config["test2"].dependencies), 1)
         self.assertCountEqual(("test1", "create"), config["test2"].dependencies[0])
 
+    def test_shared_adapters(self):
+        managers = read_config_mocked_open(dict(), CUSTOM_MODULE).managers
+        self.assertIs(managers["cert"].secrets, managers["secret"].api)
+        self.assertIs(managers["serviceaccount"].secrets, managers["secret"].api)
+        self.assertIs(managers["framework"].marathon, managers["app"].api)
+        self.assertIs(managers["iam_user"].bouncer, managers["iam_group"].bouncer)
+        self.assertIs(managers["marathon_group"].marathon_api, managers["app"].api)
+
+    def test_global_config(self):
+        result = read_config_mocked_open(dict(), DUMMY_WAIT_TIMEOUT)
+        self.assertEqual(result.global_config["dummy"], dict(wait_timeout=30))
+
+    def test_dependency_graph(self):
+        graph = read_config_mocked_open(dict(env="test"), DUMMY_EXCEPT_DEPENDENCY).graph
+        self.assertEqual(graph.dependencies("test3"), ["test2"])
+        self.assertEqual(graph.dependents("test2"), ["test3"])
+
+    def test_dependency_cycle(self):
+        with self.assertRaises(ConfigurationException) as context:
+            read_config_mocked_open(dict(), DUMMY_CYCLE)
+        self.assertIn("test1 -> test3 -> test2 -> test1", str(context.exception))
+
+    def test_wait_timeout(self):
+        config = read_config_mocked_open(dict(), DUMMY_WAIT_TIMEOUT).entities
+        self.assertEqual(config["test1"].wait_timeout, 30)
+        self.assertEqual(config["test2"].wait_timeout, 120)
+
     def test_include(self):
-        config, _, _ = read_config_mocked_open(dict(), INCLUDE, INCLUDE_BLA, "{}")
+        config = read_config_mocked_open(dict(), INCLUDE, INCLUDE_BLA, "{}").entities
         self.assertTrue("test1" in config)
         self.assertEqual(config["test1"].entity.app_id, "/hello")
         self.assertEqual(config["test1"].entity.app_definition, {})
 
     def test_preprocess_func(self):
-        config, _, _ = read_config_mocked_open(dict(), PREPROCESS)
+        config = read_config_mocked_open(dict(), PREPROCESS).entities
         self.assertTrue("test1" in config)
         self.assertTrue(config["test1"].entity.preprocess, False)
       
     def test_loop(self):
-        config, _, _ = read_config_mocked_open(dict(), LOOP)
+        config = read_config_mocked_open(dict(), LOOP).entities
         self.assertEqual(len(config), 4)
         self.assertTrue("loop-a-c" in config)
         self.assertTrue("loop-a-d" in config)
@@ -232,7 +298,7 @@ class ConfigTest(unittest.TestCase):
         self.assertTrue("loop-b-d" in config)
 
     def test_loop_template_name(self):
-        config, _, _ = read_config_mocked_open(dict(), LOOP_TEMPLATE_NAME)
+        config = read_config_mocked_open(dict(), LOOP_TEMPLATE_NAME).entities
         self.assertEqual(len(config), 2)
         self.assertTrue("a-loop" in config)
         self.assertTrue("b-loop" in config)
@@ -242,6 +308,19 @@ class ConfigTest(unittest.TestCase):
         vars = helper.prepare_extra_vars({"a": "b", "foo:bar": {"abc": "xyz"}, "foo:baz": {"abc": "abc"}})
         self.assertEqual(vars, dict(abc="xyz", a="b"))
 
+    def test_render_template(self):
+        variables = config.VariableContainer(dict(a="1", b="2"))
+        variables.set_extra_vars(dict(b="3", c="<4>", d="{{e}}"))
+        self.assertEqual(variables.render("{{a}}-{{b}}-{{c}}"), "1-3-&lt;4&gt;")
+        self.assertEqual(variables.render("plain text"), "plain text")
+        with self.assertRaises(ConfigurationException):
+            variables.render("{{{d}}}")
+        with mock.patch("pystache.parse", wraps=pystache.parse) as parse:
+            self.assertEqual(render_template("{{x}}/{{y}} uncached", dict(x="a", y="b"), dict(y="c")), "a/c uncached")
+            self.assertEqual(render_template("{{x}}/{{y}} uncached", dict(x="d", y="e")), "d/e uncached")
+            self.assertEqual(render_template("plain text"), "plain text")
+        parse.assert_called_once_with("{{x}}/{{y}} uncached")
+
 
 def read_config_mocked_open(provided_variables, *input_texts):
     open_mock = mock.mock_open(read_data=input_texts[0])
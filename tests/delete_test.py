@@ -0,0 +1,63 @@
+import threading
+import unittest
+from unittest import mock
+from dcosdeploy.config import ConfigResult, DependencyGraph
+from dcosdeploy.config.reader import EntityContainer, StateEnum
+from dcosdeploy.delete import DeletionRunner
+from dcosdeploy.util import global_config
+
+
+global_config.silent = True
+
+
+class RecordingManager:
+    def __init__(self, existing):
+        self.existing = existing
+        self.deleted = list()
+        self._lock = threading.Lock()
+
+    def delete(self, config, force=False):
+        with self._lock:
+            self.deleted.append(config)
+        return config in self.existing
+
+    def dry_delete(self, config):
+        return config in self.existing
+
+
+def _runner(entities, manager):
+    config = dict()
+    for name, dependencies in entities:
+        config[name] = EntityContainer(name, "dummy", [(dep, "create") for dep in dependencies], None, StateEnum.NONE, None, None, dict())
+    with mock.patch("dcosdeploy.delete.fail_on_missing_connectivity"), \
+            mock.patch("dcosdeploy.delete.read_config", return_value=ConfigResult(config, dict(dummy=manager), None, DependencyGraph(config), dict())):
+        return DeletionRunner(["dcos.yml"], dict())
+
+
+class DeletionRunnerTest(unittest.TestCase):
+    def _entities(self):
+        return [("secret", []), ("app1", ["secret"]), ("app2", ["secret"]), ("other", [])]
+
+    def test_run_deletion(self):
+        for parallel in [1, 3]:
+            manager = RecordingManager(["secret", "app1", "app2", "other"])
+            runner = _runner(self._entities(), manager)
+            runner.run_deletion(parallel=parallel)
+            self.assertCountEqual(manager.deleted, ["secret", "app1", "app2", "other"])
+            self.assertGreater(manager.deleted.index("secret"), manager.deleted.index("app1"))
+            self.assertGreater(manager.deleted.index("secret"), manager.deleted.index("app2"))
+
+    def test_partial_deletion(self):
+        manager = RecordingManager(["secret", "app1", "app2", "other"])
+        runner = _runner(self._entities(), manager)
+        runner.run_partial_deletion("secret", parallel=2)
+        self.assertCountEqual(manager.deleted, ["secret", "app1", "app2"])
+        self.assertEqual(manager.deleted[-1], "secret")
+
+    def test_dry_run(self):
+        manager = RecordingManager(["app1"])
+        runner = _runner(self._entities(), manager)
+        self.assertTrue(runner.partial_dry_run("secret", parallel=2))
+        self.assertFalse(runner.partial_dry_run("other"))
+        runner.run_deletion()
+        self.assertCountEqual(manager.deleted, ["app1"])
@@ -0,0 +1,135 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import dummy_module
+from dcosdeploy.base import ConfigurationException, EntityPlan
+from dcosdeploy.config import ConfigResult, DependencyGraph
+from dcosdeploy.config.reader import EntityContainer, StateEnum
+from dcosdeploy.deploy import DeploymentRunner
+from dcosdeploy.util import global_config
+
+
+global_config.silent = True
+
+
+class RecordingManager:
+    def __init__(self, changed):
+        self.changed = changed
+        self.deployed = list()
+
+    def deploy(self, config, dependencies_changed=False, force=False):
+        self.deployed.append((config, dependencies_changed, force))
+        return config in self.changed or dependencies_changed or force
+
+    def dry_run(self, config, dependencies_changed=False):
+        return config in self.changed or dependencies_changed
+
+
+def _container(name, dependencies=list(), when=None):
+    return EntityContainer(name, "dummy", dependencies, when, StateEnum.NONE, None, None, dict())
+
+
+def _runner(entities, manager):
+    config = dict((entity.entity, entity) for entity in entities)
+    with mock.patch("dcosdeploy.deploy.fail_on_missing_connectivity"), \
+            mock.patch("dcosdeploy.deploy.read_config", return_value=ConfigResult(config, dict(dummy=manager), None, DependencyGraph(config), dict())):
+        return DeploymentRunner(["dcos.yml"], dict())
+
+
+class DeploymentRunnerTest(unittest.TestCase):
+    def _entities(self):
+        return [
+            _container("app", [("secret", "update"), ("account", "create")]),
+            _container("secret"),
+            _container("account"),
+            _container("job", [("app", "create")], when="dependencies-changed"),
+        ]
+
+    def test_run_deployment(self):
+        for parallel in [1, 4]:
+            manager = RecordingManager(["secret"])
+            runner = _runner(self._entities(), manager)
+            self.assertTrue(runner.run_deployment(parallel=parallel))
+            deployed = [entity for entity, _, _ in manager.deployed]
+            self.assertCountEqual(deployed, ["app", "secret", "account"])
+            self.assertLess(deployed.index("secret"), deployed.index("app"))
+            self.assertLess(deployed.index("account"), deployed.index("app"))
+            self.assertIn(("app", True, False), manager.deployed)
+
+    def test_dry_run_skips_unchanged(self):
+        manager = RecordingManager(["secret"])
+        runner = _runner(self._entities(), manager)
+        self.assertTrue(runner.dry_run())
+        runner.run_deployment(parallel=2)
+        self.assertCountEqual([entity for entity, _, _ in manager.deployed], ["app", "secret"])
+
+    def test_parallel_dry_run(self):
+        manager = RecordingManager(["secret"])
+        runner = _runner(self._entities(), manager)
+        self.assertTrue(runner.dry_run(parallel=4))
+        self.assertEqual(runner.dry_deployed, dict(app=True, secret=True, account=False, job=False))
+        self.assertEqual(runner.already_deployed, dict(account=False, job=False))
+
+    def test_partial_deployment(self):
+        manager = RecordingManager([])
+        runner = _runner(self._entities(), manager)
+        self.assertTrue(runner.run_partial_deployment("app", force=True, parallel=2))
+        self.assertCountEqual(manager.deployed, [("secret", False, False), ("account", False, False), ("app", False, True)])
+
+    def test_plan_passed_to_deploy(self):
+        class PlanningManager(RecordingManager):
+            def deploy(self, config, dependencies_changed=False, force=False, plan=None):
+                self.deployed.append((config, plan.action if plan else None))
+                return True
+
+            def dry_run(self, config, dependencies_changed=False):
+                if config in self.changed:
+                    return EntityPlan(EntityPlan.UPDATE, remote_state=config)
+                if dependencies_changed:
+                    return EntityPlan(EntityPlan.RESTART, remote_state=config)
+                return EntityPlan(EntityPlan.NONE)
+
+        manager = PlanningManager(["secret"])
+        runner = _runner(self._entities(), manager)
+        self.assertTrue(runner.dry_run())
+        self.assertEqual(runner.dry_deployed["secret"], True)
+        self.assertEqual(runner.dry_deployed["account"], False)
+        runner.run_deployment()
+        self.assertCountEqual(manager.deployed, [("secret", EntityPlan.UPDATE), ("app", EntityPlan.RESTART)])
+
+    def test_longest_path_first(self):
+        manager = RecordingManager(["fast", "slow", "after_slow"])
+        entities = [_container("fast"), _container("slow"), _container("after_slow", [("slow", "create")])]
+        runner = _runner(entities, manager)
+        for name, seconds in [("fast", 30), ("slow", 20), ("after_slow", 20)]:
+            runner.history.record(name, seconds)
+        runner.run_deployment()
+        self.assertEqual([entity for entity, _, _ in manager.deployed], ["slow", "fast", "after_slow"])
+
+    def test_prefetch(self):
+        class PrefetchingManager(RecordingManager):
+            def prefetch(self, configs):
+                self.prefetched = list(configs)
+
+        manager = PrefetchingManager([])
+        runner = _runner(self._entities(), manager)
+        runner.partial_dry_run("app")
+        self.assertCountEqual(manager.prefetched, ["app", "secret", "account"])
+
+    @mock.patch("dcosdeploy.plan.get_base_url", lambda: "https://cluster")
+    @mock.patch("dcosdeploy.deploy.fail_on_missing_connectivity")
+    def test_plan_rejected_if_entities_changed(self, _):
+        versions = dict(secret="1", app="1")
+        with mock.patch.object(dummy_module.DummiesManager, "dry_run", create=True, new=lambda self, config, dependencies_changed=False: True), \
+                mock.patch.object(dummy_module.DummiesManager, "fingerprint", create=True, new=lambda self, config: versions.get(config)):
+            runner = _runner([_container("app", [("secret", "update")]), _container("secret")], dummy_module.DummiesManager())
+            self.assertTrue(runner.dry_run())
+            with tempfile.TemporaryDirectory() as directory:
+                plan_filename = os.path.join(directory, "plan.bin")
+                runner.save_plan(plan_filename, True)
+                self.assertIsNotNone(DeploymentRunner.from_plan(plan_filename))
+                versions["app"] = "2"
+                with self.assertRaises(ConfigurationException) as context:
+                    DeploymentRunner.from_plan(plan_filename)
+                self.assertIn("app changed on the cluster", str(context.exception))
@@ -0,0 +1,718 @@
+"""
+A stateful in-memory fake of the parts of the DC/OS APIs that dcos-deploy uses (marathon, metronome, cosmos, secrets,
+IAM, edgelb, CA, mesos and the cluster metadata), served by a threaded WSGI server on localhost.
+Marathon deployments, job runs and framework plans complete deployment_delay seconds after they were started,
+latency is added to every request. Use it as a context manager, it points dcos-deploy to itself while it runs:
+
+    with FakeDcos(deployment_delay=0.2) as cluster:
+        runner = DeploymentRunner(["dcos.yml"], dict())
+        ...
+        cluster.requests  # list of (method, path) of all requests received
+"""
+import itertools
+import json
+import re
+import threading
+import time
+import uuid
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs, unquote
+from unittest import mock
+from wsgiref.simple_server import make_server, WSGIServer, WSGIRequestHandler
+from dcosdeploy.auth import StaticTokenAuth
+
+
+# Modules that import get_base_url / get_auth directly and must be pointed to the fake
+_BASE_URL_USERS = ["dcosdeploy.auth", "dcosdeploy.util.http", "dcosdeploy.plan", "dcosdeploy.config.predefined", "dcosdeploy.modules.httpcall",
+                   "dcosdeploy.adapters.bouncer", "dcosdeploy.adapters.ca", "dcosdeploy.adapters.cosmos", "dcosdeploy.adapters.dcos",
+                   "dcosdeploy.adapters.edgelb", "dcosdeploy.adapters.marathon", "dcosdeploy.adapters.mesos", "dcosdeploy.adapters.metronome",
+                   "dcosdeploy.adapters.secrets"]
+_AUTH_USERS = ["dcosdeploy.auth", "dcosdeploy.util.http", "dcosdeploy.modules.httpcall"]
+
+
+def client_patches(url):
+    """Patches that point dcos-deploy to the cluster at url, e.g. to a FakeDcos served by another process"""
+    token = StaticTokenAuth("fake-token")
+    patches = [mock.patch("%s.get_base_url" % module, lambda: url) for module in _BASE_URL_USERS]
+    patches += [mock.patch("%s.get_auth" % module, lambda: token) for module in _AUTH_USERS]
+    return patches
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class _Request:
+    def __init__(self, method, path, query, content_type, body):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.content_type = content_type
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body.decode("utf-8")) if self.body else None
+
+    def param(self, name, default=None):
+        return self.query.get(name, [default])[0]
+
+
+def _json(data, status=200):
+    return status, "application/json", json.dumps(data).encode("utf-8")
+
+
+def _not_found(message="Not found"):
+    return _json(dict(message=message), 404)
+
+
+def _with_job_defaults(job):
+    """Metronome returns jobs with all default values filled in"""
+    job = json.loads(json.dumps(job))
+    job.setdefault("labels", dict())
+    run = job.setdefault("run", dict())
+    for key, value in dict(artifacts=list(), placement=dict(constraints=list()), volumes=list()).items():
+        run.setdefault(key, value)
+    return job
+
+
+def _with_pool_defaults(pool):
+    """EdgeLB (1.2.3 and later) returns pools with all default values filled in and names for unnamed frontends"""
+    pool = json.loads(json.dumps(pool))
+    for key, value in dict(constraints="hostname:UNIQUE", cpus=0.9, cpusAdminOverhead=0.1, disk=256, virtualNetworks=list(),
+                           role="slave_public", ports=list(), memAdminOverhead=32, mem=992, type="static", secrets=list(),
+                           poolHealthcheckGracePeriod=180, poolHealthcheckInterval=12, poolHealthcheckMaxFail=5,
+                           poolHealthcheckTimeout=60).items():
+        pool.setdefault(key, value)
+    haproxy = pool.setdefault("haproxy", dict())
+    haproxy.setdefault("stats", dict()).setdefault("bindAddress", "0.0.0.0")
+    for frontend in haproxy.setdefault("frontends", list()):
+        for key, value in dict(bindAddress="0.0.0.0", certificates=list(), miscStrs=list(), linkBackend=dict(map=list())).items():
+            frontend.setdefault(key, value)
+        frontend["linkBackend"].setdefault("map", list())
+        frontend.setdefault("name", "frontend_%s_%s" % (frontend["bindAddress"], frontend.get("bindPort")))
+    for backend in haproxy.setdefault("backends", list()):
+        for key, value in dict(balance="roundrobin", miscStrs=list(), protocol="HTTP").items():
+            backend.setdefault(key, value)
+        rewrite = backend.setdefault("rewriteHttp", dict())
+        for key in ["forwardfor", "rewritePath", "setHostHeader", "xForwardedPort", "xForwardedProtoHttpsIfTls"]:
+            rewrite.setdefault("request", dict()).setdefault(key, True)
+        rewrite.setdefault("response", dict()).setdefault("rewriteLocation", True)
+        for service in backend.get("services", list()):
+            service.setdefault("marathon", dict())
+            service.setdefault("mesos", dict())
+            endpoint = service.setdefault("endpoint", dict())
+            endpoint.setdefault("check", dict()).setdefault("enabled", True)
+            endpoint.setdefault("port", -1)
+            endpoint.setdefault("type", "AUTO_IP")
+    return pool
+
+
+def _with_schedule_defaults(schedule):
+    schedule = dict(schedule)
+    schedule.setdefault("concurrencyPolicy", "ALLOW")
+    return schedule
+
+
+class FakeDcos:
+    def __init__(self, deployment_delay=0.0, latency=0.0):
+        self.deployment_delay = deployment_delay
+        self.latency = latency
+        self.requests = list()  # (method, path) of every request
+        self.apps = dict()  # app id -> app definition
+        self.deployments = dict()  # deployment id -> dict(id, affectedApps, finish_at)
+        self.marathon_groups = dict()  # group id -> group
+        self.jobs = dict()  # job id -> job definition
+        self.schedules = dict()  # job id -> list of schedules
+        self.job_runs = dict()  # run id -> dict(job_id, finish_at)
+        self.job_history = dict()  # job id -> list of finished run ids
+        self.secrets = dict()  # path -> (content type, content)
+        self.users = dict()  # uid -> user
+        self.iam_groups = dict()  # gid -> group
+        self.memberships = set()  # (gid, uid)
+        self.acls = dict()  # rid -> description
+        self.permissions = set()  # (rid, "users"|"groups", id, action)
+        self.repositories = list()
+        self.services = dict()  # app id -> dict(package, version, options, plan_finish_at)
+        self.pools = dict()  # (api server, name) -> pool config
+        self.pool_templates = dict()  # (api server, name) -> template
+        self.roles = dict()  # role name -> quota limits
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+        self._server = None
+        self._thread = None
+        self._patches = list()
+        self.url = None
+        self._routes = [(method, re.compile("^%s$" % pattern), handler) for method, pattern, handler in [
+            ("GET", r"/mesos_dns/v1/hosts/master\.mesos", self._dns),
+            ("GET", r"/dcos-metadata/dcos-version\.json", self._version),
+            ("GET", r"/mesos/master/state-summary", self._state_summary),
+            ("GET", r"/mesos/master/state", self._master_state),
+            ("GET", r"/system/health/v1/nodes", self._nodes),
+            ("GET", r"/mesos/roles", self._get_roles),
+            ("POST", r"/mesos/api/v1", self._mesos_api),
+            # marathon
+            ("GET", r"/service/marathon/v2/apps", self._list_apps),
+            ("PUT", r"/service/marathon/v2/apps", self._put_apps),
+            ("POST", r"/service/marathon/v2/apps/(.+)/restart", self._restart_app),
+            ("GET", r"/service/marathon/v2/apps/(.+)", self._get_app),
+            ("DELETE", r"/service/marathon/v2/apps/(.+)", self._delete_app),
+            ("GET", r"/service/marathon/v2/deployments", self._list_deployments),
+            ("POST", r"/service/marathon/v2/groups", self._add_group),
+            ("GET", r"/service/marathon/v2/groups/(.+)", self._get_group),
+            ("PUT", r"/service/marathon/v2/groups/(.+)", self._update_group),
+            ("DELETE", r"/service/marathon/v2/groups/(.+)", self._delete_group),
+            # metronome
+            ("GET", r"/service/metronome/v1/jobs", self._list_jobs),
+            ("POST", r"/service/metronome/v1/jobs", self._create_job),
+            ("GET", r"/service/metronome/v1/jobs/([^/]+)", self._get_job),
+            ("PUT", r"/service/metronome/v1/jobs/([^/]+)", self._update_job),
+            ("DELETE", r"/service/metronome/v1/jobs/([^/]+)", self._delete_job),
+            ("GET", r"/service/metronome/v1/jobs/([^/]+)/schedules", self._get_schedules),
+            ("POST", r"/service/metronome/v1/jobs/([^/]+)/schedules", self._create_schedule),
+            ("PUT", r"/service/metronome/v1/jobs/([^/]+)/schedules/([^/]+)", self._update_schedule),
+            ("DELETE", r"/service/metronome/v1/jobs/([^/]+)/schedules/([^/]+)", self._delete_schedule),
+            ("POST", r"/service/metronome/v1/jobs/([^/]+)/runs", self._trigger_run),
+            ("GET", r"/service/metronome/v1/jobs/([^/]+)/runs/([^/]+)", self._get_run),
+            # secrets
+            ("GET", r"/secrets/v1/secret/default", self._list_secrets),
+            ("GET", r"/secrets/v1/secret/default/(.+)", self._get_secret),
+            ("PUT", r"/secrets/v1/secret/default/(.+)", self._create_secret),
+            ("PATCH", r"/secrets/v1/secret/default/(.+)", self._update_secret),
+            ("DELETE", r"/secrets/v1/secret/default/(.+)", self._delete_secret),
+            # IAM
+            ("GET", r"/acs/api/v1/acls", self._list_acls),
+            ("PUT", r"/acs/api/v1/acls/([^/]+)", self._create_acl),
+            ("PUT", r"/acs/api/v1/acls/([^/]+)/(users|groups)/([^/]+)/([^/]+)", self._add_permission),
+            ("DELETE", r"/acs/api/v1/acls/([^/]+)/(users|groups)/([^/]+)/([^/]+)", self._remove_permission),
+            ("GET", r"/acs/api/v1/users/([^/]+)", self._get_user),
+            ("PUT", r"/acs/api/v1/users/([^/]+)", self._create_user),
+            ("PATCH", r"/acs/api/v1/users/([^/]+)", self._update_user),
+            ("DELETE", r"/acs/api/v1/users/([^/]+)", self._delete_user),
+            ("GET", r"/acs/api/v1/users/([^/]+)/groups", self._get_user_groups),
+            ("GET", r"/acs/api/v1/users/([^/]+)/permissions", self._get_user_permissions),
+            ("GET", r"/acs/api/v1/groups/([^/]+)", self._get_iam_group),
+            ("PUT", r"/acs/api/v1/groups/([^/]+)", self._create_iam_group),
+            ("PATCH", r"/acs/api/v1/groups/([^/]+)", self._update_iam_group),
+            ("DELETE", r"/acs/api/v1/groups/([^/]+)", self._delete_iam_group),
+            ("GET", r"/acs/api/v1/groups/([^/]+)/permissions", self._get_group_permissions),
+            ("PUT", r"/acs/api/v1/groups/([^/]+)/users/([^/]+)", self._add_member),
+            ("DELETE", r"/acs/api/v1/groups/([^/]+)/users/([^/]+)", self._remove_member),
+            # cosmos
+            ("POST", r"/package/repository/list", self._list_repositories),
+            ("POST", r"/package/repository/add", self._add_repository),
+            ("POST", r"/package/repository/delete", self._delete_repository),
+            ("POST", r"/package/install", self._install_package),
+            ("POST", r"/package/uninstall", self._uninstall_package),
+            ("POST", r"/cosmos/service/describe", self._describe_service),
+            ("POST", r"/cosmos/service/update", self._update_service),
+            # CA
+            ("POST", r"/ca/api/v2/newkey", self._new_key),
+            ("POST", r"/ca/api/v2/sign", self._sign),
+            # services: plans of frameworks and edgelb
+            ("GET", r"/service/(.+)/v1/plans", self._list_plans),
+            ("GET", r"/service/(.+)/v1/plans/([^/]+)", self._get_plan),
+            ("GET", r"/service/(.+)/ping", self._ping),
+            ("GET", r"/service/(.+)/v2/pools", self._list_pools),
+            ("POST", r"/service/(.+)/v2/pools", self._create_pool),
+            ("GET", r"/service/(.+)/v2/pools/([^/]+)", self._get_pool),
+            ("PUT", r"/service/(.+)/v2/pools/([^/]+)", self._update_pool),
+            ("DELETE", r"/service/(.+)/v2/pools/([^/]+)", self._delete_pool),
+            ("GET", r"/service/(.+)/v2/pools/([^/]+)/lbtemplate", self._get_pool_template),
+            ("PUT", r"/service/(.+)/v2/pools/([^/]+)/lbtemplate", self._update_pool_template),
+        ]]
+
+    def start(self):
+        self._server = make_server("127.0.0.1", 0, self._app, server_class=_ThreadingWSGIServer, handler_class=_QuietHandler)
+        self.url = "http://127.0.0.1:%d" % self._server.server_port
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-dcos", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        self._patches = client_patches(self.url)
+        for patch in self._patches:
+            patch.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for patch in reversed(self._patches):
+            patch.stop()
+        self.stop()
+        return False
+
+    def _app(self, environ, start_response):
+        if self.latency:
+            time.sleep(self.latency)
+        method = environ["REQUEST_METHOD"]
+        path = re.sub("/+", "/", environ.get("PATH_INFO", "")).rstrip("/") or "/"
+        length = int(environ.get("CONTENT_LENGTH") or 0)
+        body = environ["wsgi.input"].read(length) if length else b""
+        request = _Request(method, path, parse_qs(environ.get("QUERY_STRING", "")), environ.get("CONTENT_TYPE", ""), body)
+        with self._lock:
+            self.requests.append((method, path))
+            self._finish_deployments()
+            status, content_type, content = self._route(request)
+        start_response("%d %s" % (status, "OK" if status < 400 else "Error"), [("Content-Type", content_type), ("Content-Length", str(len(content)))])
+        return [content]
+
+    def _route(self, request):
+        for method, pattern, handler in self._routes:
+            match = pattern.match(request.path)
+            if match and method == request.method:
+                return handler(request, *[unquote(group) for group in match.groups()])
+        return _not_found("No fake for %s %s" % (request.method, request.path))
+
+    def _next_id(self):
+        return "%s-%d" % (uuid.uuid4().hex[:8], next(self._ids))
+
+    def _finish_at(self):
+        return time.monotonic() + self.deployment_delay
+
+    # cluster metadata
+
+    def _dns(self, request):
+        return _json([dict(host="master.mesos.", ip="127.0.0.1")])
+
+    def _version(self, request):
+        return _json({"version": "2.1.0", "dcos-variant": "open"})
+
+    def _state_summary(self, request):
+        return _json(dict(cluster="fake-cluster"))
+
+    def _master_state(self, request):
+        return _json(dict(frameworks=list()))
+
+    def _nodes(self, request):
+        return _json(dict(nodes=[dict(role="master"), dict(role="agent"), dict(role="agent"), dict(role="agent_public")]))
+
+    def _get_roles(self, request):
+        return _json(dict(roles=[dict(name=name, quota=dict(limit=limits)) for name, limits in sorted(self.roles.items())]))
+
+    def _mesos_api(self, request):
+        data = request.json()
+        if data.get("type") != "UPDATE_QUOTA":
+            return _json(dict(message="Unsupported call"), 400)
+        for quota in data["update_quota"]["quota_configs"]:
+            self.roles[quota["role"]] = dict((key, value["value"]) for key, value in quota["limits"].items())
+        return _json(dict())
+
+    # marathon
+
+    def _finish_deployments(self):
+        now = time.monotonic()
+        for deployment_id, deployment in list(self.deployments.items()):
+            if deployment["finish_at"] <= now:
+                del self.deployments[deployment_id]
+
+    def _start_deployment(self, app_ids, changed=True):
+        deployment_id = self._next_id()
+        if changed:
+            self.deployments[deployment_id] = dict(id=deployment_id, affectedApps=list(app_ids), finish_at=self._finish_at())
+        return deployment_id
+
+    def _app_state(self, app_id):
+        app = dict(self.apps[app_id])
+        app["deployments"] = [dict(id=deployment["id"]) for deployment in self.deployments.values() if app_id in deployment["affectedApps"]]
+        app["tasksRunning"] = app.get("instances", 1)
+        return app
+
+    def _list_apps(self, request):
+        prefix = request.param("id", "/").rstrip("/")
+        app_ids = [app_id for app_id in sorted(self.apps) if not prefix or app_id == prefix or app_id.startswith(prefix + "/")]
+        return _json(dict(apps=[self._app_state(app_id) for app_id in app_ids]))
+
+    def _get_app(self, request, app_id):
+        app_id = "/" + app_id
+        if app_id not in self.apps:
+            return _not_found("App '%s' does not exist" % app_id)
+        return _json(dict(app=self._app_state(app_id)))
+
+    def _put_apps(self, request):
+        changed = list()
+        for app in request.json():
+            app = dict(app)
+            if not app["id"].startswith("/"):
+                app["id"] = "/" + app["id"]
+            if self.apps.get(app["id"]) != app:
+                changed.append(app["id"])
+                self.apps[app["id"]] = app
+        return _json(dict(deploymentId=self._start_deployment(changed, bool(changed)), version="now"))
+
+    def _restart_app(self, request, app_id):
+        app_id = "/" + app_id
+        if app_id not in self.apps:
+            return _not_found("App '%s' does not exist" % app_id)
+        return _json(dict(deploymentId=self._start_deployment([app_id]), version="now"))
+
+    def _delete_app(self, request, app_id):
+        app_id = "/" + app_id
+        if app_id not in self.apps:
+            return _not_found("App '%s' does not exist" % app_id)
+        del self.apps[app_id]
+        return _json(dict(deploymentId=self._start_deployment([app_id]), version="now"))
+
+    def _list_deployments(self, request):
+        return _json([dict(id=deployment["id"], affectedApps=deployment["affectedApps"]) for deployment in self.deployments.values()])
+
+    def _add_group(self, request):
+        group = request.json()
+        group_id = "/" + group["id"].strip("/")
+        if group_id in self.marathon_groups:
+            return _json(dict(message="Group already exists"), 409)
+        self.marathon_groups[group_id] = dict(id=group_id, enforceRole=group.get("enforceRole", False))
+        return _json(dict(deploymentId=self._start_deployment([], False), version="now"), 201)
+
+    def _get_group(self, request, group_id):
+        group = self.marathon_groups.get("/" + group_id)
+        return _json(group) if group else _not_found()
+
+    def _update_group(self, request, group_id):
+        group = self.marathon_groups.get("/" + group_id)
+        if not group:
+            return _not_found()
+        group.update(request.json())
+        return _json(dict(deploymentId=self._start_deployment([], False), version="now"))
+
+    def _delete_group(self, request, group_id):
+        if self.marathon_groups.pop("/" + group_id, None) is None:
+            return _not_found()
+        return _json(dict(deploymentId=self._start_deployment([], False), version="now"))
+
+    # metronome
+
+    def _job_state(self, job_id, embed):
+        job = dict(self.jobs[job_id])
+        if "schedules" in embed:
+            job["schedules"] = list(self.schedules.get(job_id, list()))
+        if "history" in embed:
+            job["history"] = dict(successfulFinishedRuns=[dict(id=run_id) for run_id in self.job_history.get(job_id, list())], failedFinishedRuns=list())
+        return job
+
+    def _list_jobs(self, request):
+        embed = request.query.get("embed", list())
+        return _json([self._job_state(job_id, embed) for job_id in sorted(self.jobs)])
+
+    def _create_job(self, request):
+        job = request.json()
+        if job["id"] in self.jobs:
+            return _json(dict(message="Job already exists"), 409)
+        self.jobs[job["id"]] = _with_job_defaults(job)
+        return _json(self.jobs[job["id"]], 201)
+
+    def _get_job(self, request, job_id):
+        if job_id not in self.jobs:
+            return _not_found()
+        return _json(self._job_state(job_id, request.query.get("embed", list())))
+
+    def _update_job(self, request, job_id):
+        if job_id not in self.jobs:
+            return _not_found()
+        self.jobs[job_id] = _with_job_defaults(request.json())
+        return _json(self.jobs[job_id])
+
+    def _delete_job(self, request, job_id):
+        if self.jobs.pop(job_id, None) is None:
+            return _not_found()
+        self.schedules.pop(job_id, None)
+        return _json(dict())
+
+    def _get_schedules(self, request, job_id):
+        if job_id not in self.jobs:
+            return _not_found()
+        return _json(self.schedules.get(job_id, list()))
+
+    def _create_schedule(self, request, job_id):
+        if job_id not in self.jobs:
+            return _not_found()
+        schedule = _with_schedule_defaults(request.json())
+        self.schedules.setdefault(job_id, list()).append(schedule)
+        return _json(schedule, 201)
+
+    def _update_schedule(self, request, job_id, schedule_id):
+        schedules = [schedule for schedule in self.schedules.get(job_id, list()) if schedule["id"] != schedule_id]
+        schedule = _with_schedule_defaults(request.json())
+        schedules.append(schedule)
+        self.schedules[job_id] = schedules
+        return _json(schedule)
+
+    def _delete_schedule(self, request, job_id, schedule_id):
+        schedules = self.schedules.get(job_id, list())
+        remaining = [schedule for schedule in schedules if schedule["id"] != schedule_id]
+        if len(remaining) == len(schedules):
+            return _not_found()
+        self.schedules[job_id] = remaining
+        return _json(dict())
+
+    def _trigger_run(self, request, job_id):
+        if job_id not in self.jobs:
+            return _not_found()
+        run_id = self._next_id()
+        self.job_runs[run_id] = dict(job_id=job_id, finish_at=self._finish_at())
+        return _json(dict(id=run_id, jobId=job_id, status="STARTING"), 201)
+
+    def _get_run(self, request, job_id, run_id):
+        run = self.job_runs.get(run_id)
+        if not run:
+            return _not_found()
+        if run["finish_at"] <= time.monotonic():
+            # Finished runs are no longer listed as runs but in the history of the job
+            del self.job_runs[run_id]
+            self.job_history.setdefault(job_id, list()).append(run_id)
+            return _not_found()
+        return _json(dict(id=run_id, jobId=job_id, status="ACTIVE"))
+
+    # secrets
+
+    def _list_secrets(self, request):
+        return _json(dict(array=sorted(self.secrets)))
+
+    def _get_secret(self, request, path):
+        if path not in self.secrets:
+            return _not_found()
+        content_type, content = self.secrets[path]
+        if content_type == "application/json":
+            return _json(dict(value=content))
+        return 200, content_type, content
+
+    def _store_secret(self, request, path):
+        if request.content_type.startswith("application/json"):
+            self.secrets[path] = ("application/json", request.json()["value"])
+        else:
+            self.secrets[path] = ("application/octet-stream", request.body)
+
+    def _create_secret(self, request, path):
+        if path in self.secrets:
+            return _json(dict(message="Secret already exists"), 409)
+        self._store_secret(request, path)
+        return _json(dict(), 201)
+
+    def _update_secret(self, request, path):
+        if path not in self.secrets:
+            return _not_found()
+        self._store_secret(request, path)
+        return _json(dict())
+
+    def _delete_secret(self, request, path):
+        if self.secrets.pop(path, None) is None:
+            return _not_found()
+        return _json(dict())
+
+    # IAM
+
+    def _list_acls(self, request):
+        return _json(dict(array=[dict(rid=rid, description=description) for rid, description in sorted(self.acls.items())]))
+
+    def _create_acl(self, request, rid):
+        rid = unquote(rid)
+        if rid in self.acls:
+            return _json(dict(message="ACL already exists"), 409)
+        self.acls[rid] = request.json().get("description", "")
+        return _json(dict(), 201)
+
+    def _add_permission(self, request, rid, kind, name, action):
+        rid = unquote(rid)
+        if rid not in self.acls:
+            return _not_found()
+        self.permissions.add((rid, kind, name, action))
+        return _json(dict())
+
+    def _remove_permission(self, request, rid, kind, name, action):
+        self.permissions.discard((unquote(rid), kind, name, action))
+        return _json(dict())
+
+    def _permissions_of(self, kind, name):
+        actions = dict()
+        for rid, permission_kind, permission_name, action in sorted(self.permissions):
+            if permission_kind == kind and permission_name == name:
+                actions.setdefault(rid, list()).append(dict(name=action))
+        return [dict(rid=rid, actions=rid_actions) for rid, rid_actions in actions.items()]
+
+    def _get_user(self, request, uid):
+        user = self.users.get(uid)
+        return _json(user) if user else _not_found()
+
+    def _create_user(self, request, uid):
+        if uid in self.users:
+            return _json(dict(message="User already exists"), 409)
+        data = request.json() or dict()
+        self.users[uid] = dict(uid=uid, description=data.get("description", ""), public_key=data.get("public_key"))
+        return _json(dict(), 201)
+
+    def _update_user(self, request, uid):
+        if uid not in self.users:
+            return _not_found()
+        data = request.json() or dict()
+        if "description" in data:
+            self.users[uid]["description"] = data["description"]
+        return _json(dict())
+
+    def _delete_user(self, request, uid):
+        if self.users.pop(uid, None) is None:
+            return _not_found()
+        return _json(dict())
+
+    def _get_user_groups(self, request, uid):
+        return _json(dict(array=[dict(group=dict(gid=gid)) for gid, member in sorted(self.memberships) if member == uid]))
+
+    def _get_user_permissions(self, request, uid):
+        return _json(dict(direct=self._permissions_of("users", uid), groups=list()))
+
+    def _get_iam_group(self, request, gid):
+        group = self.iam_groups.get(gid)
+        return _json(group) if group else _not_found()
+
+    def _create_iam_group(self, request, gid):
+        if gid in self.iam_groups:
+            return _json(dict(message="Group already exists"), 409)
+        self.iam_groups[gid] = dict(gid=gid, description=(request.json() or dict()).get("description", ""))
+        return _json(dict(), 201)
+
+    def _update_iam_group(self, request, gid):
+        if gid not in self.iam_groups:
+            return _not_found()
+        self.iam_groups[gid]["description"] = request.json().get("description", "")
+        return _json(dict())
+
+    def _delete_iam_group(self, request, gid):
+        if self.iam_groups.pop(gid, None) is None:
+            return _not_found()
+        return _json(dict())
+
+    def _get_group_permissions(self, request, gid):
+        return _json(dict(array=self._permissions_of("groups", gid)))
+
+    def _add_member(self, request, gid, uid):
+        self.memberships.add((gid, uid))
+        return _json(dict())
+
+    def _remove_member(self, request, gid, uid):
+        self.memberships.discard((gid, uid))
+        return _json(dict())
+
+    # cosmos
+
+    def _list_repositories(self, request):
+        return _json(dict(repositories=list(self.repositories)))
+
+    def _add_repository(self, request):
+        data = request.json()
+        repository = dict(name=data["name"], uri=data["uri"])
+        index = data.get("index", len(self.repositories))
+        self.repositories.insert(index, repository)
+        return _json(dict(repositories=self.repositories))
+
+    def _delete_repository(self, request):
+        name = request.json()["name"]
+        self.repositories = [repository for repository in self.repositories if repository["name"] != name]
+        return _json(dict(repositories=self.repositories))
+
+    def _install_package(self, request):
+        data = request.json()
+        app_id = "/" + data["options"].get("service", dict()).get("name", data["packageName"]).strip("/")
+        if app_id in self.services:
+            return _json(dict(type="PackageAlreadyInstalled", message="Already installed"), 409)
+        self.services[app_id] = dict(package=data["packageName"], version=data.get("packageVersion"), options=data["options"], plan_finish_at=self._finish_at())
+        self.apps[app_id] = dict(id=app_id, instances=1, cpus=1.0, mem=1024.0, disk=0, labels=dict(DCOS_PACKAGE_NAME=data["packageName"]))
+        self._start_deployment([app_id])
+        return _json(dict(appId=app_id, packageName=data["packageName"], packageVersion=data.get("packageVersion")))
+
+    def _uninstall_package(self, request):
+        data = request.json()
+        app_id = "/" + data["appId"].strip("/")
+        if self.services.pop(app_id, None) is None:
+            return _json(dict(type="MarathonAppNotFound", message="Not installed"), 404)
+        if self.apps.pop(app_id, None) is not None:
+            self._start_deployment([app_id])
+        return _json(dict(results=[dict(appId=app_id, packageName=data["packageName"])]))
+
+    def _describe_service(self, request):
+        app_id = "/" + request.json()["appId"].strip("/")
+        service = self.services.get(app_id)
+        if not service:
+            return _json(dict(type="MarathonAppNotFound", message="App %s not found" % app_id), 400)
+        return _json(dict(package=dict(name=service["package"], version=service["version"]), userProvidedOptions=service["options"]))
+
+    def _update_service(self, request):
+        data = request.json()
+        app_id = "/" + data["appId"].strip("/")
+        service = self.services.get(app_id)
+        if not service:
+            return _json(dict(type="MarathonAppNotFound", message="App %s not found" % app_id), 400)
+        service["options"] = data["options"]
+        if data.get("packageVersion"):
+            service["version"] = data["packageVersion"]
+        service["plan_finish_at"] = self._finish_at()
+        self._start_deployment([app_id])
+        return _json(dict(package=dict(name=service["package"], version=service["version"]), resolvedOptions=service["options"]))
+
+    def _list_plans(self, request, service_name):
+        if "/" + service_name not in self.services:
+            return _not_found()
+        return _json(["deploy", "update"])
+
+    def _get_plan(self, request, service_name, plan):
+        service = self.services.get("/" + service_name)
+        if not service or plan not in ("deploy", "update"):
+            return _not_found()
+        status = "COMPLETE" if service["plan_finish_at"] <= time.monotonic() else "IN_PROGRESS"
+        return _json(dict(status=status, phases=list()))
+
+    # CA
+
+    def _new_key(self, request):
+        return _json(dict(result=dict(certificate_request="FAKE CSR", private_key="FAKE KEY")))
+
+    def _sign(self, request):
+        return _json(dict(result=dict(certificate="FAKE CERTIFICATE")))
+
+    # edgelb
+
+    def _ping(self, request, api_server):
+        return 200, "text/plain", b"pong"
+
+    def _list_pools(self, request, api_server):
+        return _json([pool for (server, _), pool in sorted(self.pools.items()) if server == api_server])
+
+    def _create_pool(self, request, api_server):
+        pool = request.json()
+        if (api_server, pool["name"]) in self.pools:
+            return _json(dict(message="Pool already exists"), 409)
+        self.pools[(api_server, pool["name"])] = _with_pool_defaults(pool)
+        return _json(self.pools[(api_server, pool["name"])])
+
+    def _get_pool(self, request, api_server, name):
+        pool = self.pools.get((api_server, name))
+        return _json(pool) if pool else _not_found()
+
+    def _update_pool(self, request, api_server, name):
+        if (api_server, name) not in self.pools:
+            return _not_found()
+        self.pools[(api_server, name)] = _with_pool_defaults(request.json())
+        return _json(self.pools[(api_server, name)])
+
+    def _delete_pool(self, request, api_server, name):
+        if self.pools.pop((api_server, name), None) is None:
+            return _not_found()
+        self.pool_templates.pop((api_server, name), None)
+        return _json(dict())
+
+    def _get_pool_template(self, request, api_server, name):
+        if (api_server, name) not in self.pools:
+            return _not_found()
+        return 200, "text/plain", self.pool_templates.get((api_server, name), "default template").encode("utf-8")
+
+    def _update_pool_template(self, request, api_server, name):
+        if (api_server, name) not in self.pools:
+            return _not_found()
+        self.pool_templates[(api_server, name)] = request.body.decode("utf-8")
+        return 200, "text/plain", request.body
@@ -0,0 +1,131 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from dcosdeploy.deploy import DeploymentRunner
+from dcosdeploy.delete import DeletionRunner
+from dcosdeploy.util import global_config
+from fake_dcos import FakeDcos
+
+
+global_config.silent = True
+
+CONFIG = """
+variables:
+  env:
+    default: test
+app0:
+  type: app
+  path: /{{env}}/app0
+  marathon: app.json
+  extra_vars:
+    index: "0"
+  dependencies:
+    - secret
+app1:
+  type: app
+  path: /{{env}}/app1
+  marathon: app.json
+  extra_vars:
+    index: "1"
+  dependencies:
+    - secret
+app2:
+  type: app
+  path: /{{env}}/app2
+  marathon: app.json
+  extra_vars:
+    index: "2"
+  dependencies:
+    - secret
+secret:
+  type: secret
+  path: /{{env}}/secret
+  value: "foo"
+job:
+  type: job
+  definition: job.json
+pool:
+  type: edgelb
+  pool: pool.json
+"""
+
+APP = """
+{
+  "id": "/{{env}}/app{{index}}",
+  "cmd": "sleep 3600",
+  "instances": 1,
+  "cpus": 0.1,
+  "mem": 32,
+  "disk": 0
+}
+"""
+
+JOB = """
+{
+  "job": {
+    "id": "{{env}}.job",
+    "run": {"cmd": "echo hello", "cpus": 0.1, "mem": 32, "disk": 0}
+  },
+  "schedule": {"id": "default", "cron": "0 * * * *", "enabled": true}
+}
+"""
+
+POOL = """
+{
+  "apiVersion": "V2",
+  "name": "{{env}}-pool",
+  "count": 1,
+  "haproxy": {
+    "frontends": [{"bindPort": 80, "protocol": "HTTP", "linkBackend": {"defaultBackend": "app"}}],
+    "backends": [{"name": "app", "protocol": "HTTP", "services": [{"marathon": {"serviceID": "/{{env}}/app0"}, "endpoint": {"portName": "web"}}]}]
+  }
+}
+"""
+
+
+class FakeDcosTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.config_file = self._write("dcos.yml", CONFIG)
+        self._write("app.json", APP)
+        self._write("job.json", JOB)
+        self._write("pool.json", POOL)
+
+    def _write(self, name, content):
+        filename = os.path.join(self.directory, name)
+        with open(filename, "w") as output:
+            output.write(content)
+        return filename
+
+    def test_deploy_and_delete(self):
+        with FakeDcos(deployment_delay=0.1) as cluster:
+            runner = DeploymentRunner([self.config_file], dict())
+            self.assertTrue(runner.dry_run())
+            runner.run_deployment(parallel=4)
+            self.assertEqual(sorted(cluster.apps.keys()), ["/test/app0", "/test/app1", "/test/app2"])
+            self.assertIn("test/secret", cluster.secrets)
+            self.assertIn("test.job", cluster.jobs)
+            self.assertEqual(cluster.schedules["test.job"][0]["cron"], "0 * * * *")
+            self.assertIn(("edgelb/api", "test-pool"), cluster.pools)
+
+            runner = DeploymentRunner([self.config_file], dict())
+            self.assertFalse(runner.dry_run())
+
+            runner = DeletionRunner([self.config_file], dict())
+            self.assertTrue(runner.dry_run())
+            runner.run_deletion(parallel=4)
+            self.assertEqual(cluster.apps, dict())
+            self.assertEqual(cluster.secrets, dict())
+            self.assertEqual(cluster.jobs, dict())
+            self.assertEqual(cluster.pools, dict())
+
+    def test_latency(self):
+        with FakeDcos(latency=0.05) as cluster:
+            runner = DeploymentRunner([self.config_file], dict())
+            requests_before = len(cluster.requests)
+            start = time.monotonic()
+            runner.dry_run()
+            self.assertGreaterEqual(time.monotonic() - start, 0.05 * (len(cluster.requests) - requests_before))
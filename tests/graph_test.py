@@ -0,0 +1,47 @@
+import unittest
+from dcosdeploy.base import ConfigurationException
+from dcosdeploy.config import DependencyGraph
+from dcosdeploy.config.reader import EntityContainer, StateEnum
+
+
+def _graph(**dependencies):
+    entities = dict()
+    for name, deps in dependencies.items():
+        entities[name] = EntityContainer(name, "dummy", [(dep, "create") for dep in deps], None, StateEnum.NONE, None, None, dict())
+    return DependencyGraph(entities)
+
+
+class DependencyGraphTest(unittest.TestCase):
+    def test_indexes(self):
+        graph = _graph(a=[], b=["a"], c=["a", "b", "a"])
+        self.assertEqual(graph.dependencies("c"), ["a", "b"])
+        self.assertEqual(graph.dependents("a"), ["b", "c"])
+        self.assertEqual(graph.closure("c"), ["c", "a", "b"])
+        self.assertEqual(graph.reverse_closure("b"), ["b", "c"])
+
+    def test_levels(self):
+        graph = _graph(a=[], b=["a"], c=["b"], d=[], e=["a", "d"])
+        self.assertEqual(graph.levels(), [["a", "d"], ["b", "e"], ["c"]])
+        self.assertIsNone(graph.find_cycle())
+
+    def test_longest_paths(self):
+        graph = _graph(a=[], b=["a"], c=["b"], d=[], e=["a", "d"])
+        weights = dict(a=1, b=2, c=3, d=10, e=1)
+        self.assertEqual(graph.longest_paths(graph.names, weights.get), dict(a=6, b=5, c=3, d=11, e=1))
+        self.assertEqual(graph.longest_paths(["a", "b"], weights.get), dict(a=3, b=2))
+
+    def test_deep_chain(self):
+        chain = dict(("e%d" % idx, ["e%d" % (idx-1)] if idx else []) for idx in range(5000))
+        graph = _graph(**chain)
+        self.assertEqual(len(graph.levels()), 5000)
+        self.assertEqual(len(graph.closure("e4999")), 5000)
+
+    def test_cycle(self):
+        graph = _graph(a=["c"], b=["a"], c=["b"], d=[])
+        self.assertEqual(graph.find_cycle(), ["a", "c", "b", "a"])
+        with self.assertRaises(ConfigurationException):
+            graph.levels()
+
+    def test_unknown_dependency(self):
+        with self.assertRaises(ConfigurationException):
+            _graph(a=["b"])
@@ -51,6 +51,32 @@ class RepositoriesTest(unittest.TestCase):
         mock_cosmosadapter.return_value.delete_repository.assert_called_with("foo")
         mock_cosmosadapter.return_value.add_repository.assert_called_with("foo", "baz", None)
 
+    @mock.patch("dcosdeploy.modules.repositories.CosmosAdapter")
+    def test_deploy_with_plan(self, mock_cosmosadapter):
+        mock_cosmosadapter.return_value.list_repositories.side_effect = lambda: REPO_LIST
+        from dcosdeploy.modules.repositories import PackageRepository, PackageRepositoriesManager
+        repo = PackageRepository(name="foo", uri="baz", index=None)
+        manager = PackageRepositoriesManager()
+        plan = manager.dry_run(repo)
+        self.assertTrue(plan)
+        self.assertTrue(manager.deploy(repo, plan=plan))
+        mock_cosmosadapter.return_value.delete_repository.assert_called_with("foo")
+        mock_cosmosadapter.return_value.add_repository.assert_called_with("foo", "baz", None)
+
+    @mock.patch("dcosdeploy.modules.repositories.CosmosAdapter")
+    def test_deploy_with_stale_plan(self, mock_cosmosadapter):
+        repo_list = [dict(name="foo", uri="bar")]
+        mock_cosmosadapter.return_value.list_repositories.side_effect = lambda: repo_list
+        from dcosdeploy.modules.repositories import PackageRepository, PackageRepositoriesManager
+        repo = PackageRepository(name="foo", uri="baz", index=None)
+        manager = PackageRepositoriesManager()
+        plan = manager.dry_run(repo)
+        self.assertTrue(plan)
+        repo_list[0] = dict(name="foo", uri="baz")
+        self.assertFalse(manager.deploy(repo, plan=plan))
+        mock_cosmosadapter.return_value.delete_repository.assert_not_called()
+        mock_cosmosadapter.return_value.add_repository.assert_not_called()
+
     @mock.patch("dcosdeploy.modules.repositories.CosmosAdapter")
     def test_dry_run(self, mock_cosmosadapter):
         mock_cosmosadapter.return_value.list_repositories.side_effect = lambda: REPO_LIST
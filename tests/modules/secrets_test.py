@@ -0,0 +1,37 @@
+import pickle
+import unittest
+from unittest import mock
+from dcosdeploy.util import global_config
+
+
+global_config.silent = True
+
+
+@mock.patch("dcosdeploy.auth.get_base_url", lambda: "/bla")
+class SecretsTest(unittest.TestCase):
+    @mock.patch("dcosdeploy.modules.secrets.SecretsAdapter")
+    def test_deploy_with_plan(self, mock_secretsadapter):
+        mock_secretsadapter.return_value.list_secrets.return_value = ["foo"]
+        mock_secretsadapter.return_value.get_secret.return_value = "topsecret"
+        from dcosdeploy.modules.secrets import Secret, SecretsManager
+        secret = Secret("foo", "foo", "bar", None)
+        manager = SecretsManager()
+        plan = manager.dry_run(secret)
+        self.assertTrue(plan)
+        self.assertNotIn(b"topsecret", pickle.dumps(plan))
+        mock_secretsadapter.return_value.get_secret.reset_mock()
+        self.assertTrue(manager.deploy(secret, plan=plan))
+        mock_secretsadapter.return_value.get_secret.assert_not_called()
+        mock_secretsadapter.return_value.write_secret.assert_called_with("foo", "bar", None, update=True)
+
+    @mock.patch("dcosdeploy.modules.secrets.SecretsAdapter")
+    def test_deploy_with_stale_plan(self, mock_secretsadapter):
+        mock_secretsadapter.return_value.list_secrets.return_value = list()
+        from dcosdeploy.modules.secrets import Secret, SecretsManager
+        secret = Secret("foo", "foo", "bar", None)
+        manager = SecretsManager()
+        plan = manager.dry_run(secret)
+        mock_secretsadapter.return_value.list_secrets.return_value = ["foo"]
+        mock_secretsadapter.return_value.get_secret.return_value = "bar"
+        self.assertFalse(manager.deploy(secret, plan=plan))
+        mock_secretsadapter.return_value.write_secret.assert_not_called()
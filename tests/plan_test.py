@@ -0,0 +1,51 @@
+import os
+import pickle
+import tempfile
+import unittest
+from unittest import mock
+import dummy_module
+from dcosdeploy.base import ConfigurationException, EntityPlan
+from dcosdeploy.config.reader import EntityContainer, StateEnum
+from dcosdeploy.plan import write_plan, read_plan
+
+
+@mock.patch("dcosdeploy.plan.get_base_url", lambda: "https://cluster")
+class PlanTest(unittest.TestCase):
+    def setUp(self):
+        self.plan_file = tempfile.NamedTemporaryFile(delete=False)
+        self.plan_file.close()
+
+    def tearDown(self):
+        os.remove(self.plan_file.name)
+
+    def _write(self):
+        entity = EntityContainer(dummy_module.Dummy("foo", "bar", None), "dummy", list(), None, StateEnum.NONE, None, None, dict())
+        data = dict(config=dict(foo=entity), plans=dict(foo=EntityPlan(EntityPlan.UPDATE, remote_state=dict(a=1))))
+        write_plan(self.plan_file.name, dict(dummy=dummy_module.DummiesManager()), data)
+
+    def test_write_and_read(self):
+        self._write()
+        managers, data = read_plan(self.plan_file.name)
+        self.assertIsInstance(managers["dummy"], dummy_module.DummiesManager)
+        self.assertIn("app", managers)
+        self.assertEqual(data["config"]["foo"].entity, dummy_module.Dummy("foo", "bar", None))
+        self.assertEqual(data["plans"]["foo"].action, EntityPlan.UPDATE)
+        self.assertEqual(data["plans"]["foo"].remote_state, dict(a=1))
+
+    def test_stale_plan(self):
+        self._write()
+        with mock.patch("dcosdeploy.plan.time.time", lambda: 10**10):
+            with self.assertRaises(ConfigurationException):
+                read_plan(self.plan_file.name, max_age=60)
+        with mock.patch("dcosdeploy.plan.get_base_url", lambda: "https://other"):
+            with self.assertRaises(ConfigurationException):
+                read_plan(self.plan_file.name)
+        with mock.patch("dcosdeploy.plan.__version__", "0.0.1"):
+            with self.assertRaises(ConfigurationException):
+                read_plan(self.plan_file.name)
+
+    def test_invalid_file(self):
+        with open(self.plan_file.name, "wb") as plan_file:
+            pickle.dump(dict(foo="bar"), plan_file)
+        with self.assertRaises(ConfigurationException):
+            read_plan(self.plan_file.name)
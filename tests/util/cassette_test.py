@@ -0,0 +1,117 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+import requests_mock
+from dcosdeploy import auth
+from dcosdeploy.auth import StaticTokenAuth
+from dcosdeploy.deploy import DeploymentRunner
+from dcosdeploy.util import http, global_config
+from dcosdeploy.util.cassette import cassette, CassetteException, REDACTED
+from fake_dcos import FakeDcos, client_patches
+
+
+global_config.silent = True
+
+CONFIG = """
+app:
+  type: app
+  marathon: app.json
+  dependencies:
+    - secret
+secret:
+  type: secret
+  path: /bench/secret
+  value: "foo"
+"""
+
+APP = """
+{"id": "/bench/app", "cmd": "sleep 3600", "instances": 1, "cpus": 0.1, "mem": 32, "disk": 0}
+"""
+
+
+class CassetteTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.cassette_file = os.path.join(self.directory, "cassette.json")
+
+    @mock.patch("dcosdeploy.util.http.get_base_url", lambda: "https://my.cluster")
+    @mock.patch("dcosdeploy.util.http.get_auth", lambda: StaticTokenAuth("testtoken"))
+    @mock.patch("dcosdeploy.auth.get_base_url", lambda: "https://my.cluster")
+    def test_record_and_replay(self):
+        with requests_mock.Mocker() as m:
+            m.get("https://my.cluster/service/foo/v1/items", [dict(text="first"), dict(text="second")])
+            m.post("https://my.cluster/service/foo/v1/items", status_code=201, json=dict(created=True))
+            m.get("https://my.cluster/service/foo/v1/binary", content=b"\xff\x00")
+            with cassette(record=self.cassette_file):
+                http.get("/service/foo/v1/items")
+                http.get("/service/foo/v1/items")
+                http.post("/service/foo/v1/items", json=dict(name="a", value=1))
+                http.get("/service/foo/v1/binary")
+
+        with cassette(replay=self.cassette_file, latency_scale=0):
+            self.assertEqual(auth._base_url, "https://my.cluster")
+            self.assertEqual(http.get("/service/foo/v1/items").text, "first")
+            self.assertEqual(http.get("/service/foo/v1/items").text, "second")
+            self.assertEqual(http.get("/service/foo/v1/items").text, "second")
+            response = http.post("/service/foo/v1/items", json=dict(value=1, name="a"))
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(response.json(), dict(created=True))
+            self.assertEqual(http.get("/service/foo/v1/binary").content, b"\xff\x00")
+            with self.assertRaises(CassetteException):
+                http.post("/service/foo/v1/items", json=dict(name="b"))
+            with self.assertRaises(CassetteException):
+                http.get("/service/foo/v1/items", params=dict(embed="x"))
+        self.assertIsNone(auth._base_url)
+
+    @mock.patch("dcosdeploy.util.http.get_base_url", lambda: "https://my.cluster")
+    @mock.patch("dcosdeploy.util.http.get_auth", lambda: StaticTokenAuth("testtoken"))
+    @mock.patch("dcosdeploy.auth.get_base_url", lambda: "https://my.cluster")
+    def test_secrets_are_redacted(self):
+        with requests_mock.Mocker() as m:
+            m.get("https://my.cluster/secrets/v1/secret/default/?list=true", json=dict(array=["foo", "bar"]))
+            m.get("https://my.cluster/secrets/v1/secret/default/foo", json=dict(value="topsecret"),
+                  headers={"Content-Type": "application/json"})
+            m.get("https://my.cluster/secrets/v1/secret/default/bar", content=b"topsecret",
+                  headers={"Content-Type": "application/octet-stream"})
+            with cassette(record=self.cassette_file):
+                http.get("/secrets/v1/secret/default/?list=true")
+                http.get("/secrets/v1/secret/default/foo")
+                http.get("/secrets/v1/secret/default/bar")
+        with open(self.cassette_file) as cassette_file:
+            self.assertNotIn("topsecret", cassette_file.read())
+
+        with cassette(replay=self.cassette_file, latency_scale=0):
+            self.assertEqual(http.get("/secrets/v1/secret/default/?list=true").json(), dict(array=["foo", "bar"]))
+            self.assertEqual(http.get("/secrets/v1/secret/default/foo").json(), dict(value=REDACTED))
+            self.assertEqual(http.get("/secrets/v1/secret/default/bar").content, REDACTED.encode("utf-8"))
+
+    def test_replay_dry_run(self):
+        self._write("dcos.yml", CONFIG)
+        self._write("app.json", APP)
+        config_file = os.path.join(self.directory, "dcos.yml")
+        with FakeDcos(latency=0.02) as cluster:
+            with cassette(record=self.cassette_file):
+                runner = DeploymentRunner([config_file], dict())
+                self.assertTrue(runner.dry_run())
+            recorded = len(cluster.requests)
+
+        # Modules that were imported while get_base_url was patched by other tests keep that function
+        for patch in client_patches(cluster.url):
+            patch.start()
+            self.addCleanup(patch.stop)
+        start = time.monotonic()
+        with cassette(replay=self.cassette_file):
+            runner = DeploymentRunner([config_file], dict())
+            self.assertTrue(runner.dry_run())
+        self.assertGreaterEqual(time.monotonic() - start, 0.02 * recorded)
+        with cassette(replay=self.cassette_file, latency_scale=0):
+            runner = DeploymentRunner([config_file], dict())
+            self.assertTrue(runner.dry_run())
+
+    def _write(self, name, content):
+        with open(os.path.join(self.directory, name), "w") as output:
+            output.write(content)
@@ -1,4 +1,5 @@
 import base64
+import difflib
 import io
 import os
 import unittest
@@ -58,6 +59,28 @@ class DiffTest(unittest.TestCase):
         result = diff.compare_dicts(left, right)
         self.assertEqual(result, B64_DIFF)
 
+    def test_diff_dicts(self):
+        global_config.color_diffs = False
+        left = {"a": 1, "b": {"c": [1, 2, 3], "d/e": True}, "f": "x"}
+        self.assertFalse(diff.diff_dicts(left, dict(left)))
+        right = {"a": 1.0, "b": {"c": [1, 4], "d/e": 1}, "g": "x"}
+        result = diff.diff_dicts(left, right)
+        self.assertTrue(result)
+        self.assertEqual(result.changes, [("replace", "/a", 1, 1.0), ("replace", "/b/c/1", 2, 4), ("remove", "/b/c/2", 3, None),
+                                          ("replace", "/b/d~1e", True, 1), ("remove", "/f", "x", None), ("add", "/g", None, "x")])
+        self.assertEqual(str(diff.diff_dicts(dict(a="1", b="2"), dict(b="1", a="2"))), DICT_DIFF)
+        # base64 values are compared decoded
+        self.assertFalse(diff.diff_dicts(dict(some_b64=_b64("foo")), dict(some_b64=_b64("foo"))))
+        self.assertEqual(diff.diff_dicts(dict(some_b64=_b64("foo")), dict(some_b64=_b64("bar"))).changes,
+                         [("replace", "/some_b64", _b64("foo"), _b64("bar"))])
+        # the text is only rendered on demand
+        with mock.patch("dcosdeploy.util.diff.compare_text", return_value="diff") as compare_text:
+            result = diff.diff_dicts(dict(a=1), dict(a=2))
+            self.assertTrue(result)
+            compare_text.assert_not_called()
+            str(result)
+            compare_text.assert_called_once()
+
     def test_compare_text(self):
         # equal
         global_config.color_diffs = False
@@ -70,6 +93,46 @@ class DiffTest(unittest.TestCase):
         self.assertEqual(diff.compare_text(b'\x9c\x00', b'\x9c\x01'), "    <no diff for binary content>")
 
 
+    def test_diff_text(self):
+        global_config.color_diffs = False
+        self.assertFalse(diff.diff_text(TEXT, TEXT))
+        self.assertFalse(diff.diff_text("foo\nbar", "foo\\nbar\n"))
+        with mock.patch("difflib.unified_diff", wraps=difflib.unified_diff) as unified_diff:
+            result = diff.diff_text(TEXT, TEXT.replace("baz", "bar"))
+            self.assertTrue(result)
+            unified_diff.assert_not_called()
+            self.assertEqual(str(result), TEXT_DIFF)
+            unified_diff.assert_called_once()
+        self.assertTrue(diff.diff_text(b'\x9c\x00', b'\x9c\x01'))
+        self.assertFalse(diff.diff_text(b'\x9c\x00', b'\x9c\x00'))
+
+    def test_bounded_diff(self):
+        left = ["line %d" % i for i in range(10000)]
+        right = list(left)
+        right[5000] = "changed"
+        right.insert(5010, "added")
+        expected = list(difflib.unified_diff(left, right, lineterm=''))
+        self.assertEqual(diff._bounded_diff_lines(left, right, None, None), expected)
+        self.assertEqual(diff._bounded_diff_lines(left[:2], ["a"], None, None), list(difflib.unified_diff(left[:2], ["a"], lineterm="")))
+        # changed part over the size budget
+        lines = diff._bounded_diff_lines(left, right, 10, None)
+        self.assertEqual(lines[:2], ["--- ", "+++ "])
+        self.assertTrue(lines[2].startswith("<changed part is larger than 10 bytes: lines 5001-5010 (10 lines, sha1 "))
+        self.assertIn("would be replaced by lines 5001-5011 (11 lines, sha1 ", lines[2])
+        # time budget exceeded after the first chunk
+        right = ["x" + line for line in left]
+        with mock.patch("dcosdeploy.util.diff.time.monotonic", side_effect=[0, 0, 10]):
+            lines = diff._bounded_diff_lines(left, right, None, 5)
+        self.assertEqual(lines[2], "@@ -1,2000 +1,2000 @@")
+        self.assertTrue(lines[-1].startswith("<diff took longer than 5 seconds: lines 2001-10000 (8000 lines"))
+
+    def test_binary_detection(self):
+        global_config.color_diffs = False
+        self.assertEqual(str(diff.diff_text(b"foo\x00", b"bar\x00")), "    <no diff for binary content>")
+        self.assertEqual(str(diff.diff_text(b"foo\n", "bar\n")), "    --- \n    +++ \n    @@ -1 +1 @@\n    -foo\n    +bar")
+        self.assertEqual(str(diff.diff_text(b"\x9cfoo", b"\x9cbar")), "    --- \n    +++ \n    @@ -1 +1 @@\n    -\ufffdfoo\n    +\ufffdbar")
+        self.assertFalse(diff.diff_text(b"\x9cfoo", b"\x9cfoo"))
+
     def test_update_dict_with_defaults(self):
         my_dict = dict(a=1, b=2, c=dict(d=1, e=[1, 2, 3]))
         defaults = dict(d=1, b=4, c=dict(f=1, d=2))
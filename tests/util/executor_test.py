@@ -0,0 +1,101 @@
+import threading
+import time
+import unittest
+from dcosdeploy.base import ConfigurationException
+from dcosdeploy.util.executor import DependencyExecutor, ConcurrencyLimits
+
+
+class ExecutorTest(unittest.TestCase):
+    def test_sequential_order(self):
+        order = list()
+        dependencies = dict(a=["c"], b=[], c=["b"])
+        results = DependencyExecutor().run(["a", "b", "c"], dependencies.get, lambda node: order.append(node) or node.upper())
+        self.assertEqual(order, ["b", "c", "a"])
+        self.assertEqual(results, dict(a="A", b="B", c="C"))
+
+    def test_parallel_respects_dependencies(self):
+        finished = list()
+        lock = threading.Lock()
+
+        def _func(node):
+            time.sleep(0.05)
+            with lock:
+                finished.append(node)
+            return node
+
+        dependencies = dict(a=[], b=[], c=[], d=["a", "b", "c"])
+        start = time.time()
+        DependencyExecutor(4).run(["a", "b", "c", "d"], dependencies.get, _func)
+        duration = time.time() - start
+        self.assertEqual(finished[-1], "d")
+        self.assertCountEqual(finished[:3], ["a", "b", "c"])
+        self.assertLess(duration, 0.15)
+
+    def test_parallel_error(self):
+        called = list()
+
+        def _func(node):
+            called.append(node)
+            if node == "a":
+                raise ValueError("failed")
+            return True
+
+        with self.assertRaises(ValueError):
+            DependencyExecutor(2).run(["a", "b"], dict(a=[], b=["a"]).get, _func)
+        self.assertEqual(called, ["a"])
+
+    def test_cycle(self):
+        with self.assertRaises(ConfigurationException):
+            DependencyExecutor().run(["a", "b"], dict(a=["b"], b=["a"]).get, lambda node: True)
+
+    def test_priority(self):
+        order = list()
+        priorities = dict(a=1, b=5, c=3)
+        DependencyExecutor().run(["a", "b", "c"], dict(a=[], b=[], c=[]).get, order.append, priority=priorities.get)
+        self.assertEqual(order, ["b", "c", "a"])
+
+    def test_estimate(self):
+        durations = dict(a=10, b=1, c=1, d=5)
+        dependencies = dict(a=[], b=[], c=["b"], d=["a"]).get
+        self.assertEqual(DependencyExecutor(1).estimate(["a", "b", "c", "d"], dependencies, durations.get), 17)
+        self.assertEqual(DependencyExecutor(2).estimate(["a", "b", "c", "d"], dependencies, durations.get), 15)
+
+    def test_concurrency_limits(self):
+        running = dict(framework=0, app=0, total=0)
+        maximum = dict(framework=0, app=0, total=0)
+        lock = threading.Lock()
+
+        def _func(node):
+            group = node.split("-")[0]
+            with lock:
+                for key in [group, "total"]:
+                    running[key] += 1
+                    maximum[key] = max(maximum[key], running[key])
+            time.sleep(0.02)
+            with lock:
+                running[group] -= 1
+                running["total"] -= 1
+
+        nodes = ["framework-%d" % idx for idx in range(3)] + ["app-%d" % idx for idx in range(6)]
+        limits = ConcurrencyLimits.from_config(dict(framework=1, total=3), ["framework", "app"])
+        executor = DependencyExecutor(8, limits, lambda node: node.split("-")[0])
+        executor.run(nodes, lambda node: [], _func)
+        self.assertEqual(maximum["framework"], 1)
+        self.assertEqual(maximum["total"], 3)
+        durations = dict((node, 1) for node in nodes)
+        self.assertEqual(executor.estimate(nodes, lambda node: [], durations.get), 3)
+
+    def test_estimate_does_not_share_limits(self):
+        limits = ConcurrencyLimits.from_config(dict(framework=1), ["framework"])
+        executor = DependencyExecutor(4, limits, lambda node: "framework")
+        # A real run holds the only framework slot while the estimate is computed
+        self.assertTrue(limits.try_acquire("framework"))
+        self.assertEqual(executor.estimate(["a", "b"], lambda node: [], lambda node: 1), 2)
+        self.assertFalse(limits.try_acquire("framework"))
+        limits.release("framework")
+        self.assertTrue(limits.try_acquire("framework"))
+
+    def test_concurrency_limits_config(self):
+        for config in [dict(foo=1), dict(app=0), dict(app="2"), ["app"]]:
+            with self.assertRaises(ConfigurationException):
+                ConcurrencyLimits.from_config(config, ["app"])
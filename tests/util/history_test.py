@@ -0,0 +1,32 @@
+import os
+import tempfile
+import unittest
+from dcosdeploy.util.history import DurationHistory, format_duration
+
+
+class DurationHistoryTest(unittest.TestCase):
+    def test_record_and_save(self):
+        directory = tempfile.mkdtemp()
+        filename = os.path.join(directory, "history.json")
+        history = DurationHistory(filename)
+        self.assertFalse(history.has_data())
+        history.record("app", 10)
+        history.record("app", 20)
+        history.record("job", 3)
+        history.save()
+        history = DurationHistory(filename)
+        self.assertEqual(history.get("app"), 15)
+        self.assertEqual(history.get("unknown", 1), 1)
+        self.assertEqual(history.average(), 9)
+        os.remove(filename)
+        os.rmdir(directory)
+
+    def test_without_file(self):
+        history = DurationHistory()
+        history.record("app", 10)
+        history.save()
+        self.assertEqual(history.get("app"), 10)
+
+    def test_format_duration(self):
+        self.assertEqual(format_duration(5.4), "5s")
+        self.assertEqual(format_duration(125), "2m 5s")
@@ -34,3 +34,25 @@ class HttpTest(unittest.TestCase):
             m.get('https://other.domain', text='foobar')
             response = http.get("https://other.domain")
             self.assertEqual(response.text, "foobar")
+
+    def test_response_cache(self):
+        with requests_mock.Mocker() as m:
+            m.get('https://my.cluster/service/foo/v1/items', text='items')
+            m.get('https://my.cluster/service/foo/v1/items/a', text='a')
+            m.get('https://my.cluster/service/bar', text='bar')
+            m.put('https://my.cluster/service/foo/v1/items/a', text='ok')
+            with http.response_cache() as cache:
+                self.assertEqual(http.get("/service/foo/v1/items").text, "items")
+                self.assertEqual(http.get("/service/foo/v1/items").text, "items")
+                http.get("/service/foo/v1/items", params=dict(embed="x"))
+                http.get("/service/foo/v1/items/a")
+                http.get("/service/bar")
+                self.assertEqual(m.call_count, 4)
+                self.assertEqual((cache.hits, cache.misses), (1, 4))
+                http.put("/service/foo/v1/items/a")
+                http.get("/service/foo/v1/items")
+                http.get("/service/foo/v1/items/a")
+                http.get("/service/bar")
+                self.assertEqual(m.call_count, 7)
+            http.get("/service/bar")
+            self.assertEqual(m.call_count, 8)
@@ -1,5 +1,6 @@
 import io
 import os
+import threading
 import unittest
 from unittest import mock
 from dcosdeploy.util import global_config, output
@@ -43,6 +44,35 @@ class OutputTest(unittest.TestCase):
         global_config.debug = True
         stdout = _mock_output(lambda: output.echo_diff(FOOBAR, FOOBAR))
         self.assertEqual(stdout, FOOBAR+":"+"\n"+FOOBAR+"\n")
+        # Diff objects are only rendered with debug output
+        diff = mock.MagicMock()
+        diff.__str__.return_value = FOOBAR
+        global_config.debug = False
+        _mock_output(lambda: output.echo_diff(FOOBAR, diff))
+        diff.__str__.assert_not_called()
+        global_config.debug = True
+        stdout = _mock_output(lambda: output.echo_diff(FOOBAR, diff))
+        self.assertEqual(stdout, FOOBAR+":"+"\n"+FOOBAR+"\n")
+        global_config.silent = True
+        global_config.debug = False
+
+    def test_ordered_output(self):
+        global_config.silent = False
+        under_test = output.OrderedOutput(["a", "b"])
+        b_finished = threading.Event()
+
+        def _run_b():
+            under_test.run("b", output.echo, "b")
+            b_finished.set()
+
+        def _run():
+            thread = threading.Thread(target=_run_b)
+            thread.start()
+            b_finished.wait()
+            under_test.run("a", output.echo, "a")
+            thread.join()
+        stdout = _mock_output(_run)
+        self.assertEqual(stdout, "a\nb\n")
         global_config.silent = True
 
 
@@ -0,0 +1,35 @@
+import unittest
+from dcosdeploy.util.schema import Schema, ALL
+
+
+class SchemaTest(unittest.TestCase):
+    def test_defaults(self):
+        schema = Schema(defaults=dict(a=1, b=dict(c=[], d=2)), both=True)
+        local, remote = schema.normalize(dict(b=dict(d=3)), dict())
+        self.assertEqual(local, dict(a=1, b=dict(c=[], d=3)))
+        self.assertEqual(remote, dict(a=1, b=dict(c=[], d=2)))
+
+    def test_defaults_with_rules_are_copied(self):
+        schema = Schema(defaults=dict(container=dict(volumes=[])), fields=dict(container=Schema(defaults=dict(type="MESOS"))))
+        local, _ = schema.normalize(dict(), dict())
+        self.assertEqual(local, dict(container=dict(volumes=[], type="MESOS")))
+        local["container"]["volumes"].append(1)
+        self.assertEqual(schema.normalize(dict(), dict())[0], dict(container=dict(volumes=[], type="MESOS")))
+
+    def test_remote_rules(self):
+        schema = Schema(drop=["meta"], inherit=["namespace"], remote_defaults=dict(gpus=0), unset_if_zero=["port"], floats=["cpus", "mem"])
+        local, remote = schema.normalize(dict(meta=1, port=0, cpus=1, mem=32), dict(meta=2, namespace="ns", gpus=1, port=10000, cpus=1.0, mem=32))
+        self.assertEqual(local, dict(namespace="ns", gpus=0, cpus=1.0, mem=32))
+        self.assertIsInstance(local["cpus"], float)
+        self.assertEqual(remote, dict(namespace="ns", gpus=1, cpus=1.0, mem=32))
+        local, remote = schema.normalize(dict(port=80), dict(port=80))
+        self.assertEqual(local, dict(port=80))
+
+    def test_children(self):
+        schema = Schema(fields=dict(strategy=Schema(floats=ALL)),
+                        items=dict(mappings=Schema(defaults=dict(protocol="tcp"), unset_if_zero=["servicePort"])))
+        local, remote = schema.normalize(
+            dict(strategy=dict(a=1, b=1), mappings=[dict(servicePort=0), dict(servicePort=0), "other"]),
+            dict(strategy=dict(a=1.0, b=1), mappings=[dict(servicePort=10000)]))
+        self.assertEqual(local, dict(strategy=dict(a=1.0, b=1), mappings=[dict(protocol="tcp"), dict(protocol="tcp"), "other"]))
+        self.assertEqual(remote, dict(strategy=dict(a=1.0, b=1), mappings=[dict()]))
@@ -0,0 +1,56 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+import requests_mock
+from dcosdeploy.util import http, global_config
+from dcosdeploy.util.stats import endpoint_template, request_stats, RequestStats
+
+
+global_config.silent = True
+
+
+class StatsTest(unittest.TestCase):
+    def test_endpoint_template(self):
+        self.assertEqual(endpoint_template("https://my.cluster/service/marathon/v2/apps/foo/bar/?embed=app.counts"), "/service/marathon/v2/apps/{id}")
+        self.assertEqual(endpoint_template("https://my.cluster/service/marathon/v2/apps/foo/restart?force=False"), "/service/marathon/v2/apps/{id}/restart")
+        self.assertEqual(endpoint_template("https://my.cluster/service/marathon/v2/apps"), "/service/marathon/v2/apps")
+        self.assertEqual(endpoint_template("https://my.cluster/service/metronome/v1/jobs/foo.bar/runs/123"), "/service/metronome/v1/jobs/{id}/runs/{id}")
+        self.assertEqual(endpoint_template("https://my.cluster/secrets/v1/secret/default/foo/bar"), "/secrets/v1/secret/default/{path}")
+        self.assertEqual(endpoint_template("https://my.cluster/acs/api/v1/users/foo/permissions"), "/acs/api/v1/users/{id}/permissions")
+        self.assertEqual(endpoint_template("https://my.cluster/service/kafka/v1/plans/deploy"), "/service/{service}/v1/plans/{plan}")
+        self.assertEqual(endpoint_template("https://my.cluster/mesos//api/v1"), "/mesos/api/v1")
+
+    def test_report(self):
+        stats = RequestStats()
+        for seconds in (0.1, 0.2, 0.3, 0.4):
+            stats.record("get", "https://my.cluster/service/marathon/v2/apps/foo%d" % int(seconds*10), 200, seconds, 10)
+        stats.record("get", "https://my.cluster/service/marathon/v2/apps/bar", 404, 1.0, 5)
+        stats.record("put", "https://my.cluster/service/marathon/v2/apps/bar", 200, 0.5, 5)
+        report = stats.report()
+        self.assertEqual([(entry["method"], entry["endpoint"]) for entry in report],
+                         [("GET", "/service/marathon/v2/apps/{id}"), ("PUT", "/service/marathon/v2/apps/{id}")])
+        self.assertEqual(report[0]["count"], 5)
+        self.assertAlmostEqual(report[0]["total"], 2.0)
+        self.assertEqual(report[0]["p50"], 0.3)
+        self.assertEqual(report[0]["p95"], 1.0)
+        self.assertEqual(report[0]["bytes"], 45)
+        self.assertEqual(report[0]["status_codes"], {"200": 4, "404": 1})
+
+    @mock.patch("dcosdeploy.util.http.get_base_url", lambda: "https://my.cluster")
+    @mock.patch("dcosdeploy.util.http.get_auth", lambda: None)
+    def test_request_stats(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "stats.json")
+            with requests_mock.Mocker() as m:
+                m.get("https://my.cluster/service/metronome/v1/jobs", text="[]")
+                with request_stats(filename=filename):
+                    http.get("/service/metronome/v1/jobs")
+                http.get("/service/metronome/v1/jobs")
+            with open(filename) as stats_file:
+                report = json.load(stats_file)
+        self.assertEqual(len(report), 1)
+        self.assertEqual(report[0]["endpoint"], "/service/metronome/v1/jobs")
+        self.assertEqual(report[0]["count"], 1)
+        self.assertEqual(report[0]["bytes"], 2)
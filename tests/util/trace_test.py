@@ -0,0 +1,46 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from dcosdeploy.util import trace
+
+
+class TraceTest(unittest.TestCase):
+    def test_disabled(self):
+        span = trace.span("foo", "test", bar=1)
+        with span as active:
+            active.set("baz", 2)
+        self.assertIs(span, trace.span("other", "test"))
+        self.assertIs(trace.request_span("get", "https://my.cluster/foo"), span)
+
+    def test_tracing(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "trace.json")
+            with trace.tracing(filename):
+                with trace.request_span("get", "https://my.cluster/service/marathon/v2/apps?id=/foo"):
+                    pass
+                with trace.span("outer", "test", entity="a") as span:
+                    span.set("changed", True)
+                    with trace.span("inner", "test"):
+                        pass
+                thread = threading.Thread(target=lambda: trace.span("worker", "test").__enter__().__exit__(None, None, None), name="worker-thread")
+                thread.start()
+                thread.join()
+                with self.assertRaises(ValueError):
+                    with trace.span("failing", "test"):
+                        raise ValueError("broken")
+            with open(filename) as trace_file:
+                events = json.load(trace_file)["traceEvents"]
+        spans = dict((event["name"], event) for event in events if event["ph"] == "X")
+        self.assertCountEqual(spans.keys(), ["dcos-deploy", "GET /service/marathon/v2/apps", "outer", "inner", "worker", "failing"])
+        self.assertEqual(spans["GET /service/marathon/v2/apps"]["cat"], "http")
+        self.assertEqual(spans["outer"]["args"], dict(entity="a", changed=True))
+        self.assertGreaterEqual(spans["inner"]["ts"], spans["outer"]["ts"])
+        self.assertLessEqual(spans["inner"]["ts"] + spans["inner"]["dur"], spans["outer"]["ts"] + spans["outer"]["dur"])
+        self.assertEqual(spans["outer"]["tid"], spans["inner"]["tid"])
+        self.assertNotEqual(spans["outer"]["tid"], spans["worker"]["tid"])
+        self.assertEqual(spans["failing"]["args"]["error"], "ValueError: broken")
+        thread_names = [event["args"]["name"] for event in events if event["ph"] == "M"]
+        self.assertIn("worker-thread", thread_names)
+        self.assertIs(trace.span("after", "test"), trace.span("other", "test"))
@@ -0,0 +1,95 @@
+import threading
+import time
+import unittest
+from unittest import mock
+from dcosdeploy.util import http
+from dcosdeploy.util.wait import wait_for, wait_timeout, current_timeout, Backoff, WaitTimeoutException, POLL_REQUEST_TIMEOUT
+
+
+FAST = Backoff(initial=0.01, factor=2, maximum=0.05)
+
+
+class WaitTest(unittest.TestCase):
+    def test_wait_for(self):
+        calls = list()
+
+        def _check():
+            calls.append(True)
+            return len(calls) if len(calls) == 3 else None
+
+        self.assertEqual(wait_for(_check, "not finished", timeout=5, backoff=FAST), 3)
+
+    def test_timeout(self):
+        start = time.time()
+        with self.assertRaises(WaitTimeoutException) as context:
+            wait_for(lambda: False, "Deployment did not complete", timeout=0.1, backoff=FAST)
+        self.assertLess(time.time() - start, 1)
+        self.assertEqual(str(context.exception), "Deployment did not complete after 0 seconds")
+
+    def test_error_is_passed_on(self):
+        def _check():
+            raise ValueError("failed")
+        with self.assertRaises(ValueError):
+            wait_for(_check, "not finished", timeout=5, backoff=FAST)
+
+    def test_timeout_scope(self):
+        self.assertEqual(current_timeout(), 600)
+        self.assertEqual(current_timeout(120), 120)
+        with wait_timeout(30):
+            self.assertEqual(current_timeout(120), 30)
+            with wait_timeout(None):
+                self.assertEqual(current_timeout(), 30)
+            thread_timeout = list()
+            thread = threading.Thread(target=lambda: thread_timeout.append(current_timeout()))
+            thread.start()
+            thread.join()
+            self.assertEqual(thread_timeout, [600])
+        self.assertEqual(current_timeout(), 600)
+
+    def test_concurrent_waits(self):
+        results = dict()
+
+        def _wait(idx):
+            end = time.time() + 0.05 * idx
+            results[idx] = wait_for(lambda: time.time() >= end and idx, "not finished", timeout=5, backoff=FAST)
+
+        threads = [threading.Thread(target=_wait, args=(idx,)) for idx in range(1, 6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, dict((idx, idx) for idx in range(1, 6)))
+
+    def test_hanging_check(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def _hang():
+            release.wait(5)
+            return True
+
+        start = time.time()
+        with self.assertRaises(WaitTimeoutException):
+            wait_for(_hang, "hangs", timeout=0.2, backoff=FAST)
+        self.assertLess(time.time() - start, 1)
+        # A hanging check does not keep other waits from being polled
+        results = list()
+        thread = threading.Thread(target=lambda: results.append(wait_for(_hang, "hangs", timeout=2, backoff=FAST)))
+        thread.start()
+        self.assertEqual(wait_for(lambda: "ok", "not finished", timeout=1, backoff=FAST), "ok")
+        # Released before its timeout the hanging check finishes the wait
+        release.set()
+        thread.join()
+        self.assertEqual(results, [True])
+
+    def test_request_timeout(self):
+        with mock.patch("dcosdeploy.util.http._session") as session, \
+                mock.patch("dcosdeploy.util.http.get_auth"):
+            wait_for(lambda: http.get("https://my.cluster/foo"), "not finished", timeout=1, backoff=FAST)
+            http.get("https://my.cluster/foo")
+        self.assertEqual(session.request.call_args_list[0][1]["timeout"], POLL_REQUEST_TIMEOUT)
+        self.assertNotIn("timeout", session.request.call_args_list[1][1])
+
+    def test_backoff(self):
+        intervals = Backoff(initial=1, factor=2, maximum=5, jitter=0).intervals()
+        self.assertEqual([next(intervals) for _ in range(5)], [1, 2, 4, 5, 5])